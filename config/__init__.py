@@ -0,0 +1,19 @@
+"""
+Paquete de configuración.
+Reexporta config.config para que `from config import X` y
+`from config.config import X` compartan el mismo módulo (y un único
+load_dotenv por proceso).
+"""
+
+from config import config as _config_module
+from config.config import (
+    REQUIRED_ENV_VARS,
+    VALIDATED_ENV_VARS,
+    load_environment,
+    validate_environment,
+)
+
+
+def __getattr__(name):
+    """Delega las rutas perezosas (`DATA_DIR`, `LOG_FILE`, ...) en config.config."""
+    return getattr(_config_module, name)
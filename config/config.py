@@ -2,57 +2,123 @@
 Configuración centralizada del proyecto
 """
 
+import functools
 import os
 from dotenv import load_dotenv
 
-# Cargar variables de entorno
-load_dotenv()
+_dotenv_loaded = False
 
-# Rutas del proyecto
-PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
-LOGS_DIR = os.path.join(PROJECT_ROOT, 'logs')
-TEMPLATES_DIR = os.path.join(PROJECT_ROOT, 'templates')
-CONFIG_DIR = os.path.join(PROJECT_ROOT, 'config')
 
-# Configuración de logging
-LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-LOG_LEVEL = 'INFO'
-LOG_FILE = os.path.join(LOGS_DIR, 'scraping_agent.log')
+def load_environment():
+    """
+    Carga el archivo .env una sola vez por proceso.
+    Las llamadas posteriores no vuelven a leer ni parsear el archivo.
+    """
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv()
+        _dotenv_loaded = True
+
+
+class _Config:
+    """
+    Configuración perezosa del proyecto.
+    Las rutas se calculan en el primer acceso y quedan cacheadas en la instancia.
+    """
+
+    # Configuración de logging
+    LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    LOG_LEVEL = 'INFO'
+
+    # Rutas del proyecto
+    @functools.cached_property
+    def PROJECT_ROOT(self):
+        load_environment()
+        return os.path.dirname(os.path.abspath(__file__))
+
+    @functools.cached_property
+    def DATA_DIR(self):
+        return os.path.join(self.PROJECT_ROOT, 'data')
+
+    @functools.cached_property
+    def LOGS_DIR(self):
+        return os.path.join(self.PROJECT_ROOT, 'logs')
+
+    @functools.cached_property
+    def TEMPLATES_DIR(self):
+        return os.path.join(self.PROJECT_ROOT, 'templates')
+
+    @functools.cached_property
+    def CONFIG_DIR(self):
+        return os.path.join(self.PROJECT_ROOT, 'config')
 
-# Configuración de la aplicación
-DEFAULT_EMAIL_TEMPLATE = os.path.join(TEMPLATES_DIR, 'email_template.txt')
-EXCEL_TEMPLATE = os.path.join(DATA_DIR, 'practicasPlantilla.xlsx')
-CONTACTOS_FILE = os.path.join(DATA_DIR, 'Contactos de Referentes.xlsx')
+    @functools.cached_property
+    def LOG_FILE(self):
+        return os.path.join(self.LOGS_DIR, 'scraping_agent.log')
+
+    # Configuración de la aplicación
+    @functools.cached_property
+    def DEFAULT_EMAIL_TEMPLATE(self):
+        return os.path.join(self.TEMPLATES_DIR, 'email_template.txt')
+
+    @functools.cached_property
+    def EXCEL_TEMPLATE(self):
+        return os.path.join(self.DATA_DIR, 'practicasPlantilla.xlsx')
+
+    @functools.cached_property
+    def CONTACTOS_FILE(self):
+        return os.path.join(self.DATA_DIR, 'Contactos de Referentes.xlsx')
+
+
+config = _Config()
+
+
+def __getattr__(name):
+    """Mantiene el acceso clásico `config.DATA_DIR` a nivel de módulo, resuelto de forma perezosa."""
+    if name.isupper() and hasattr(_Config, name):
+        return getattr(config, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Variables de entorno requeridas
-REQUIRED_ENV_VARS = [
+REQUIRED_ENV_VARS = frozenset((
     'TELEGRAM_BOT_TOKEN',
     'OPENAI_API_KEY',
     'EMAIL_HOST',
     'EMAIL_PORT',
     'EMAIL_USER',
-    'EMAIL_PASSWORD'
-]
+    'EMAIL_PASSWORD',
+))
+
+# Variables que validate_environment exige en tiempo de ejecución
+VALIDATED_ENV_VARS = frozenset((
+    'EDUCATIONPOSTS_USERNAME',
+    'EDUCATIONPOSTS_PASSWORD',
+    'TELEGRAM_BOT_TOKEN',
+    # 'OPENAI_API_KEY',
+    # 'ANTHROPIC_API_KEY',
+    # 'EMAIL_HOST',
+    # 'EMAIL_PORT',
+    # 'EMAIL_USER',
+    # 'EMAIL_PASSWORD',
+))
 
+@functools.lru_cache(maxsize=1)
 def validate_environment():
     """
     Valida que las variables de entorno necesarias estén configuradas.
     Lanza un EnvironmentError si falta alguna.
+
+    El resultado se memoriza: tras la primera validación correcta las
+    llamadas siguientes devuelven True sin volver a consultar el entorno.
     """
-    required_vars = {
-        'EDUCATIONPOSTS_USERNAME',
-        'EDUCATIONPOSTS_PASSWORD',
-        'TELEGRAM_BOT_TOKEN',
-        # 'OPENAI_API_KEY',
-        # 'ANTHROPIC_API_KEY',
-        # 'EMAIL_HOST',
-        # 'EMAIL_PORT',
-        # 'EMAIL_USER',
-        # 'EMAIL_PASSWORD',
-    }
-    
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
+    load_environment()
+    environ = os.environ
+    # Las ausentes salen de la diferencia de conjuntos; entre las presentes
+    # solo hay que revisar las que están definidas pero vacías
+    present = VALIDATED_ENV_VARS & environ.keys()
+    missing_vars = sorted(
+        (VALIDATED_ENV_VARS - present) | {var for var in present if not environ[var]}
+    )
     
     if missing_vars:
         raise EnvironmentError(
@@ -61,3 +127,4 @@ def validate_environment():
         )
     
     print("✅ Todas las variables de entorno requeridas están configuradas.")
+    return True
@@ -6,16 +6,19 @@ Este script ahora ejecuta la lógica de 'scrape_all_safe.py' que es la versión
 """
 
 import sys
-import os
 import asyncio
 
-# Agregar el directorio del proyecto al path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# No hace falta tocar sys.path: al ejecutar run.py, su directorio (la raíz
+# del proyecto) ya es sys.path[0]
 
 if __name__ == "__main__":
     try:
         # Importamos la función 'main' del script estable y la ejecutamos
         from scripts.scrape_all_safe import main as scrape_main
+        from src.utils.event_loop import install_uvloop
+        
+        # uvloop (si está instalado) para el loop que crea el bot
+        install_uvloop()
         
         # El script original 'scrape_all_safe.py' maneja su propio bucle de eventos asyncio
         # por lo que simplemente llamamos a su función main.
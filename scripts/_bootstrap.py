@@ -0,0 +1,13 @@
+"""
+Hace importable el paquete `src` desde los scripts de esta carpeta.
+
+Cada script lo importa una sola vez antes de cualquier `from src...`,
+en lugar de repetir su propia manipulación de `sys.path`.
+"""
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
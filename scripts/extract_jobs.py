@@ -6,38 +6,46 @@ con autenticación y procesamiento de datos detallado.
 import asyncio
 import os
 import sys
-import json
+import time
 import logging
 import argparse
+from collections import Counter
+from operator import methodcaller
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Añadir el directorio raíz al path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import _bootstrap  # noqa: F401  (añade la raíz del proyecto a sys.path)
+
+from src.utils.logger import setup_logging
+from src.utils.event_loop import install_uvloop
 
 # Cargar variables de entorno
 load_dotenv()
 
-# Configurar logging
+# Marca de tiempo de la ejecución, compartida por el log y los archivos de salida
+_RUN_TS = time.strftime('%Y%m%d_%H%M%S')
+
+# Configurar logging (el archivo se escribe por lotes y solo si hay registros)
 log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
-os.makedirs(log_dir, exist_ok=True)
+setup_logging(os.path.join(log_dir, f"scraper_{_RUN_TS}.log"))
+logger = logging.getLogger("scraper")
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s: %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(os.path.join(
-            log_dir,
-            f"scraper_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-        ))
-    ]
+# Extractores de campos para las estadísticas
+_GET_COUNTY = methodcaller("get", "county", "Desconocido")
+_GET_VACANCY = methodcaller("get", "vacancy", "Desconocido")
+_EXAMPLE_FIELDS = (
+    ("Escuela", "school"),
+    ("Vacante", "vacancy"),
+    ("Condado", "county"),
+    ("Email", "email"),
+    ("Fecha límite", "deadline"),
+    ("URL", "url"),
 )
-logger = logging.getLogger("scraper")
 
 # Importar el scraper mejorado
 from src.scrapers.scraper_educationposts import EducationPosts
+from src.utils.json_io import write_json
 
 async def extract_and_process_jobs(args):
     """
@@ -64,13 +72,13 @@ async def extract_and_process_jobs(args):
     logger.info("=" * 80)
     logger.info("🔍 EXTRACCIÓN DE OFERTAS DE TRABAJO DE EDUCATIONPOSTS.IE")
     logger.info("=" * 80)
-    logger.info(f"📊 Configuración:")
-    logger.info(f"• Nivel educativo: {args.nivel}")
-    logger.info(f"• Condado: {args.condado if args.condado else 'Todos'}")
-    logger.info(f"• Tipo de vacante: {args.tipo_vacante if args.tipo_vacante else 'Todas'}")
-    logger.info(f"• Máximo de páginas: {args.paginas if args.paginas else 'Todas'}")
-    logger.info(f"• Autenticación: {'Desactivada' if args.sin_login else 'Activada'}")
-    logger.info(f"• Modo depuración: {'Activado' if args.debug else 'Desactivado'}")
+    logger.info("📊 Configuración:")
+    logger.info("• Nivel educativo: %s", args.nivel)
+    logger.info("• Condado: %s", args.condado if args.condado else 'Todos')
+    logger.info("• Tipo de vacante: %s", args.tipo_vacante if args.tipo_vacante else 'Todas')
+    logger.info("• Máximo de páginas: %s", args.paginas if args.paginas else 'Todas')
+    logger.info("• Autenticación: %s", 'Desactivada' if args.sin_login else 'Activada')
+    logger.info("• Modo depuración: %s", 'Activado' if args.debug else 'Desactivado')
     logger.info("-" * 80)
     
     try:
@@ -87,7 +95,7 @@ async def extract_and_process_jobs(args):
         
         # Iniciar el proceso de scraping
         start_time = datetime.now()
-        logger.info(f"⏱️ Inicio del proceso: {start_time.strftime('%H:%M:%S')}")
+        logger.info("⏱️ Inicio del proceso: %s", start_time.strftime('%H:%M:%S'))
         
         # Extraer ofertas de trabajo (con login si está configurado)
         ofertas = await scraper.fetch_all(max_pages=args.paginas, login_first=not args.sin_login)
@@ -95,7 +103,7 @@ async def extract_and_process_jobs(args):
         # Calcular tiempo de ejecución
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
-        logger.info(f"⏱️ Proceso completado en {duration:.1f} segundos")
+        logger.info("⏱️ Proceso completado en %.1f segundos", duration)
         
         # Verificar resultados
         if not ofertas:
@@ -107,51 +115,39 @@ async def extract_and_process_jobs(args):
         os.makedirs(data_dir, exist_ok=True)
         
         # Crear nombre de archivo con timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"ofertas_{args.nivel}_{args.condado or 'todos'}_{timestamp}.json"
+        filename = f"ofertas_{args.nivel}_{args.condado or 'todos'}_{_RUN_TS}.json"
         filepath = os.path.join(data_dir, filename)
         
         # Guardar en formato JSON
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(ofertas, f, ensure_ascii=False, indent=2)
+        write_json(filepath, ofertas)
         
-        logger.info(f"💾 Resultados guardados en: {filepath}")
+        logger.info("💾 Resultados guardados en: %s", filepath)
         
         # Mostrar estadísticas
         logger.info("\n📊 ESTADÍSTICAS:")
-        logger.info(f"• Ofertas encontradas con email: {len(ofertas)}")
+        logger.info("• Ofertas encontradas con email: %s", len(ofertas))
         
-        # Por condado
-        by_county = {}
-        for oferta in ofertas:
-            county = oferta.get("county", "Desconocido")
-            by_county[county] = by_county.get(county, 0) + 1
+        # Por condado y por tipo de vacante; map + methodcaller y el conteo
+        # de Counter se ejecutan en C (get conserva el valor por defecto
+        # porque las ofertas de la vista móvil pueden no traer estos campos)
+        by_county = Counter(map(_GET_COUNTY, ofertas))
+        by_vacancy = Counter(map(_GET_VACANCY, ofertas))
         
         logger.info("\n📍 TOP CONDADOS:")
-        for county, count in sorted(by_county.items(), key=lambda x: x[1], reverse=True)[:5]:
-            logger.info(f"• {county}: {count} ofertas")
-        
-        # Por tipo de vacante
-        by_vacancy = {}
-        for oferta in ofertas:
-            vacancy = oferta.get("vacancy", "Desconocido")
-            by_vacancy[vacancy] = by_vacancy.get(vacancy, 0) + 1
+        for county, count in by_county.most_common(5):
+            logger.info("• %s: %s ofertas", county, count)
         
         logger.info("\n👨‍🏫 TOP TIPOS DE VACANTE:")
-        for vacancy, count in sorted(by_vacancy.items(), key=lambda x: x[1], reverse=True)[:5]:
-            logger.info(f"• {vacancy}: {count} ofertas")
+        for vacancy, count in by_vacancy.most_common(5):
+            logger.info("• %s: %s ofertas", vacancy, count)
             
         # Ejemplo de algunas ofertas
         if len(ofertas) > 0:
             logger.info("\n📝 EJEMPLOS DE OFERTAS:")
             for i, oferta in enumerate(ofertas[:3], 1):
-                logger.info(f"\n--- OFERTA {i} ---")
-                logger.info(f"• Escuela: {oferta.get('school', 'N/A')}")
-                logger.info(f"• Vacante: {oferta.get('vacancy', 'N/A')}")
-                logger.info(f"• Condado: {oferta.get('county', 'N/A')}")
-                logger.info(f"• Email: {oferta.get('email', 'N/A')}")
-                logger.info(f"• Fecha límite: {oferta.get('deadline', 'N/A')}")
-                logger.info(f"• URL: {oferta.get('url', 'N/A')}")
+                logger.info("\n--- OFERTA %s ---", i)
+                for label, key in _EXAMPLE_FIELDS:
+                    logger.info("• %s: %s", label, oferta.get(key, 'N/A'))
         
         logger.info("\n✅ Proceso completado con éxito")
         return True
@@ -160,7 +156,7 @@ async def extract_and_process_jobs(args):
         logger.warning("\n⚠️ Proceso interrumpido por el usuario")
         return False
     except Exception as e:
-        logger.error(f"\n❌ Error durante el proceso: {str(e)}", exc_info=True)
+        logger.error("\n❌ Error durante el proceso: %s", e, exc_info=True)
         return False
 
 def main():
@@ -201,6 +197,7 @@ def main():
         logging.getLogger("edu").setLevel(logging.DEBUG)
     
     # Ejecutar el proceso principal
+    install_uvloop()
     asyncio.run(extract_and_process_jobs(args))
 
 if __name__ == "__main__":
@@ -4,34 +4,55 @@ Script para scrapear ofertas de trabajo y generar application forms personalizad
 """
 import asyncio
 import os
-import sys
-import json
+import time
 import logging
-from datetime import datetime
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 import tempfile
-from src.utils.document_reader import DocumentReader
 
-# Añadir el directorio raíz al path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import _bootstrap  # noqa: F401  (añade la raíz del proyecto a sys.path)
 
 # Cargar variables de entorno
 load_dotenv()
 
 from src.scrapers.scraper_educationposts import EducationPosts
+from src.utils.document_reader import DocumentReader
+from src.utils.event_loop import install_uvloop
+from src.utils.logger import setup_logging
+
+# Marca de tiempo de la ejecución, compartida por el log y los archivos de salida
+_RUN_TS = time.strftime('%Y%m%d_%H%M%S')
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s: %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(f"logs/application_forms_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-    ]
-)
+# Configurar logging (el archivo se escribe por lotes y solo si hay registros)
+setup_logging(f"logs/application_forms_{_RUN_TS}.log")
 logger = logging.getLogger("application_forms")
 
+# Cualquier carácter no alfanumérico se sustituye por "_" en los nombres de archivo
+_UNSAFE_FILENAME_CHARS = re.compile(r'\W')
+
+# Estado de cada proceso trabajador: plantilla en memoria y lector reutilizable
+_worker_template = None
+_worker_reader = None
+
+def _init_worker(template_bytes):
+    """Recibe la plantilla una sola vez por proceso trabajador."""
+    global _worker_template, _worker_reader
+    _worker_template = template_bytes
+    _worker_reader = DocumentReader()
+
+def _render_application_form(output_path, offer_data):
+    """
+    Personaliza un application form.
+    Se ejecuta en un proceso trabajador: PyMuPDF no es seguro entre hilos.
+    """
+    return _worker_reader.customize_application_form_pdf_from_bytes(
+        template_bytes=_worker_template,
+        output_path=output_path,
+        offer_data=offer_data
+    )
+
 async def main():
     """Función principal para scrapear y generar application forms"""
     logger.info("🚀 Iniciando proceso de scraping y generación de application forms...")
@@ -40,7 +61,7 @@ async def main():
     template_path = input("🖊️ Ingresa la ruta a tu plantilla de application form (.pdf): ").strip()
     
     if not os.path.exists(template_path) or not template_path.lower().endswith('.pdf'):
-        logger.error(f"❌ Error: El archivo de plantilla no existe o no es un .pdf: {template_path}")
+        logger.error("❌ Error: El archivo de plantilla no existe o no es un .pdf: %s", template_path)
         return
     
     # Configurar y ejecutar el scraper
@@ -60,12 +81,12 @@ async def main():
             logger.error("❌ No se encontraron ofertas")
             return
         
-        logger.info(f"✅ Se encontraron {len(ofertas)} ofertas")
+        logger.info("✅ Se encontraron %s ofertas", len(ofertas))
         
         # Limitar a 10 ofertas para la prueba
         if len(ofertas) > 10:
             ofertas = ofertas[:10]
-            logger.info(f"📊 Limitando a 10 ofertas para la prueba")
+            logger.info("📊 Limitando a 10 ofertas para la prueba")
         
         # Crear directorio para los application forms personalizados
         output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'application_forms')
@@ -73,40 +94,45 @@ async def main():
         
         # Procesar cada oferta y generar un application form personalizado
         logger.info("📝 Generando application forms personalizados...")
-        document_reader = DocumentReader()
         
+        jobs = []
         for i, oferta in enumerate(ofertas):
             # Preparar los datos para el application form
             offer_data = scraper.prepare_offer_data_for_application_form(oferta)
             
             # Crear nombre para el archivo personalizado
-            school_name_safe = ''.join(c if c.isalnum() else '_' for c in offer_data['school_name'])
+            school_name_safe = _UNSAFE_FILENAME_CHARS.sub('_', offer_data['school_name'])
             custom_filename = f"Application_Form_{school_name_safe}_{i+1}.pdf"
             output_path = os.path.join(output_dir, custom_filename)
-            
-            # Personalizar el documento PDF
-            try:
-                personalized_path = document_reader.customize_application_form_pdf(
-                    template_path=template_path,
-                    output_path=output_path,
-                    offer_data=offer_data
-                )
-                
-                if personalized_path:
-                    logger.info(f"✅ [{i+1}/{len(ofertas)}] Application form personalizado: {personalized_path}")
-                    logger.info(f"   📌 Posición: {offer_data['position']}")
-                    logger.info(f"   📌 Escuela: {offer_data['school_name']}")
-                    logger.info(f"   📌 Roll Number: {offer_data['roll_number']}")
-                else:
-                    logger.warning(f"⚠️ No se pudo personalizar el application form para: {offer_data['school_name']}")
-                    
-            except Exception as e:
-                logger.error(f"❌ Error al personalizar application form #{i+1}: {str(e)}")
+            jobs.append((i, output_path, offer_data))
+        
+        # Personalizar los documentos PDF en paralelo (un proceso por núcleo)
+        # La plantilla se lee una sola vez y se envía a cada trabajador al arrancar
+        template_bytes = DocumentReader.load_pdf_template(template_path)
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker,
+                                 initargs=(template_bytes,)) as pool:
+            results = await asyncio.gather(*[
+                loop.run_in_executor(pool, _render_application_form, output_path, offer_data)
+                for _, output_path, offer_data in jobs
+            ], return_exceptions=True)
+        
+        for (i, _, offer_data), personalized_path in zip(jobs, results):
+            if isinstance(personalized_path, Exception):
+                logger.error("❌ Error al personalizar application form #%s: %s", i+1, personalized_path)
+            elif personalized_path:
+                logger.info("✅ [%s/%s] Application form personalizado: %s", i+1, len(ofertas), personalized_path)
+                logger.info("   📌 Posición: %s", offer_data['position'])
+                logger.info("   📌 Escuela: %s", offer_data['school_name'])
+                logger.info("   📌 Roll Number: %s", offer_data['roll_number'])
+            else:
+                logger.warning("⚠️ No se pudo personalizar el application form para: %s", offer_data['school_name'])
         
-        logger.info(f"✅ Todos los application forms han sido generados en: {output_dir}")
+        logger.info("✅ Todos los application forms han sido generados en: %s", output_dir)
         
     except Exception as e:
-        logger.error(f"❌ Error durante el proceso: {str(e)}")
+        logger.error("❌ Error durante el proceso: %s", e)
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
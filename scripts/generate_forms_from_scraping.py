@@ -5,32 +5,79 @@ Script para generar application forms PDFs a partir de los resultados de scrapin
 import asyncio
 import os
 import sys
-import json
+import time
 import logging
-from datetime import datetime
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
 load_dotenv()
 
-# Añadir el directorio raíz al path para importaciones
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import _bootstrap  # noqa: F401  (añade la raíz del proyecto a sys.path)
 
 from src.scrapers.scraper_educationposts import EducationPosts
 from src.utils.document_reader import DocumentReader
+from src.utils.event_loop import install_uvloop
+from src.utils.json_io import read_json_async, write_json_async
+from src.utils.logger import setup_logging
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s: %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(f"logs/generate_forms_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-    ]
-)
+# Marca de tiempo de la ejecución, compartida por el log y los archivos de salida
+_RUN_TS = time.strftime('%Y%m%d_%H%M%S')
+
+# Configurar logging (el archivo se escribe por lotes y solo si hay registros)
+setup_logging(f"logs/generate_forms_{_RUN_TS}.log")
 logger = logging.getLogger("generate_forms")
 
+# Cualquier carácter no alfanumérico se sustituye por "_" en los nombres de archivo
+_UNSAFE_FILENAME_CHARS = re.compile(r'\W')
+
+DEFAULT_TEMPLATES = [
+    "data/Application_Form_Template.pdf",
+    "temp/template_application_form.pdf",
+    "templates/application_form_template.pdf"
+]
+
+def _find_default_template(candidates):
+    """
+    Devuelve la primera plantilla existente de la lista de candidatas.
+    Cada directorio se lista una sola vez con os.scandir en lugar de hacer un stat por ruta.
+    """
+    listings = {}
+    for candidate in candidates:
+        parent, name = os.path.split(candidate)
+        if parent not in listings:
+            try:
+                with os.scandir(parent or '.') as entries:
+                    listings[parent] = {entry.name for entry in entries if entry.is_file()}
+            except (FileNotFoundError, NotADirectoryError):
+                listings[parent] = set()
+        if name in listings[parent]:
+            return candidate
+    return None
+
+# Estado de cada proceso trabajador: plantilla en memoria y lector reutilizable
+_worker_template = None
+_worker_reader = None
+
+def _init_worker(template_bytes):
+    """Recibe la plantilla una sola vez por proceso trabajador."""
+    global _worker_template, _worker_reader
+    _worker_template = template_bytes
+    _worker_reader = DocumentReader()
+
+def _render_application_form(output_path, offer_data):
+    """
+    Genera un application form personalizado.
+    Se ejecuta en un proceso trabajador: PyMuPDF no es seguro entre hilos.
+    """
+    return _worker_reader.customize_application_form_pdf_from_bytes(
+        template_bytes=_worker_template,
+        output_path=output_path,
+        offer_data=offer_data
+    )
+
 async def generate_forms_from_json(json_file_path, template_path=None):
     """
     Genera application forms PDFs a partir de un archivo JSON de ofertas.
@@ -40,14 +87,12 @@ async def generate_forms_from_json(json_file_path, template_path=None):
         template_path: Ruta a la plantilla PDF (opcional)
     """
     try:
-        # Verificar que el archivo JSON existe
-        if not os.path.exists(json_file_path):
-            logger.error(f"❌ Archivo JSON no encontrado: {json_file_path}")
-            return
-        
         # Leer el archivo JSON
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        try:
+            data = await read_json_async(json_file_path)
+        except FileNotFoundError:
+            logger.error("❌ Archivo JSON no encontrado: %s", json_file_path)
+            return
         
         # Extraer ofertas (puede ser una lista directa o estar en una clave)
         if isinstance(data, list):
@@ -62,23 +107,17 @@ async def generate_forms_from_json(json_file_path, template_path=None):
             logger.warning("❌ No hay ofertas en el archivo JSON")
             return
         
-        logger.info(f"📄 Leyendo {len(offers)} ofertas desde: {json_file_path}")
+        logger.info("📄 Leyendo %s ofertas desde: %s", len(offers), json_file_path)
         
         # Si no se proporciona plantilla, buscar una por defecto
         if not template_path:
-            default_templates = [
-                "data/Application_Form_Template.pdf",
-                "temp/template_application_form.pdf",
-                "templates/application_form_template.pdf"
-            ]
-            
-            for template in default_templates:
-                if os.path.exists(template):
-                    template_path = template
-                    logger.info(f"📋 Usando plantilla por defecto: {template_path}")
-                    break
-        
-        if not template_path or not os.path.exists(template_path):
+            template_path = _find_default_template(DEFAULT_TEMPLATES)
+            if template_path:
+                logger.info("📋 Usando plantilla por defecto: %s", template_path)
+        elif not os.path.isfile(template_path):
+            template_path = None
+        
+        if not template_path:
             logger.error("❌ No se encontró plantilla de application form")
             logger.info("💡 Coloca una plantilla PDF en data/Application_Form_Template.pdf")
             return
@@ -87,70 +126,78 @@ async def generate_forms_from_json(json_file_path, template_path=None):
         output_dir = os.path.join("temp", "application_forms")
         os.makedirs(output_dir, exist_ok=True)
         
-        # Inicializar DocumentReader
-        document_reader = DocumentReader()
         scraper = EducationPosts()
         
         generated_forms = []
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = _RUN_TS
         
-        logger.info(f"📝 Generando application forms PDFs para {len(offers)} ofertas...")
+        logger.info("📝 Generando application forms PDFs para %s ofertas...", len(offers))
         
+        # Preparar los datos y rutas de cada oferta
+        # (prefijo de directorio y sufijo del nombre se calculan una sola vez)
+        output_prefix = output_dir + os.sep
+        filename_suffix = "_%s_%%d.pdf" % timestamp
+        jobs = []
         for i, offer in enumerate(offers):
             try:
-                # Preparar datos de la oferta
                 offer_data = scraper.prepare_offer_data_for_application_form(offer)
                 
                 # Crear nombre para el archivo personalizado
-                school_name_safe = ''.join(c if c.isalnum() else '_' for c in offer_data['school_name'])
-                custom_filename = f"Application_Form_{school_name_safe}_{timestamp}_{i+1}.pdf"
-                output_path = os.path.join(output_dir, custom_filename)
-                
-                # Generar PDF personalizado
-                result_path = document_reader.customize_application_form_pdf(
-                    template_path=template_path,
-                    output_path=output_path,
-                    offer_data=offer_data
-                )
-                
-                if result_path:
-                    generated_forms.append({
-                        'file_path': result_path,
-                        'school_name': offer_data['school_name'],
-                        'position': offer_data['position'],
-                        'roll_number': offer_data['roll_number']
-                    })
-                    logger.info(f"✅ [{i+1}/{len(offers)}] PDF generado: {custom_filename}")
-                    logger.info(f"   📌 Escuela: {offer_data['school_name']}")
-                    logger.info(f"   📌 Posición: {offer_data['position']}")
-                    logger.info(f"   📌 Roll Number: {offer_data['roll_number']}")
-                else:
-                    logger.warning(f"⚠️ No se pudo generar PDF para: {offer_data['school_name']}")
-                    
+                school_name_safe = _UNSAFE_FILENAME_CHARS.sub('_', offer_data['school_name'])
+                custom_filename = "Application_Form_" + school_name_safe + filename_suffix % (i + 1)
+                output_path = output_prefix + custom_filename
+                jobs.append((i, custom_filename, output_path, offer_data))
             except Exception as e:
-                logger.error(f"❌ Error generando PDF #{i+1}: {str(e)}")
+                logger.error("❌ Error generando PDF #%s: %s", i+1, e)
+        
+        # Generar los PDFs en paralelo (un proceso por núcleo)
+        # La plantilla se lee una sola vez y se envía a cada trabajador al arrancar
+        template_bytes = DocumentReader.load_pdf_template(template_path)
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker,
+                                 initargs=(template_bytes,)) as pool:
+            results = await asyncio.gather(*[
+                loop.run_in_executor(pool, _render_application_form, output_path, offer_data)
+                for _, _, output_path, offer_data in jobs
+            ], return_exceptions=True)
         
-        logger.info(f"🎯 Total PDFs generados: {len(generated_forms)}")
-        logger.info(f"📁 PDFs guardados en: {output_dir}")
+        for (i, custom_filename, _, offer_data), result_path in zip(jobs, results):
+            if isinstance(result_path, Exception):
+                logger.error("❌ Error generando PDF #%s: %s", i+1, result_path)
+            elif result_path:
+                generated_forms.append({
+                    'file_path': result_path,
+                    'school_name': offer_data['school_name'],
+                    'position': offer_data['position'],
+                    'roll_number': offer_data['roll_number']
+                })
+                logger.info("✅ [%s/%s] PDF generado: %s", i+1, len(offers), custom_filename)
+                logger.info("   📌 Escuela: %s", offer_data['school_name'])
+                logger.info("   📌 Posición: %s", offer_data['position'])
+                logger.info("   📌 Roll Number: %s", offer_data['roll_number'])
+            else:
+                logger.warning("⚠️ No se pudo generar PDF para: %s", offer_data['school_name'])
+        
+        logger.info("🎯 Total PDFs generados: %s", len(generated_forms))
+        logger.info("📁 PDFs guardados en: %s", output_dir)
         
         # Guardar resumen de PDFs generados
         summary_file = os.path.join(output_dir, f"summary_{timestamp}.json")
-        with open(summary_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                'generated_forms': generated_forms,
-                'metadata': {
-                    'timestamp': timestamp,
-                    'source_file': json_file_path,
-                    'template_used': template_path,
-                    'total_offers': len(offers),
-                    'total_forms_generated': len(generated_forms)
-                }
-            }, f, ensure_ascii=False, indent=2)
-        
-        logger.info(f"📋 Resumen guardado en: {summary_file}")
+        await write_json_async(summary_file, {
+            'generated_forms': generated_forms,
+            'metadata': {
+                'timestamp': timestamp,
+                'source_file': json_file_path,
+                'template_used': template_path,
+                'total_offers': len(offers),
+                'total_forms_generated': len(generated_forms)
+            }
+        })
+        
+        logger.info("📋 Resumen guardado en: %s", summary_file)
         
     except Exception as e:
-        logger.error(f"❌ Error en generación de forms: {str(e)}")
+        logger.error("❌ Error en generación de forms: %s", e)
 
 async def main():
     """Función principal"""
@@ -171,4 +218,5 @@ async def main():
     logger.info("✅ Proceso completado")
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main()) 
\ No newline at end of file
@@ -3,47 +3,73 @@
 Script de utilidad para gestionar el CRM de Notion desde línea de comandos.
 Permite consultar, actualizar y gestionar contactos de colegios.
 """
-import os
+import asyncio
 import sys
 import argparse
-from typing import Optional
-from dotenv import load_dotenv
+import csv
+from collections import Counter
+from typing import TYPE_CHECKING, Optional
 
-# Añadir el directorio raíz al path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import _bootstrap  # noqa: F401  (añade la raíz del proyecto a sys.path)
 
-load_dotenv(override=True)
+# notion_client, dotenv y la caché se importan en main() solo cuando hay un
+# comando que ejecutar: `--help` o un error de argumentos no pagan su coste
+if TYPE_CHECKING:
+    from src.utils.notion_crm_manager import NotionCRMManager
 
-from src.utils.notion_crm_manager import NotionCRMManager
 
+# Filas que se acumulan antes de escribirlas de una vez en stdout
+_LIST_WRITE_CHUNK = 1000
 
-def list_contacts(crm: NotionCRMManager, status: Optional[str] = None):
-    """Lista todos los contactos, opcionalmente filtrados por estado."""
+
+def _format_contact_row(contact: dict) -> str:
+    """Formatea un contacto como fila de ancho fijo de la tabla de `list`."""
+    return (
+        (contact['school_name'] or 'N/A')[:34].ljust(35) + ' '
+        + (contact['email'] or 'N/A')[:29].ljust(30) + ' '
+        + (contact['status'] or 'N/A')[:14].ljust(15) + ' '
+        + (contact['contact_date'] or 'N/A')[:10].ljust(12) + '\n'
+    )
+
+
+def list_contacts(crm: 'NotionCRMManager', status: Optional[str] = None):
+    """
+    Lista todos los contactos, opcionalmente filtrados por estado.
+    Las filas se escriben por bloques a medida que llegan de Notion, sin cargar
+    la lista entera.
+    """
     print("\n📋 Obteniendo contactos del CRM...")
-    contacts = crm.get_all_contacts(status_filter=status)
+    suffix = f" con estado '{status}'" if status else ""
     
-    if not contacts:
-        print("❌ No se encontraron contactos" + (f" con estado '{status}'" if status else ""))
+    total = 0
+    rows = []
+    try:
+        for contact in crm.iter_contacts(status_filter=status):
+            if total == 0:
+                print("\n" + "-" * 100)
+                print(f"{'School Name':<35} {'Email':<30} {'Status':<15} {'Date':<12}")
+                print("-" * 100)
+            rows.append(_format_contact_row(contact))
+            total += 1
+            if len(rows) >= _LIST_WRITE_CHUNK:
+                sys.stdout.writelines(rows)
+                rows.clear()
+    except Exception as e:
+        sys.stdout.writelines(rows)
+        print(f"❌ Error obteniendo contactos de Notion CRM: {e}")
         return
+    sys.stdout.writelines(rows)
     
-    print(f"\n✅ Encontrados {len(contacts)} contactos" + (f" con estado '{status}'" if status else "") + ":\n")
-    print("-" * 100)
-    print(f"{'School Name':<35} {'Email':<30} {'Status':<15} {'Date':<12}")
-    print("-" * 100)
-    
-    for contact in contacts:
-        school_name = contact['school_name'][:34] if contact['school_name'] else 'N/A'
-        email = contact['email'][:29] if contact['email'] else 'N/A'
-        status_val = contact['status'][:14] if contact['status'] else 'N/A'
-        date = contact['contact_date'][:10] if contact['contact_date'] else 'N/A'
-        print(f"{school_name:<35} {email:<30} {status_val:<15} {date:<12}")
+    if not total:
+        print("❌ No se encontraron contactos" + suffix)
+        return
     
     print("-" * 100)
-    print(f"\nTotal: {len(contacts)} contactos\n")
+    print(f"\n✅ Total: {total} contactos{suffix}\n")
 
 
 def add_contact(
-    crm: NotionCRMManager,
+    crm: 'NotionCRMManager',
     school_name: str,
     email: str,
     school_id: str = "",
@@ -75,19 +101,57 @@ def add_contact(
         print("❌ No se pudo añadir el contacto")
 
 
-def update_status(crm: NotionCRMManager, email: str, new_status: str, notes: str = ""):
+def bulk_add(crm: 'NotionCRMManager', csv_path: str):
+    """
+    Añade varios contactos desde un CSV con columnas
+    school,email,school_id,county,dublin_zone,level,sender,notes,status.
+    Las altas se envían en paralelo al ritmo máximo que admite Notion.
+    """
+    try:
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+    except OSError as e:
+        print(f"❌ No se pudo leer el CSV: {e}")
+        return
+    
+    contacts = []
+    for row in rows:
+        school_name = (row.get('school') or '').strip()
+        email = (row.get('email') or '').strip()
+        if not school_name or not email:
+            print(f"⚠️ Fila incompleta ignorada: {row}")
+            continue
+        contacts.append({
+            'school_name': school_name,
+            'email': email,
+            'school_id': (row.get('school_id') or '').strip(),
+            'county': (row.get('county') or '').strip(),
+            'dublin_zone': (row.get('dublin_zone') or '').strip(),
+            'education_level': (row.get('level') or 'primary').strip(),
+            'sender_email': (row.get('sender') or '').strip(),
+            'notes': (row.get('notes') or '').strip(),
+            'status': (row.get('status') or 'contacted').strip(),
+        })
+    
+    print(f"\n📥 Añadiendo {len(contacts)} contactos desde {csv_path}...")
+    page_ids = asyncio.run(crm.bulk_add_contacts(contacts))
+    added = sum(1 for page_id in page_ids if page_id)
+    print(f"\n✅ {added}/{len(contacts)} contactos añadidos o actualizados\n")
+
+
+def update_status(crm: 'NotionCRMManager', email: str, new_status: str, notes: str = "") -> bool:
     """Actualiza el estado de un contacto por email."""
     print(f"\n🔄 Buscando contacto con email: {email}...")
     
-    # Buscar el contacto
-    existing = crm._find_school_by_email(email)
+    # Buscar el contacto (índice de emails si está cargado, o consulta a Notion)
+    existing = crm.find_contact_by_email(email)
     
     if not existing:
         print(f"❌ No se encontró un contacto con email: {email}")
-        return
+        return False
     
     page_id = existing['id']
-    school_name = crm._extract_title(existing['properties'].get('School Name', {}))
+    school_name = existing['school_name']
     
     print(f"📝 Actualizando {school_name} a estado '{new_status}'...")
     
@@ -99,57 +163,100 @@ def update_status(crm: NotionCRMManager, email: str, new_status: str, notes: str
     
     if result:
         print(f"✅ Contacto actualizado exitosamente")
+        return True
     else:
         print("❌ No se pudo actualizar el contacto")
+        return False
 
 
-def stats(crm: NotionCRMManager):
-    """Muestra estadísticas del CRM."""
+def bulk_update(crm: 'NotionCRMManager', csv_path: str):
+    """
+    Actualiza el estado de varios contactos desde un CSV con columnas
+    email,status,notes. El índice de emails se construye una sola vez, así que
+    cada fila solo cuesta la petición de actualización.
+    """
+    try:
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+    except OSError as e:
+        print(f"❌ No se pudo leer el CSV: {e}")
+        return
+    
+    print(f"\n📥 {len(rows)} filas leídas de {csv_path}")
+    crm.build_email_index()
+    
+    updated = 0
+    for row in rows:
+        email = (row.get('email') or '').strip()
+        status = (row.get('status') or '').strip()
+        if not email or not status:
+            print(f"⚠️ Fila incompleta ignorada: {row}")
+            continue
+        if update_status(crm, email=email, new_status=status, notes=(row.get('notes') or '').strip()):
+            updated += 1
+    
+    print(f"\n✅ {updated}/{len(rows)} contactos actualizados\n")
+
+
+def stats(crm: 'NotionCRMManager', detailed: bool = False):
+    """
+    Muestra estadísticas del CRM.
+    Por defecto solo cuenta por estado con consultas filtradas en Notion; con
+    `detailed` descarga todos los contactos para desglosar también por
+    condado y nivel educativo.
+    """
     print("\n📊 Obteniendo estadísticas del CRM...\n")
     
+    if not detailed:
+        status_counts = crm.get_status_counts()
+        if not status_counts:
+            print("❌ No hay contactos en el CRM")
+            return
+        
+        print(f"Total de contactos: {sum(status_counts.values())}\n")
+        print("Por estado:")
+        for status, count in Counter(status_counts).most_common():
+            print(f"  • {status}: {count}")
+        print("\n💡 Usa --detailed para ver el desglose por condado y nivel educativo\n")
+        return
+    
     all_contacts = crm.get_all_contacts()
     
     if not all_contacts:
         print("❌ No hay contactos en el CRM")
         return
     
-    # Contar por estado
-    status_counts = {}
-    county_counts = {}
-    level_counts = {}
+    # Contar por estado, condado y nivel en una sola pasada
+    status_counts = Counter()
+    county_counts = Counter()
+    level_counts = Counter()
     
     for contact in all_contacts:
-        status = contact['status'] or 'sin_estado'
-        county = contact['county'] or 'sin_condado'
-        level = contact['education_level'] or 'sin_nivel'
-        
-        status_counts[status] = status_counts.get(status, 0) + 1
-        county_counts[county] = county_counts.get(county, 0) + 1
-        level_counts[level] = level_counts.get(level, 0) + 1
+        status_counts[contact['status'] or 'sin_estado'] += 1
+        county_counts[contact['county'] or 'sin_condado'] += 1
+        level_counts[contact['education_level'] or 'sin_nivel'] += 1
     
     print(f"Total de contactos: {len(all_contacts)}\n")
     
     print("Por estado:")
-    for status, count in sorted(status_counts.items(), key=lambda x: x[1], reverse=True):
+    for status, count in status_counts.most_common():
         print(f"  • {status}: {count}")
     
     print("\nPor condado:")
-    for county, count in sorted(county_counts.items(), key=lambda x: x[1], reverse=True):
+    for county, count in county_counts.most_common():
         print(f"  • {county}: {count}")
     
     print("\nPor nivel educativo:")
-    for level, count in sorted(level_counts.items(), key=lambda x: x[1], reverse=True):
+    for level, count in level_counts.most_common():
         print(f"  • {level}: {count}")
     
     print()
 
 
-def main():
-    """Función principal del script."""
-    parser = argparse.ArgumentParser(
-        description="Gestión del CRM de Notion para Profes Nómadas",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+# Estados admitidos por los comandos add/update
+STATUS_CHOICES = ['contacted', 'followed_up', 'interested', 'not_interested', 'hired']
+
+EPILOG = """
 Ejemplos de uso:
 
   # Listar todos los contactos
@@ -165,24 +272,41 @@ Ejemplos de uso:
     --county Dublin \\
     --level primary
 
+  # Añadir varios contactos desde un CSV
+  python scripts/manage_notion_crm.py bulk-add --csv colegios.csv
+
   # Actualizar estado de un contacto
   python scripts/manage_notion_crm.py update \\
     --email "office@stmarys.ie" \\
     --status followed_up \\
     --notes "Llamada realizada el 10/12/2025"
 
-  # Ver estadísticas
+  # Actualizar varios contactos desde un CSV (email,status,notes)
+  python scripts/manage_notion_crm.py bulk-update --csv seguimiento.csv
+
+  # Ver estadísticas (las consultas se cachean 10 min en ~/.cache/profes_nomadas)
   python scripts/manage_notion_crm.py stats
-        """
-    )
-    
-    subparsers = parser.add_subparsers(dest='command', help='Comando a ejecutar')
-    
-    # Comando list
-    list_parser = subparsers.add_parser('list', help='Listar contactos')
+  python scripts/manage_notion_crm.py stats --refresh
+  python scripts/manage_notion_crm.py stats --detailed
+"""
+
+
+def _cache_options() -> argparse.ArgumentParser:
+    """Opciones de caché comunes a los comandos de consulta."""
+    cache_parser = argparse.ArgumentParser(add_help=False)
+    cache_parser.add_argument('--no-cache', action='store_true',
+                              help='No usar la caché local de consultas')
+    cache_parser.add_argument('--refresh', action='store_true',
+                              help='Vaciar la caché (contactos sincronizados e índice de emails) y volver a consultar Notion')
+    return cache_parser
+
+
+def _add_list_parser(subparsers):
+    list_parser = subparsers.add_parser('list', parents=[_cache_options()], help='Listar contactos')
     list_parser.add_argument('--status', help='Filtrar por estado')
-    
-    # Comando add
+
+
+def _add_add_parser(subparsers):
     add_parser = subparsers.add_parser('add', help='Añadir un nuevo contacto')
     add_parser.add_argument('--school', required=True, help='Nombre del colegio')
     add_parser.add_argument('--email', required=True, help='Email del colegio')
@@ -193,20 +317,73 @@ Ejemplos de uso:
                           help='Nivel educativo')
     add_parser.add_argument('--sender', default='', help='Email del remitente')
     add_parser.add_argument('--notes', default='', help='Notas adicionales')
-    add_parser.add_argument('--status', default='contacted', 
-                          choices=['contacted', 'followed_up', 'interested', 'not_interested', 'hired'],
+    add_parser.add_argument('--status', default='contacted', choices=STATUS_CHOICES,
                           help='Estado inicial')
-    
-    # Comando update
+
+
+def _add_bulk_add_parser(subparsers):
+    bulk_add_parser = subparsers.add_parser('bulk-add', help='Añadir contactos desde un CSV')
+    bulk_add_parser.add_argument('--csv', required=True,
+                                 help='CSV con columnas school,email,school_id,county,dublin_zone,level,sender,notes,status')
+
+
+def _add_update_parser(subparsers):
     update_parser = subparsers.add_parser('update', help='Actualizar un contacto')
     update_parser.add_argument('--email', required=True, help='Email del contacto a actualizar')
-    update_parser.add_argument('--status', required=True,
-                             choices=['contacted', 'followed_up', 'interested', 'not_interested', 'hired'],
+    update_parser.add_argument('--status', required=True, choices=STATUS_CHOICES,
                              help='Nuevo estado')
     update_parser.add_argument('--notes', default='', help='Notas adicionales')
+
+
+def _add_bulk_update_parser(subparsers):
+    bulk_update_parser = subparsers.add_parser('bulk-update', help='Actualizar contactos desde un CSV')
+    bulk_update_parser.add_argument('--csv', required=True, help='CSV con columnas email,status,notes')
+
+
+def _add_stats_parser(subparsers):
+    stats_parser = subparsers.add_parser('stats', parents=[_cache_options()], help='Ver estadísticas del CRM')
+    stats_parser.add_argument('--detailed', action='store_true',
+                            help='Desglosar también por condado y nivel (descarga todos los contactos)')
+
+
+# Constructores de subcomandos, en el orden en que aparecen en la ayuda
+SUBPARSER_BUILDERS = {
+    'list': _add_list_parser,
+    'add': _add_add_parser,
+    'bulk-add': _add_bulk_add_parser,
+    'update': _add_update_parser,
+    'bulk-update': _add_bulk_update_parser,
+    'stats': _add_stats_parser,
+}
+
+
+def build_parser(command: Optional[str] = None) -> argparse.ArgumentParser:
+    """
+    Construye el parser de argumentos.
+    Si `command` es un subcomando conocido solo se registra ese subparser;
+    en otro caso (ayuda general, sin argumentos o comando desconocido) se
+    construye el árbol completo con los ejemplos de uso.
+    """
+    if command in SUBPARSER_BUILDERS:
+        parser = argparse.ArgumentParser(description="Gestión del CRM de Notion para Profes Nómadas")
+        subparsers = parser.add_subparsers(dest='command', help='Comando a ejecutar')
+        SUBPARSER_BUILDERS[command](subparsers)
+        return parser
     
-    # Comando stats
-    stats_parser = subparsers.add_parser('stats', help='Ver estadísticas del CRM')
+    parser = argparse.ArgumentParser(
+        description="Gestión del CRM de Notion para Profes Nómadas",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=EPILOG
+    )
+    subparsers = parser.add_subparsers(dest='command', help='Comando a ejecutar')
+    for add_subparser in SUBPARSER_BUILDERS.values():
+        add_subparser(subparsers)
+    return parser
+
+
+def main():
+    """Función principal del script."""
+    parser = build_parser(sys.argv[1] if len(sys.argv) > 1 else None)
     
     args = parser.parse_args()
     
@@ -214,6 +391,12 @@ Ejemplos de uso:
         parser.print_help()
         return
     
+    from dotenv import load_dotenv
+    load_dotenv(override=True)
+    
+    from src.utils.crm_cache import CRMCache
+    from src.utils.notion_crm_manager import NotionCRMManager
+    
     # Inicializar CRM
     try:
         crm = NotionCRMManager()
@@ -226,6 +409,12 @@ Ejemplos de uso:
         print("\nPara más información, ejecuta: python scripts/setup_notion_crm.py")
         return
     
+    # Caché local de consultas, una por base de datos (los comandos de escritura la invalidan)
+    if not getattr(args, 'no_cache', False):
+        crm.cache = CRMCache(database_id=crm.database_id)
+        if getattr(args, 'refresh', False):
+            crm.cache.clear()
+    
     # Ejecutar comando
     if args.command == 'list':
         list_contacts(crm, status=args.status)
@@ -244,11 +433,17 @@ Ejemplos de uso:
             status=args.status
         )
     
+    elif args.command == 'bulk-add':
+        bulk_add(crm, args.csv)
+    
     elif args.command == 'update':
         update_status(crm, email=args.email, new_status=args.status, notes=args.notes)
     
+    elif args.command == 'bulk-update':
+        bulk_update(crm, args.csv)
+    
     elif args.command == 'stats':
-        stats(crm)
+        stats(crm, detailed=args.detailed)
 
 
 if __name__ == "__main__":
@@ -1,41 +1,54 @@
 #!/usr/bin/env python3
 """
 Script de ejemplo para ejecutar scraping y generación de application forms PDFs de forma integrada.
+
+Uso:
+    python scripts/run_scraping_with_forms.py [--county cork|dublin|both|all]
+                                              [--level primary|secondary]
+                                              [--template ruta/al/form.pdf]
 """
+import argparse
 import asyncio
 import os
-import sys
 import logging
+from pathlib import Path
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
 load_dotenv()
 
-# Añadir el directorio raíz al path para importaciones
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import _bootstrap  # noqa: F401  (añade la raíz del proyecto a sys.path)
 
 from scrape_all_safe import process_user_request_with_county
+from src.utils.event_loop import install_uvloop
+from src.utils.logger import setup_logging
 
 # Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s: %(message)s"
-)
+setup_logging()
 logger = logging.getLogger("run_scraping_with_forms")
 
-async def run_scraping_and_forms():
+# Plantillas que se prueban, en orden, si no se indica --template
+DEFAULT_TEMPLATES = [
+    "data/Application Form Álvaro.pdf",
+    "data/Application_Form_Template.pdf",
+    "templates/application_form_template.pdf"
+]
+
+def _find_template(candidates):
+    """Devuelve la primera plantilla PDF existente de la lista de candidatas, o None."""
+    return next((path for path in candidates if path and os.path.isfile(path)), None)
+
+async def run_scraping_and_forms(county_selection='cork', education_level='primary', template_path=None):
     """Ejecuta scraping y generación de forms de forma integrada"""
     try:
         logger.info("🚀 Iniciando scraping y generación de application forms PDFs...")
         
-        # Configurar datos de usuario (puedes modificar estos valores)
         user_data = {
             'name': 'Usuario Ejemplo',
-            'county_selection': 'cork',  # 'cork', 'dublin', 'both', 'all'
-            'education_level': 'primary',
-            # Asegúrate de que la plantilla existe o el bot te la pedirá.
-            # Ejemplo de cómo podría pasarse una plantilla si el bot no gestionara la subida:
-            'application_form': 'data/Application Form Álvaro.pdf'
+            'county_selection': county_selection,  # 'cork', 'dublin', 'both', 'all'
+            'education_level': education_level,
+            # Si no hay plantilla, process_user_request_with_county lo indica
+            'application_form': template_path
         }
         
         logger.info(f"📍 Condado seleccionado: {user_data['county_selection']}")
@@ -56,33 +69,49 @@ async def run_scraping_and_forms():
             
             # Mostrar información de los PDFs generados
             if result.get('generated_forms'):
-                logger.info("\n📄 PDFs generados:")
+                lines = ["\n📄 PDFs generados:"]
                 for i, form in enumerate(result['generated_forms'], 1):
-                    logger.info(f"  {i}. {os.path.basename(form['file_path'])}")
-                    logger.info(f"     Escuela: {form.get('school_name', 'N/A')}")
-                    logger.info(f"     Posición: {form.get('position', 'N/A')}")
+                    lines.append(f"  {i}. {Path(form['file_path']).name}")
+                    lines.append(f"     Escuela: {form.get('school_name', 'N/A')}")
+                    lines.append(f"     Posición: {form.get('position', 'N/A')}")
                     if form.get('roll_number'):
-                        logger.info(f"     Roll Number: {form['roll_number']}")
+                        lines.append(f"     Roll Number: {form['roll_number']}")
+                logger.info("\n".join(lines))
         else:
             logger.error(f"❌ Error en el proceso: {result.get('message', 'Error desconocido')}")
             
     except Exception as e:
         logger.error(f"❌ Error inesperado: {str(e)}", exc_info=True)
 
-async def main():
+def parse_args():
+    """Argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Scraping + generación de application forms PDFs")
+    parser.add_argument('--county', default='cork', choices=['cork', 'dublin', 'both', 'all'],
+                        help='Condado a scrapear')
+    parser.add_argument('--level', default='primary', choices=['primary', 'secondary'],
+                        help='Nivel educativo')
+    parser.add_argument('--template', help='Plantilla PDF del application form')
+    return parser.parse_args()
+
+async def main(args):
     """Función principal"""
     logger.info("🤖 Sistema de Scraping + Generación de Application Forms PDFs")
     logger.info("=" * 60)
     
-    # Este script asume que la plantilla será gestionada por el bot o
-    # que la ruta se provee en `user_data`.
-    # Puedes añadir una verificación aquí si lo necesitas.
+    candidates = [args.template] if args.template else DEFAULT_TEMPLATES
+    template_path = _find_template(candidates)
+    if template_path:
+        logger.info("📄 Plantilla: %s", template_path)
+    else:
+        logger.warning("⚠️ No se encontró ninguna plantilla entre: %s", ", ".join(candidates))
     
     # Ejecutar el proceso
-    await run_scraping_and_forms()
+    await run_scraping_and_forms(args.county, args.level, template_path)
     
     logger.info("=" * 60)
     logger.info("✅ Proceso completado")
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    args = parse_args()
+    install_uvloop()
+    asyncio.run(main(args)) 
\ No newline at end of file
@@ -4,92 +4,211 @@ Script para ejecutar el scraper completo de EducationPosts.ie de forma segura
 con selección de condados desde Telegram y generación de application forms PDFs.
 """
 import asyncio
+import atexit
 import os
+import re
 import sys
-import json
 import logging
 from datetime import datetime
 from pathlib import Path
+from types import MappingProxyType
 from dotenv import load_dotenv
 import signal
 import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # Cargar variables de entorno y forzar la sobreescritura
 load_dotenv(override=True)
 
 
-# Añadir el directorio raíz al path para importaciones
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Añadir el directorio raíz al path para importaciones (cuando se importa
+# como `scripts.scrape_all_safe` desde run.py la raíz ya está en sys.path)
+if not __package__:
+    import _bootstrap  # noqa: F401
 
-from src.scrapers.scraper_educationposts import EducationPosts
+from src.scrapers.scraper_educationposts import EducationPosts, create_session
 from src.bots.telegram_bot import TelegramBot
-from src.utils.logger import setup_logger
+from src.utils.logger import setup_logger, setup_logging
 from src.utils.document_reader import DocumentReader
+from src.utils.json_io import write_json_async
 from src.generators.email_sender import EmailSender
 from src.generators.ai_email_generator_v2 import AIEmailGeneratorV2
 
-# Configurar logging
-os.makedirs("logs", exist_ok=True)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s: %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(f"logs/scraping_bot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-    ]
-)
+# Configurar logging (el bot es de larga duración: archivo por lotes, pero
+# escrito como mucho cada pocos segundos para no quedarse atrás)
+setup_logging(f"logs/scraping_bot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log", flush_interval=5.0)
 logger = logging.getLogger("scraping_bot")
 
-async def generate_application_forms_from_offers(offers, template_path=None):
+# Cualquier carácter no alfanumérico se sustituye por "_" en los nombres de archivo
+_UNSAFE_FILENAME_CHARS = re.compile(r'\W')
+
+def _is_pdf_template(template_path):
+    """Comprueba que la plantilla es un PDF existente (la comprobación barata va primero)."""
+    return bool(template_path) and template_path.endswith('.pdf') and os.path.isfile(template_path)
+
+# Procesos trabajadores para generar PDFs. El bot es de larga duración, así que
+# el pool se crea la primera vez que se necesita y se reutiliza entre solicitudes
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', str(os.cpu_count() or 4)))
+_pdf_pool = None
+
+def _get_pdf_pool():
+    """Devuelve el pool de procesos para PDFs, creándolo si hace falta."""
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+        atexit.register(_pdf_pool.shutdown, wait=False)
+    return _pdf_pool
+
+def _discard_pdf_pool():
+    """Descarta un pool roto (un trabajador murió) para que la siguiente solicitud cree otro."""
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False)
+        _pdf_pool = None
+
+# Estado de cada proceso trabajador: lector reutilizable y plantillas ya leídas
+# (ruta → (mtime, contenido)); cada usuario tiene su propia plantilla
+_MAX_WORKER_TEMPLATES = 8
+_worker_reader = None
+_worker_templates = {}
+
+def _render_application_form(template_path, output_path, offer_data):
+    """
+    Genera un application form personalizado.
+    Se ejecuta en un proceso trabajador: PyMuPDF no es seguro entre hilos.
+    La plantilla se lee del disco solo la primera vez (o si ha cambiado).
+    """
+    global _worker_reader
+    mtime = os.path.getmtime(template_path)
+    cached = _worker_templates.get(template_path)
+    if cached is None or cached[0] != mtime:
+        if _worker_reader is None or len(_worker_templates) >= _MAX_WORKER_TEMPLATES:
+            # Empezar de cero para no acumular plantillas de solicitudes antiguas
+            _worker_templates.clear()
+            _worker_reader = DocumentReader()
+        cached = _worker_templates[template_path] = (mtime, DocumentReader.load_pdf_template(template_path))
+    return _worker_reader.customize_application_form_pdf_from_bytes(
+        template_bytes=cached[1],
+        output_path=output_path,
+        offer_data=offer_data
+    )
+
+async def generate_application_forms_from_offers(offers, template_path=None, template_checked=False,
+                                                 timestamp=None):
     """
     Genera application forms PDFs personalizados para las ofertas encontradas.
+    Con `template_checked` se omite volver a comprobar la plantilla en disco
+    (el llamador ya la ha validado). `timestamp` es la marca de la ejecución
+    usada en los nombres de archivo (por defecto, el momento actual).
+    Cada form devuelto incluye en 'offer' la oferta de la que se generó.
     """
     try:
         if not offers:
             logger.warning("No hay ofertas para generar application forms")
             return []
         # Solo usar la plantilla pasada por parámetro
-        if not template_path or not os.path.exists(template_path) or not template_path.endswith('.pdf'):
+        if not template_checked and not _is_pdf_template(template_path):
             logger.error("No se proporcionó una plantilla PDF válida. Aborta generación de application forms.")
             return []
         # Crear directorio para los application forms
         output_dir = os.path.join("temp", "application_forms")
         os.makedirs(output_dir, exist_ok=True)
-        # Inicializar DocumentReader
-        document_reader = DocumentReader()
         scraper = EducationPosts()
         generated_forms = []
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if timestamp is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         logger.info(f"📝 Generando application forms PDFs para {len(offers)} ofertas...")
+        # Preparar los datos y rutas de cada oferta
+        # (prefijo de directorio y sufijo del nombre se calculan una sola vez)
+        output_prefix = output_dir + os.sep
+        filename_suffix = "_%s_%%d.pdf" % timestamp
+        jobs = []
         for i, offer in enumerate(offers):
             try:
                 offer_data = scraper.prepare_offer_data_for_application_form(offer)
-                school_name_safe = ''.join(c if c.isalnum() else '_' for c in offer_data['school_name'])
-                custom_filename = f"Application_Form_{school_name_safe}_{timestamp}_{i+1}.pdf"
-                output_path = os.path.join(output_dir, custom_filename)
-                result_path = document_reader.customize_application_form_pdf(
-                    template_path=template_path,
-                    output_path=output_path,
-                    offer_data=offer_data
-                )
-                if result_path:
-                    generated_forms.append({
-                        'file_path': result_path,
-                        'school_name': offer_data['school_name'],
-                        'position': offer_data['position'],
-                        'roll_number': offer_data['roll_number']
-                    })
-                    logger.info(f"✅ [{i+1}/{len(offers)}] PDF generado: {custom_filename}")
-                else:
-                    logger.warning(f"⚠️ No se pudo generar PDF para: {offer_data['school_name']}")
+                school_name_safe = _UNSAFE_FILENAME_CHARS.sub('_', offer_data['school_name'])
+                custom_filename = "Application_Form_" + school_name_safe + filename_suffix % (i + 1)
+                output_path = output_prefix + custom_filename
+                jobs.append((i, offer, custom_filename, output_path, offer_data))
             except Exception as e:
                 logger.error(f"❌ Error generando PDF #{i+1}: {str(e)}")
+        # Generar los PDFs en paralelo fuera del event loop (pool de procesos compartido),
+        # así el bot sigue atendiendo Telegram mientras se genera el lote
+        loop = asyncio.get_running_loop()
+        pool = _get_pdf_pool()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(pool, _render_application_form, template_path, output_path, offer_data)
+            for _, _, _, output_path, offer_data in jobs
+        ], return_exceptions=True)
+        if any(isinstance(result, BrokenProcessPool) for result in results):
+            _discard_pdf_pool()
+        for (i, offer, custom_filename, _, offer_data), result_path in zip(jobs, results):
+            if isinstance(result_path, Exception):
+                logger.error(f"❌ Error generando PDF #{i+1}: {str(result_path)}")
+            elif result_path:
+                generated_forms.append({
+                    'file_path': result_path,
+                    'school_name': offer_data['school_name'],
+                    'position': offer_data['position'],
+                    'roll_number': offer_data['roll_number'],
+                    'offer': offer
+                })
+                logger.info(f"✅ [{i+1}/{len(offers)}] PDF generado: {custom_filename}")
+            else:
+                logger.warning(f"⚠️ No se pudo generar PDF para: {offer_data['school_name']}")
         logger.info(f"🎯 Total PDFs generados: {len(generated_forms)}")
         return generated_forms
     except Exception as e:
         logger.error(f"Error en generación de application forms: {str(e)}")
         return []
 
+# Selección de condado del usuario → configuración del scraper (solo lectura).
+# "both" lista los condados (id, nombre) que se scrapean a la vez
+COUNTY_MAPPING = MappingProxyType({
+    "cork": {"county_id": "4", "name": "Cork"},
+    "dublin": {"county_id": "27", "name": "Dublin"},
+    "both": {"counties": (("4", "Cork"), ("27", "Dublin")), "name": "Cork + Dublin"},
+    "all": {"county_id": "", "name": "Toda Irlanda"}
+})
+
+# Nivel educativo del usuario → nivel de EducationPosts (otros valores se
+# pasan tal cual, p. ej. "second_level" o "pre_school")
+LEVEL_MAPPING = MappingProxyType({
+    "primary": "primary",
+    "secondary": "second_level",
+})
+
+# Scrapers simultáneos como máximo contra EducationPosts (cada uno limita
+# además sus propias peticiones con max_workers)
+MAX_CONCURRENT_SCRAPERS = 2
+
+# Envíos de email simultáneos como máximo y pausa de cada envío dentro de su
+# hueco del semáforo (sustituye a la pausa global de 3 s entre envíos)
+SEND_CONCURRENCY = int(os.getenv('SEND_CONCURRENCY', '5'))
+SEND_PAUSE_SECONDS = 0.3
+
+async def _scrape_county(county_id, county_name, semaphore, session=None, level="primary"):
+    """Scrapea un condado y etiqueta sus ofertas con el condado de origen."""
+    async with semaphore:
+        logger.info(f"📍 Scraping en {county_name}...")
+        
+        # Crear scraper con la misma configuración que el test
+        scraper = EducationPosts(
+            level=level,
+            county_id=county_id,
+            session=session
+        )
+        county_offers = await scraper.fetch_all(require_email=True)
+    
+    # Agregar información del condado a cada oferta
+    for offer in county_offers:
+        offer['scraped_county'] = county_name
+        offer['scraped_county_id'] = county_id
+    
+    logger.info(f"✅ {county_name}: {len(county_offers)} ofertas encontradas")
+    return county_offers
+
 async def process_user_request_with_county(user_data):
     """
     Procesa la solicitud del usuario con selección de condado y generación de application forms.
@@ -101,50 +220,36 @@ async def process_user_request_with_county(user_data):
         Dict con resultados del procesamiento
     """
     try:
+        # Una sola marca de tiempo para los PDFs y el JSON de resultados de esta solicitud
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         logger.info(f"Procesando solicitud para {user_data.get('name', 'Usuario')}")
         logger.info(f"Condado seleccionado: {user_data.get('county_selection', 'no especificado')}")
         
-        # Mapear selección de condado a configuración del scraper
-        county_mapping = {
-            "cork": {"county_id": "4", "name": "Cork"},
-            "dublin": {"county_id": "27", "name": "Dublin"},
-            "both": {"county_ids": ["4", "27"], "name": "Cork + Dublin"},
-            "all": {"county_id": "", "name": "Toda Irlanda"}
-        }
+        # Verificar la plantilla PDF del usuario una sola vez y antes de scrapear
+        template_pdf = user_data.get('application_form')
+        if not _is_pdf_template(template_pdf):
+            logger.error("❌ No se ha proporcionado una plantilla PDF válida por el usuario. Por favor, sube tu Application Form en PDF antes de continuar.")
+            return {
+                'success': False,
+                'message': 'No se ha proporcionado una plantilla PDF válida. Sube tu Application Form en PDF antes de continuar.'
+            }
         
         county_selection = user_data.get('county_selection', 'all')
-        county_config = county_mapping.get(county_selection, county_mapping['all'])
+        county_config = COUNTY_MAPPING.get(county_selection, COUNTY_MAPPING['all'])
+        education_level = user_data.get('education_level') or 'primary'
+        level = LEVEL_MAPPING.get(education_level, education_level)
         
-        # Si es "both" (Cork + Dublin), hacer scraping en ambos condados
+        # Si es "both" (Cork + Dublin), hacer scraping en ambos condados a la vez
         if county_selection == "both":
             logger.info("🌍 Haciendo scraping en Cork y Dublin")
-            all_offers = []
-            
-            for county_id in county_config["county_ids"]:
-                county_name = "Cork" if county_id == "4" else "Dublin"
-                logger.info(f"📍 Scraping en {county_name}...")
-                
-                # Crear scraper con la misma configuración que el test
-                scraper = EducationPosts(
-                    level="primary",
-                    county_id=county_id
-                )
-                
-                # Hacer scraping
-                county_offers = await scraper.fetch_all()
-                
-                # Agregar información del condado a cada oferta
-                for offer in county_offers:
-                    offer['scraped_county'] = county_name
-                    offer['scraped_county_id'] = county_id
-                
-                all_offers.extend(county_offers)
-                logger.info(f"✅ {county_name}: {len(county_offers)} ofertas encontradas")
-                
-                # Pausa entre condados para evitar sobrecarga
-                await asyncio.sleep(10)
-            
-            offers = all_offers
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCRAPERS)
+            # Una sola sesión HTTP para ambos condados (conexiones y DNS compartidos)
+            async with create_session() as session:
+                county_results = await asyncio.gather(*(
+                    _scrape_county(county_id, county_name, semaphore, session, level)
+                    for county_id, county_name in county_config["counties"]
+                ))
+            offers = [offer for county_offers in county_results for offer in county_offers]
             
         else:
             # Scraping en un solo condado o todos
@@ -152,41 +257,25 @@ async def process_user_request_with_county(user_data):
             
             # Crear scraper con la misma configuración que el test
             scraper = EducationPosts(
-                level="primary",
+                level=level,
                 county_id=county_config.get("county_id", "")
             )
             
-            offers = await scraper.fetch_all()
+            offers = await scraper.fetch_all(require_email=True)
         
+        # El scraper ya descarta las ofertas sin email de contacto
         if not offers:
-            return {
-                'success': False,
-                'message': f'No se encontraron ofertas educativas en {county_config["name"]}'
-            }
-        
-        logger.info(f"🎯 Total ofertas encontradas: {len(offers)}")
-        
-        # Filtrar ofertas que tengan email de contacto
-        valid_offers = [offer for offer in offers if offer.get('email')]
-        logger.info(f"📧 Ofertas con email válido: {len(valid_offers)}")
-        
-        if not valid_offers:
             return {
                 'success': False,
                 'message': f'No se encontraron ofertas con email de contacto en {county_config["name"]}'
             }
         
-        # Verificar que el usuario ha enviado la plantilla PDF
-        template_pdf = user_data.get('application_form')
-        if not template_pdf or not os.path.exists(template_pdf) or not template_pdf.endswith('.pdf'):
-            logger.error("❌ No se ha proporcionado una plantilla PDF válida por el usuario. Por favor, sube tu Application Form en PDF antes de continuar.")
-            return {
-                'success': False,
-                'message': 'No se ha proporcionado una plantilla PDF válida. Sube tu Application Form en PDF antes de continuar.'
-            }
+        logger.info(f"🎯 Total ofertas con email válido: {len(offers)}")
         
         # Generar application forms PDFs usando la plantilla del usuario
-        generated_forms = await generate_application_forms_from_offers(valid_offers, template_path=template_pdf)
+        generated_forms = await generate_application_forms_from_offers(
+            offers, template_path=template_pdf, template_checked=True, timestamp=timestamp
+        )
         
         if not generated_forms:
             logger.error("❌ No se pudieron generar PDFs de application forms")
@@ -195,10 +284,10 @@ async def process_user_request_with_county(user_data):
                 'message': 'No se pudieron generar PDFs de application forms. Verifica que la plantilla PDF sea válida.'
             }
         
-        if len(generated_forms) != len(valid_offers):
-            logger.warning(f"⚠️ Se generaron {len(generated_forms)} PDFs para {len(valid_offers)} ofertas")
-            # Ajustar para usar solo las ofertas que tienen PDF correspondiente
-            valid_offers = valid_offers[:len(generated_forms)]
+        if len(generated_forms) != len(offers):
+            logger.warning(f"⚠️ Se generaron {len(generated_forms)} PDFs para {len(offers)} ofertas")
+        # Solo se continúa con las ofertas que tienen su PDF
+        valid_offers = [form['offer'] for form in generated_forms]
         
         # Instanciar generador de emails y sender
         email_sender = EmailSender()
@@ -231,41 +320,52 @@ async def process_user_request_with_county(user_data):
             }
         # --- FIN BLOQUE TEST EMAILS ---
 
-        for offer, form in zip(valid_offers, generated_forms):
-            try:
-                # Generar email personalizado
-                email_content = ai_generator.generate_email(
-                    job_data=offer,
-                    user_data=user_data,
-                    excel_profile=excel_profile
-                )
-                # Enviar email con el PDF adjunto
-                email_sent = await email_sender.send_application_email(
-                    user_data=user_data,
-                    offer=offer,
-                    application_form_pdf=form['file_path']  # Pasar el PDF personalizado
-                )
-                
-                if email_sent:
-                    sent_count += 1
-                    logger.info(f"Email enviado a {offer['school_name']} ({offer['email']}) con application form adjunto")
-                else:
-                    errors.append(f"Error enviando email a {offer['school_name']}")
-                
-                # Borrar el PDF generado después del envío
-                pdf_path = form['file_path']
-                if pdf_path and os.path.exists(pdf_path):
-                    os.remove(pdf_path)
-                    logger.info(f"PDF temporal eliminado: {os.path.basename(pdf_path)}")
+        loop = asyncio.get_running_loop()
+        send_semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
+        # Perfil del candidato preparado una sola vez para todas las ofertas
+        generate_email = ai_generator.bind_profile(user_data, excel_profile)
+
+        async def _process_one(form):
+            """Genera y envía el email de la oferta de un form; devuelve (enviado, error)."""
+            offer = form['offer']
+            async with send_semaphore:
+                try:
+                    # Generar email personalizado (llamada síncrona al LLM, fuera del event loop)
+                    email_content = await loop.run_in_executor(None, generate_email, offer)
+                    # Enviar email con el PDF adjunto
+                    email_sent = await email_sender.send_application_email(
+                        user_data=user_data,
+                        offer=offer,
+                        application_form_pdf=form['file_path']  # Pasar el PDF personalizado
+                    )
                     
-            except Exception as e:
-                error_msg = f"Error con {offer.get('school_name', 'Escuela Desconocida')}: {str(e)}"
-                errors.append(error_msg)
-                logger.error(error_msg)
-            await asyncio.sleep(3)
+                    error = None
+                    if email_sent:
+                        logger.info(f"Email enviado a {offer['school_name']} ({offer['email']}) con application form adjunto")
+                    else:
+                        error = f"Error enviando email a {offer['school_name']}"
+                    
+                    # Borrar el PDF generado después del envío
+                    pdf_path = form['file_path']
+                    if pdf_path and os.path.exists(pdf_path):
+                        os.remove(pdf_path)
+                        logger.info(f"PDF temporal eliminado: {os.path.basename(pdf_path)}")
+                        
+                except Exception as e:
+                    email_sent = False
+                    error = f"Error con {offer.get('school_name', 'Escuela Desconocida')}: {str(e)}"
+                    logger.error(error)
+                await asyncio.sleep(SEND_PAUSE_SECONDS)
+            return email_sent, error
+
+        results = await asyncio.gather(*(_process_one(form) for form in generated_forms))
+        for email_sent, error in results:
+            if email_sent:
+                sent_count += 1
+            if error:
+                errors.append(error)
         
         # Guardar resultados en archivo JSON
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         county_suffix = county_selection if county_selection != "all" else "ireland"
         filename = f"ofertas_{county_suffix}_{timestamp}.json"
         filepath = os.path.join("data", filename)
@@ -276,7 +376,11 @@ async def process_user_request_with_county(user_data):
         # Añadir información de PDFs generados al JSON
         result_data = {
             'offers': valid_offers,
-            'generated_forms': generated_forms,
+            # La oferta de cada form ya está en 'offers'
+            'generated_forms': [
+                {key: value for key, value in form.items() if key != 'offer'}
+                for form in generated_forms
+            ],
             'metadata': {
                 'timestamp': timestamp,
                 'county_searched': county_config["name"],
@@ -285,8 +389,7 @@ async def process_user_request_with_county(user_data):
             }
         }
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(result_data, f, ensure_ascii=False, indent=2)
+        await write_json_async(filepath, result_data)
         
         logger.info(f"💾 Resultados guardados en: {filepath}")
         
@@ -8,16 +8,19 @@ Se puede usar de forma independiente o invocado desde el bot.
 import os
 import asyncio
 import logging
-from typing import List, Dict, Optional, Set
+from typing import Callable, List, Dict, Optional, Set, Tuple
 from dotenv import load_dotenv
 import unicodedata
 
 # Cargar variables de entorno
 load_dotenv(override=True)
 
-from src.scrapers.scraper_educationposts import EducationPosts, DUBLIN_ZONES, DUBLIN_DISTRICTS
+from src.scrapers.scraper_educationposts import (
+    EducationPosts, DUBLIN_ZONES, DUBLIN_DISTRICTS, BAD_MAIL_RE, create_session
+)
 from src.generators.email_sender import EmailSender
-from src.utils.firebase_manager import get_presentation_recipients, mark_presentation_sent
+from src.utils.firebase_manager import get_presentation_recipients, mark_presentations_sent
+from src.utils.logger import setup_logging
 
 try:
     from src.utils.notion_crm_manager import NotionCRMManager
@@ -26,12 +29,23 @@ except ImportError:
     NOTION_CRM_AVAILABLE = False
 
 logger = logging.getLogger("presentation_sender")
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s: %(message)s")
+setup_logging()
 
+# Envíos simultáneos como máximo y pausa de cada envío dentro de su hueco
+SEND_CONCURRENCY = int(os.getenv('SEND_CONCURRENCY', '5'))
+SEND_PAUSE_SECONDS = 0.3
+# Distritos de Dublín scrapeados a la vez como máximo
+DISTRICT_CONCURRENCY = int(os.getenv('DISTRICT_CONCURRENCY', '4'))
+# Envíos correctos acumulados antes de registrarlos en Firebase y Notion
+RECORD_BATCH_SIZE = 25
 
-def discover_presentation_pdf() -> Optional[str]:
-    """Busca el PDF de presentación por variables/env y rutas comunes."""
-    path = os.getenv("PRESENTATION_PDF_PATH")
+
+def _normalize_name(s: str) -> str:
+    """Minúsculas y sin acentos, para comparar nombres de archivo."""
+    return ''.join(ch for ch in unicodedata.normalize('NFKD', s) if not unicodedata.combining(ch)).lower()
+
+
+def _find_presentation_pdf(path: Optional[str]) -> Optional[str]:
     candidates = [
         path,
         "templates/ProfesNomadas_Presentacion.pdf",
@@ -47,49 +61,162 @@ def discover_presentation_pdf() -> Optional[str]:
     for c in candidates:
         if c and os.path.exists(c) and c.lower().endswith(".pdf"):
             return c
-    # Búsqueda flexible en docs/
+    # Búsqueda flexible en docs/ (scandir da el tipo de cada entrada sin un stat
+    # extra, y solo se normalizan los nombres que terminan en .pdf)
     try:
-        docs_dir = "docs"
-        if os.path.isdir(docs_dir):
-            import unicodedata
-            def _norm(s: str) -> str:
-                return ''.join(ch for ch in unicodedata.normalize('NFKD', s) if not unicodedata.combining(ch)).lower()
-            for name in os.listdir(docs_dir):
-                full = os.path.join(docs_dir, name)
-                if os.path.isfile(full) and name.lower().endswith('.pdf'):
-                    n = _norm(name)
-                    if 'profes' in n and 'nomadas' in n and 'present' in n:
-                        return full
-    except Exception:
+        with os.scandir("docs") as entries:
+            for entry in entries:
+                if not entry.name.lower().endswith('.pdf') or not entry.is_file():
+                    continue
+                n = _normalize_name(entry.name)
+                if 'profes' in n and 'nomadas' in n and 'present' in n:
+                    return entry.path
+    except OSError:
         pass
     return None
 
 
+# Último PDF de presentación encontrado (y la variable de entorno con la que se buscó)
+_presentation_pdf: Optional[str] = None
+_presentation_pdf_env: Optional[str] = None
+
+
+def discover_presentation_pdf() -> Optional[str]:
+    """
+    Busca el PDF de presentación por variables/env y rutas comunes.
+    El resultado se recuerda mientras el archivo siga existiendo y no cambie
+    PRESENTATION_PDF_PATH; si no se encontró, se vuelve a buscar en la siguiente llamada.
+    """
+    global _presentation_pdf, _presentation_pdf_env
+    env_path = os.getenv("PRESENTATION_PDF_PATH")
+    if _presentation_pdf and env_path == _presentation_pdf_env and os.path.exists(_presentation_pdf):
+        return _presentation_pdf
+    _presentation_pdf = _find_presentation_pdf(env_path)
+    _presentation_pdf_env = env_path
+    return _presentation_pdf
+
+
+def _body_renderer(body_tmpl: str) -> Callable[[str], str]:
+    """
+    Devuelve una función que rellena {school_name} en la plantilla del cuerpo.
+    Se comporta como body_tmpl.format(school_name=...) cuando la plantilla contiene
+    el marcador (y, por tanto, produce el mismo error si tiene otros campos), y
+    devuelve la plantilla tal cual cuando no lo contiene.
+    """
+    if '{school_name}' not in body_tmpl:
+        return lambda school_name: body_tmpl
+    parts = body_tmpl.split('{school_name}')
+    if any('{' in part or '}' in part for part in parts):
+        # Llaves escapadas u otros campos: dejar que format() las interprete
+        return lambda school_name: body_tmpl.format(school_name=school_name)
+    return lambda school_name: school_name.join(parts)
+
+
+def _previous_recipients(sender_email: str) -> Set[str]:
+    """Emails que ya recibieron la presentación de `sender_email` (vacío si Firebase falla)."""
+    try:
+        return get_presentation_recipients(sender_email)
+    except Exception as exc:
+        logger.warning(f"No se pudo consultar Firebase para presentaciones previas: {exc}")
+        return set()
+
+
+_notion_crm = None
+
+
+def _get_notion_crm():
+    """
+    Devuelve el gestor de Notion CRM del proceso, creándolo la primera vez.
+    None si notion-client no está instalado o falta la configuración.
+    """
+    global _notion_crm
+    if _notion_crm is None and NOTION_CRM_AVAILABLE:
+        try:
+            _notion_crm = NotionCRMManager()
+            logger.info("✅ Notion CRM inicializado y listo para registrar contactos")
+        except (ValueError, ImportError) as e:
+            logger.warning(f"⚠️  Notion CRM no disponible: {e}")
+    return _notion_crm
+
+
 def is_valid_email(addr: str) -> bool:
-    bad = ("noreply", "no-reply", "wordpress", "example.com", "educationposts.ie", "teachingcouncil.ie")
-    addr_l = (addr or "").lower()
-    return addr and not any(b in addr_l for b in bad)
+    return addr and not BAD_MAIL_RE.search(addr)
+
+
+def _school_identifier(offer: Dict) -> str:
+    roll_keys = ['roll_number', 'roll', 'rollno', 'roll_no', 'rollnumber', 'school_ref']
+    for key in roll_keys:
+        val = offer.get(key)
+        if val:
+            return str(val).strip()
+    name = offer.get('school') or offer.get('school_name') or ''
+    return unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii').strip().lower()
+
+
+def _add_recipients(offers: List[Dict], recipients: Dict[str, Dict[str, str]], seen_schools: Set[str]) -> None:
+    """
+    Añade a `recipients` (clave: email en minúsculas) los colegios de `offers`
+    con email válido, sin repetir ni email ni colegio.
+    """
+    for off in offers:
+        mail = (off.get('email') or '').strip()
+        mail_l = mail.lower()
+        if not mail or mail_l in recipients or BAD_MAIL_RE.search(mail_l):
+            continue
+        school_id = _school_identifier(off)
+        if school_id:
+            if school_id in seen_schools:
+                continue
+            seen_schools.add(school_id)
+        recipients[mail_l] = {
+            'email': mail,
+            'school_name': off.get('school') or off.get('school_name') or 'School',
+            'school_id': school_id,
+        }
 
 
-async def collect_offers(county_selection: str, dublin_zone: Optional[str] = None, level: str = "primary") -> List[Dict]:
-    """Recoge ofertas según condado/zona con el scraper."""
+async def collect_recipients(county_selection: str, dublin_zone: Optional[str] = None,
+                             level: str = "primary") -> Tuple[List[Dict[str, str]], int]:
+    """
+    Recoge ofertas según condado/zona con el scraper y las reduce a destinatarios
+    únicos (por colegio y por email), distrito a distrito.
+
+    Returns:
+        (destinatarios, número total de ofertas encontradas)
+    """
     county_map = {"cork": "4", "dublin": "27", "all": ""}
     county_id = county_map.get(county_selection, "")
 
-    offers: List[Dict] = []
+    recipients: Dict[str, Dict[str, str]] = {}
+    seen_schools: Set[str] = set()
+    total_offers = 0
     if county_selection == "dublin" and dublin_zone and dublin_zone != "all":
         districts = DUBLIN_ZONES.get(dublin_zone, [])
-        for district_id in districts:
-            scraper = EducationPosts(level=level, county_id=county_id, district_id=district_id)
-            district_offers = await scraper.fetch_all()
+        semaphore = asyncio.Semaphore(DISTRICT_CONCURRENCY)
+
+        async def _scrape_district(district_id: str, session) -> List[Dict]:
+            async with semaphore:
+                scraper = EducationPosts(level=level, county_id=county_id, district_id=district_id,
+                                         session=session)
+                district_offers = await scraper.fetch_all()
             for off in district_offers:
                 off['district'] = DUBLIN_DISTRICTS.get(district_id, district_id)
-            offers.extend(district_offers)
-            await asyncio.sleep(2)
+            return district_offers
+
+        # Los distritos se scrapean a la vez (el scraper ya espacia sus propias peticiones)
+        # sobre una única sesión HTTP, y se fusionan en orden para que la
+        # deduplicación no dependa de cuál termina antes
+        async with create_session() as session:
+            district_results = await asyncio.gather(*(_scrape_district(d, session) for d in districts))
+        for district_offers in district_results:
+            total_offers += len(district_offers)
+            _add_recipients(district_offers, recipients, seen_schools)
     else:
         scraper = EducationPosts(level=level, county_id=county_id, district_id="")
         offers = await scraper.fetch_all()
-    return offers
+        total_offers = len(offers)
+        _add_recipients(offers, recipients, seen_schools)
+    return list(recipients.values()), total_offers
 
 
 async def send_presentation_to_schools(user_data: Dict) -> Dict:
@@ -102,14 +229,8 @@ async def send_presentation_to_schools(user_data: Dict) -> Dict:
     try:
         sender = EmailSender()
         
-        # Inicializar Notion CRM si está disponible y configurado
-        notion_crm = None
-        if NOTION_CRM_AVAILABLE:
-            try:
-                notion_crm = NotionCRMManager()
-                logger.info("✅ Notion CRM inicializado y listo para registrar contactos")
-            except (ValueError, ImportError) as e:
-                logger.warning(f"⚠️  Notion CRM no disponible: {e}")
+        # Notion CRM si está disponible y configurado (uno por proceso)
+        notion_crm = _get_notion_crm()
         
         resend_api_key = user_data.get('resend_api_key') or os.getenv('RESEND_API_KEY')
         resend_from_email = (
@@ -130,46 +251,15 @@ async def send_presentation_to_schools(user_data: Dict) -> Dict:
         dublin_zone = user_data.get('dublin_zone')
         level = user_data.get('education_level', 'primary')
 
+        # Consultar en Firebase los colegios ya contactados mientras se hace el scraping
+        loop = asyncio.get_running_loop()
+        already_sent_future = loop.run_in_executor(None, _previous_recipients, resend_from_email)
+
         logger.info(f"Recogiendo ofertas para county={county_selection}, zone={dublin_zone or 'N/A'}, level={level}")
-        offers = await collect_offers(county_selection, dublin_zone, level)
-        if not offers:
+        emails, total_offers = await collect_recipients(county_selection, dublin_zone, level)
+        if not total_offers:
             return {"success": False, "message": "No se encontraron colegios/ofertas"}
 
-        # Filtrar y deduplicar emails (único por colegio y email)
-        BAD_MAILS = ("noreply", "no-reply", "wordpress", "example.com", "educationposts.ie", "teachingcouncil.ie")
-
-        def _school_identifier(offer: Dict) -> str:
-            roll_keys = ['roll_number', 'roll', 'rollno', 'roll_no', 'rollnumber', 'school_ref']
-            for key in roll_keys:
-                val = offer.get(key)
-                if val:
-                    return str(val).strip()
-            name = offer.get('school') or offer.get('school_name') or ''
-            return unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii').strip().lower()
-
-        emails: List[Dict[str, str]] = []
-        seen_emails: Set[str] = set()
-        seen_schools: Set[str] = set()
-
-        for off in offers:
-            mail = (off.get('email') or '').strip()
-            if not mail or any(b in mail.lower() for b in BAD_MAILS):
-                continue
-            school_name = off.get('school') or off.get('school_name') or 'School'
-            school_id = _school_identifier(off)
-            if school_id and school_id in seen_schools:
-                continue
-            if mail.lower() in seen_emails:
-                continue
-            seen_emails.add(mail.lower())
-            if school_id:
-                seen_schools.add(school_id)
-            emails.append({
-                'email': mail,
-                'school_name': school_name,
-                'school_id': school_id,
-            })
-
         if not emails:
             return {"success": False, "message": "No hay emails válidos para enviar"}
 
@@ -191,13 +281,8 @@ async def send_presentation_to_schools(user_data: Dict) -> Dict:
             "Kind regards,\nProfes Nómadas"
         )
 
-        # Enviar uno por uno
         # Excluir emails ya contactados
-        already_sent: Set[str] = set()
-        try:
-            already_sent = get_presentation_recipients(resend_from_email)
-        except Exception as exc:
-            logger.warning(f"No se pudo consultar Firebase para presentaciones previas: {exc}")
+        already_sent = await already_sent_future
 
         skipped = 0
         if already_sent:
@@ -222,60 +307,76 @@ async def send_presentation_to_schools(user_data: Dict) -> Dict:
                 "pdf": pdf_path,
             }
 
+        # El cuerpo se divide una sola vez alrededor de {school_name}
+        render_body = _body_renderer(body_tmpl)
+
+        # El PDF se lee y codifica una sola vez para todos los destinatarios
+        pdf_b64 = await loop.run_in_executor(None, EmailSender.encode_attachment, pdf_path)
+
         total = len(emails)
-        sent = 0
-        errors: List[str] = []
-        for idx, item in enumerate(emails, 1):
-            body = body_tmpl.format(school_name=item['school_name']) if '{school_name}' in body_tmpl else body_tmpl
-            ok = await sender.send_presentation_email(
-                from_email=resend_from_email,
-                from_password=None,
-                to_email=item['email'],
-                presentation_pdf_path=pdf_path,
-                subject=subject,
-                body=body,
-                resend_api_key=resend_api_key,
-                resend_from_email=resend_from_email,
-            )
-            if ok:
-                sent += 1
-                logger.info(f"[{idx}/{total}] ✅ Enviado a {item['email']}")
-                
-                # Registrar en Firebase
+        send_semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
+        pending_records: List[Dict[str, str]] = []
+
+        async def _record_sent(items: List[Dict[str, str]]) -> None:
+            """Registra un lote de envíos: una escritura en lote en Firebase y altas concurrentes en Notion."""
+            try:
+                await loop.run_in_executor(None, mark_presentations_sent, resend_from_email, {
+                    item['email'].lower(): {'school': item['school_name'], 'school_id': item['school_id']}
+                    for item in items
+                })
+            except Exception as exc:
+                logger.warning(f"No se pudieron registrar en Firebase {len(items)} envíos: {exc}")
+            if notion_crm:
                 try:
-                    mark_presentation_sent(
-                        sender_email=resend_from_email,
-                        recipient_email=item['email'].lower(),
-                        data={
-                            'school': item['school_name'],
-                            'school_id': item['school_id'],
-                        }
-                    )
+                    page_ids = await notion_crm.bulk_add_contacts([{
+                        'school_name': item['school_name'],
+                        'email': item['email'],
+                        'school_id': item['school_id'],
+                        'county': county_selection.title() if county_selection != 'all' else '',
+                        'dublin_zone': dublin_zone or '',
+                        'education_level': level,
+                        'sender_email': resend_from_email,
+                        'notes': "Presentación enviada automáticamente",
+                        'status': "contacted",
+                    } for item in items])
+                    logger.info(f"📝 Registrados en Notion CRM: {sum(1 for page_id in page_ids if page_id)}/{len(items)}")
                 except Exception as exc:
-                    logger.warning(f"No se pudo registrar en Firebase el envío a {item['email']}: {exc}")
-                
-                # Registrar en Notion CRM
-                if notion_crm:
-                    try:
-                        notion_crm.add_school_contact(
-                            school_name=item['school_name'],
-                            email=item['email'],
-                            school_id=item['school_id'],
-                            county=county_selection.title() if county_selection != 'all' else '',
-                            dublin_zone=dublin_zone or '',
-                            education_level=level,
-                            sender_email=resend_from_email,
-                            notes=f"Presentación enviada automáticamente",
-                            status="contacted"
-                        )
-                        logger.info(f"📝 Registrado en Notion CRM: {item['school_name']}")
-                    except Exception as exc:
-                        logger.warning(f"No se pudo registrar en Notion CRM el envío a {item['email']}: {exc}")
-            else:
-                err = f"[{idx}/{total}] ❌ Falló {item['email']}"
-                logger.error(err)
-                errors.append(err)
-            await asyncio.sleep(1)
+                    logger.warning(f"No se pudieron registrar en Notion CRM {len(items)} envíos: {exc}")
+
+        async def _send_one(idx: int, item: Dict) -> Optional[str]:
+            """Envía la presentación a un colegio; devuelve el error o None si se envió."""
+            async with send_semaphore:
+                body = render_body(item['school_name'])
+                ok = await sender.send_presentation_email(
+                    from_email=resend_from_email,
+                    from_password=None,
+                    to_email=item['email'],
+                    presentation_pdf_path=pdf_path,
+                    subject=subject,
+                    body=body,
+                    resend_api_key=resend_api_key,
+                    resend_from_email=resend_from_email,
+                    presentation_pdf_b64=pdf_b64,
+                )
+                if ok:
+                    logger.info(f"[{idx}/{total}] ✅ Enviado a {item['email']}")
+                    # Registrar en Firebase y Notion CRM por lotes
+                    pending_records.append(item)
+                else:
+                    err = f"[{idx}/{total}] ❌ Falló {item['email']}"
+                    logger.error(err)
+                await asyncio.sleep(SEND_PAUSE_SECONDS)
+            if len(pending_records) >= RECORD_BATCH_SIZE:
+                batch = pending_records[:]
+                pending_records.clear()
+                await _record_sent(batch)
+            return None if ok else err
+
+        results = await asyncio.gather(*(_send_one(idx, item) for idx, item in enumerate(emails, 1)))
+        if pending_records:
+            await _record_sent(pending_records)
+        errors: List[str] = [err for err in results if err]
+        sent = total - len(errors)
 
         return {
             "success": True,
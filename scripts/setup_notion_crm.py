@@ -3,85 +3,137 @@
 Script para inicializar la base de datos CRM en Notion.
 Crea la estructura necesaria o verifica que existe.
 """
+import hashlib
 import os
 import sys
+import time
 from dotenv import load_dotenv
 
-# Añadir el directorio raíz al path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import _bootstrap  # noqa: F401  (añade la raíz del proyecto a sys.path)
 
 load_dotenv(override=True)
 
+from src.utils.crm_cache import default_cache_path
 from src.utils.notion_crm_manager import NotionCRMManager, create_notion_database_schema
 
+# Marca de la última verificación correcta y cuánto tiempo se da por buena (segundos)
+VERIFIED_MARKER = os.path.join(os.path.dirname(default_cache_path()), 'notion_verified')
+VERIFIED_TTL = 24 * 3600
+
+
+def _config_fingerprint(api_key, database_id):
+    """Huella de la configuración verificada (no guarda la clave en claro)."""
+    return hashlib.blake2b(f"{api_key}\n{database_id}".encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _recently_verified(fingerprint):
+    """True si esta misma configuración se verificó con éxito hace menos de VERIFIED_TTL."""
+    try:
+        if time.time() - os.path.getmtime(VERIFIED_MARKER) >= VERIFIED_TTL:
+            return False
+        with open(VERIFIED_MARKER, encoding='utf-8') as f:
+            return f.read().strip() == fingerprint
+    except OSError:
+        return False
+
+
+def _mark_verified(fingerprint):
+    """Guarda la huella de la configuración recién verificada."""
+    try:
+        os.makedirs(os.path.dirname(VERIFIED_MARKER), exist_ok=True)
+        with open(VERIFIED_MARKER, 'w', encoding='utf-8') as f:
+            f.write(fingerprint)
+    except OSError:
+        pass
+
+
+# Texto fijo de las instrucciones de configuración; solo la lista de
+# propiedades (_schema_instructions) se intercala al imprimirlas
+SETUP_INSTRUCTIONS_HEAD = (
+    "\n"
+    "======================================================================\n"
+    "INSTRUCCIONES PARA CONFIGURAR NOTION CRM\n"
+    "======================================================================\n"
+    "\n"
+    "📋 Paso 1: Crear una integración en Notion\n"
+    "   1. Ve a https://www.notion.so/my-integrations\n"
+    "   2. Haz clic en '+ New integration'\n"
+    "   3. Dale un nombre (ej: 'Profes Nómadas CRM')\n"
+    "   4. Selecciona el workspace donde quieres crear la base de datos\n"
+    "   5. Configura los permisos:\n"
+    "      - Read content: ✓\n"
+    "      - Update content: ✓\n"
+    "      - Insert content: ✓\n"
+    "   6. Copia el 'Internal Integration Token' (comienza con 'secret_')\n"
+    "   7. Añádelo a tu .env como NOTION_API_KEY\n"
+    "\n"
+    "📊 Paso 2: Crear la base de datos en Notion\n"
+    "   1. Ve a tu workspace de Notion\n"
+    "   2. Crea una nueva página (ej: 'Schools CRM')\n"
+    "   3. Dentro de esa página, crea una base de datos 'Table - Full page'\n"
+    "   4. Configura las siguientes propiedades:\n"
+    "\n"
+)
+SETUP_INSTRUCTIONS_TAIL = (
+    "\n"
+    "\n"
+    "🔗 Paso 3: Conectar la integración a la base de datos\n"
+    "   1. Abre la página con tu base de datos en Notion\n"
+    "   2. Haz clic en '...' (tres puntos) en la esquina superior derecha\n"
+    "   3. Ve a 'Add connections'\n"
+    "   4. Busca y selecciona tu integración 'Profes Nómadas CRM'\n"
+    "   5. Copia el ID de la base de datos de la URL:\n"
+    "      URL: https://notion.so/workspace/DATABASE_ID?v=...\n"
+    "      Copia solo el DATABASE_ID (32 caracteres alfanuméricos)\n"
+    "   6. Añádelo a tu .env como NOTION_DATABASE_ID\n"
+    "\n"
+    "✅ Paso 4: Verificar la configuración\n"
+    "   Ejecuta nuevamente este script para verificar que todo funciona\n"
+    "\n"
+    "======================================================================\n"
+    "\n"
+)
+
+
+def _schema_instructions() -> str:
+    """Lista de propiedades de la base de datos, formateada para las instrucciones."""
+    lines = []
+    for prop_name, prop_config in create_notion_database_schema().items():
+        lines.append(f"      • {prop_name} ({prop_config['type']})")
+        if 'options' in prop_config:
+            lines.append(f"        Opciones: {', '.join(prop_config['options'])}")
+    return "\n".join(lines)
+
 
 def print_setup_instructions():
     """Imprime las instrucciones para configurar Notion CRM."""
-    print("\n" + "="*70)
-    print("INSTRUCCIONES PARA CONFIGURAR NOTION CRM")
-    print("="*70)
-    print("\n📋 Paso 1: Crear una integración en Notion")
-    print("   1. Ve a https://www.notion.so/my-integrations")
-    print("   2. Haz clic en '+ New integration'")
-    print("   3. Dale un nombre (ej: 'Profes Nómadas CRM')")
-    print("   4. Selecciona el workspace donde quieres crear la base de datos")
-    print("   5. Configura los permisos:")
-    print("      - Read content: ✓")
-    print("      - Update content: ✓")
-    print("      - Insert content: ✓")
-    print("   6. Copia el 'Internal Integration Token' (comienza con 'secret_')")
-    print("   7. Añádelo a tu .env como NOTION_API_KEY\n")
-    
-    print("📊 Paso 2: Crear la base de datos en Notion")
-    print("   1. Ve a tu workspace de Notion")
-    print("   2. Crea una nueva página (ej: 'Schools CRM')")
-    print("   3. Dentro de esa página, crea una base de datos 'Table - Full page'")
-    print("   4. Configura las siguientes propiedades:\n")
-    
-    schema = create_notion_database_schema()
-    for prop_name, prop_config in schema.items():
-        prop_type = prop_config['type']
-        print(f"      • {prop_name} ({prop_type})")
-        if 'options' in prop_config:
-            options = ', '.join(prop_config['options'])
-            print(f"        Opciones: {options}")
-    
-    print("\n🔗 Paso 3: Conectar la integración a la base de datos")
-    print("   1. Abre la página con tu base de datos en Notion")
-    print("   2. Haz clic en '...' (tres puntos) en la esquina superior derecha")
-    print("   3. Ve a 'Add connections'")
-    print("   4. Busca y selecciona tu integración 'Profes Nómadas CRM'")
-    print("   5. Copia el ID de la base de datos de la URL:")
-    print("      URL: https://notion.so/workspace/DATABASE_ID?v=...")
-    print("      Copia solo el DATABASE_ID (32 caracteres alfanuméricos)")
-    print("   6. Añádelo a tu .env como NOTION_DATABASE_ID\n")
-    
-    print("✅ Paso 4: Verificar la configuración")
-    print("   Ejecuta nuevamente este script para verificar que todo funciona\n")
-    print("="*70 + "\n")
+    sys.stdout.write(SETUP_INSTRUCTIONS_HEAD + _schema_instructions() + SETUP_INSTRUCTIONS_TAIL)
+    sys.stdout.flush()
 
 
-def verify_configuration():
-    """Verifica que la configuración de Notion esté correcta."""
-    api_key = os.getenv('NOTION_API_KEY')
-    database_id = os.getenv('NOTION_DATABASE_ID')
-    
+def verify_configuration(api_key, database_id):
+    """
+    Verifica que la configuración de Notion esté correcta.
+
+    Devuelve el NotionCRMManager conectado (que el llamador debe cerrar) o None si falla.
+    """
     print("\n🔍 Verificando configuración...\n")
     
     if not api_key:
         print("❌ NOTION_API_KEY no está configurado en .env")
-        return False
+        return None
     else:
         masked_key = api_key[:10] + "..." + api_key[-4:] if len(api_key) > 14 else "***"
         print(f"✅ NOTION_API_KEY configurado: {masked_key}")
     
     if not database_id:
         print("❌ NOTION_DATABASE_ID no está configurado en .env")
-        return False
+        return None
     else:
         print(f"✅ NOTION_DATABASE_ID configurado: {database_id}")
     
     # Intentar conectar
+    crm = None
     try:
         print("\n📡 Intentando conectar con Notion...")
         crm = NotionCRMManager(api_key=api_key, database_id=database_id)
@@ -89,12 +141,14 @@ def verify_configuration():
         
         # Intentar leer la base de datos
         print("\n📖 Verificando acceso a la base de datos...")
-        contacts = crm.get_all_contacts()
-        print(f"✅ Base de datos accesible. Contactos actuales: {len(contacts)}")
+        preview = crm.get_recent_contacts(3, properties=['school_name', 'email', 'status'])
+        # Con menos de 3 contactos la vista previa ya es el total
+        total = len(preview) if len(preview) < 3 else crm.count_contacts()
+        print(f"✅ Base de datos accesible. Contactos actuales: {total}")
         
-        if contacts:
+        if preview:
             print("\n📋 Últimos 3 contactos en la base de datos:")
-            for contact in contacts[:3]:
+            for contact in preview:
                 print(f"   • {contact['school_name']} ({contact['email']}) - {contact['status']}")
         
         print("\n" + "="*70)
@@ -102,28 +156,29 @@ def verify_configuration():
         print("="*70)
         print("\nYa puedes usar el CRM de Notion. Los colegios contactados se")
         print("registrarán automáticamente cuando envíes presentaciones.\n")
-        return True
+        return crm
         
     except ValueError as e:
         print(f"❌ Error de configuración: {e}")
-        return False
+        return None
     except Exception as e:
+        if crm is not None:
+            crm.close()
         print(f"❌ Error conectando con Notion: {e}")
         print("\n💡 Posibles causas:")
         print("   • El DATABASE_ID no es correcto")
         print("   • La integración no tiene acceso a la base de datos")
         print("   • La estructura de la base de datos no es correcta")
-        return False
+        return None
 
 
-def test_add_sample_contact():
+def test_add_sample_contact(crm):
     """Añade un contacto de prueba a la base de datos."""
     print("\n🧪 ¿Quieres añadir un contacto de prueba? (s/n): ", end='')
     response = input().strip().lower()
     
     if response == 's':
         try:
-            crm = NotionCRMManager()
             page_id = crm.add_school_contact(
                 school_name="Test School - Colegio de Prueba",
                 email="test@testschool.ie",
@@ -149,15 +204,32 @@ def main():
     """Función principal del script."""
     print("\n🚀 SETUP DE NOTION CRM - PROFES NÓMADAS\n")
     
+    # Leer la configuración una sola vez y pasarla al resto de pasos
+    api_key = os.getenv('NOTION_API_KEY')
+    database_id = os.getenv('NOTION_DATABASE_ID')
+    
     # Verificar si las variables están configuradas
-    if not os.getenv('NOTION_API_KEY') or not os.getenv('NOTION_DATABASE_ID'):
+    if not api_key or not database_id:
         print_setup_instructions()
         print("⚠️  Configura las variables de entorno y vuelve a ejecutar este script.\n")
         return
     
+    # Evitar la verificación en vivo si esta configuración ya se comprobó hace poco
+    fingerprint = _config_fingerprint(api_key, database_id)
+    if '--force' not in sys.argv[1:] and _recently_verified(fingerprint):
+        print("✅ Configuración ya verificada en las últimas 24 h, se omite la comprobación con Notion.")
+        print("   Usa --force para volver a verificarla.\n")
+        return
+    
     # Verificar configuración
-    if verify_configuration():
-        test_add_sample_contact()
+    crm = verify_configuration(api_key, database_id)
+    if crm is not None:
+        _mark_verified(fingerprint)
+        # Reutilizar la misma conexión para el contacto de prueba
+        try:
+            test_add_sample_contact(crm)
+        finally:
+            crm.close()
     else:
         print("\n" + "="*70)
         print("📚 CONSULTA LA DOCUMENTACIÓN ARRIBA PARA CONFIGURAR NOTION")
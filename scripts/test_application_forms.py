@@ -11,26 +11,18 @@ import logging
 from datetime import datetime
 from pathlib import Path
 
-# Añadir el directorio raíz al path para importaciones
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import _bootstrap  # noqa: F401  (añade la raíz del proyecto a sys.path)
 
 from src.scrapers.scraper_educationposts import EducationPosts
 from src.utils.document_reader import DocumentReader
+from src.utils.logger import setup_logging
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
 load_dotenv()
 
 # Configurar logging
-os.makedirs("logs", exist_ok=True)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s: %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(f"logs/test_application_forms_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-    ]
-)
+setup_logging(f"logs/test_application_forms_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
 logger = logging.getLogger("app_form_test")
 
 async def main():
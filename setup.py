@@ -5,6 +5,7 @@ Script de instalación y configuración para ScrapingProfesNomadas
 
 import os
 import sys
+import hashlib
 import subprocess
 import shutil
 from setuptools import setup, find_packages
@@ -17,20 +18,42 @@ def check_python_version():
     print(f"✅ Python {sys.version_info.major}.{sys.version_info.minor} detectado")
 
 def install_requirements():
-    """Instalar dependencias de requirements.txt"""
+    """
+    Instalar dependencias de requirements.txt.
+    Se omite si ya se instalaron con este mismo requirements.txt y este mismo
+    intérprete (marcador con el hash de ambos): un venv nuevo vuelve a instalar.
+    """
+    with open("requirements.txt", "rb") as f:
+        digest = hashlib.sha256(sys.executable.encode() + b"\0" + f.read()).hexdigest()[:16]
+    marker = f".deps_installed_{digest}"
+    if os.path.exists(marker):
+        print("✅ Dependencias ya instaladas (requirements.txt e intérprete sin cambios)")
+        return
+    
     print("📦 Instalando dependencias...")
     try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
+        # --prefer-binary usa wheels aunque haya una versión fuente más nueva;
+        # los paquetes sin wheel (p. ej. fpdf) se siguen construyendo desde fuente
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "--prefer-binary", "-r", "requirements.txt"])
         print("✅ Dependencias instaladas correctamente")
     except subprocess.CalledProcessError:
         print("❌ Error al instalar dependencias")
         sys.exit(1)
+    
+    with open(marker, "w") as f:
+        f.write(sys.executable + "\n")
 
 def setup_directories():
     """Crear directorios necesarios"""
     directories = ['logs', 'data', 'templates']
+    # Un único listado del directorio actual en lugar de un makedirs por carpeta
+    with os.scandir('.') as entries:
+        existing = {entry.name for entry in entries if entry.is_dir()}
     for directory in directories:
-        os.makedirs(directory, exist_ok=True)
+        if directory in existing:
+            print(f"✅ Directorio {directory}/ ya existe")
+            continue
+        os.mkdir(directory)
         print(f"✅ Directorio {directory}/ creado")
 
 def setup_env_file():
@@ -8,15 +8,16 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler
 import os
 from dotenv import load_dotenv
-import json
 from typing import Dict, Callable, List, Optional, Set
 import aiofiles
+import httpx
 import sys
 import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import unicodedata
 import shutil
-import glob
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -31,7 +32,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from src.utils.document_reader import DocumentReader
 from src.utils.pdf_generator import PDFGenerator
 from src.utils.document_validator import DocumentValidator
-from src.scrapers.scraper_educationposts import EducationPosts
+from src.scrapers.scraper_educationposts import EducationPosts, BAD_MAIL_RE
 import traceback
 from src.utils.firebase_manager import (
     get_applied_vacancies,
@@ -41,6 +42,7 @@ from src.utils.firebase_manager import (
     mark_presentation_sent,
 )
 from src.generators.email_sender import EmailSender
+from src.utils.json_io import write_json_async
 try:
     from src.utils.notion_crm_manager import NotionCRMManager
     _NOTION_CRM_AVAILABLE = True
@@ -55,9 +57,217 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # ID del usuario autorizado
-AUTHORIZED_USER_IDS = [1070017515, 7034549850, 6334888548, 6386385237]
+AUTHORIZED_USER_IDS = frozenset({1070017515, 7034549850, 6334888548, 6386385237})
+# Números en la variable de entorno AUTHORIZED_USER_IDS (admite cualquier separador)
+_AUTH_IDS_RE = re.compile(r'\d+')
+
+# Documentos obligatorios (clave en UserData.documents, nombre para el usuario)
+REQUIRED_DOCS = (
+    ('letter_of_application', "Letter of Application"),
+    ('cv', "CV"),
+    ('degree', "Título universitario (Degree)"),
+    ('application_form', "Standard Application Form"),
+    ('teaching_practice', "Teaching Practice"),
+    ('referees', "Referees"),
+)
+
+# Pregunta que se repite al volver con /atras a cada estado (el resto no admite volver)
+BACK_PROMPTS = {
+    "waiting_name": "Por favor, envía tu nombre completo:",
+    "waiting_email": "Por favor, envía tu email de contacto:",
+    "waiting_email_password": "Por favor, envía tu contraseña de aplicación de Gmail:",
+    "waiting_tc_registration": "¿Tienes registro en el Teaching Council? (Sí/No):",
+}
+
+# Instrucciones de los documentos a enviar, tras los datos básicos o la ruta del TC
+DOCS_REQUIRED_MSG = (
+    "Ahora, por favor envía los documentos requeridos por EducationPosts.\n\n"
+    "📄 Documentos OBLIGATORIOS:\n"
+    "• Letter of Application (nombre debe contener 'letter of application', incluido 'letter of application def adc')\n"
+    "• CV (nombre debe contener 'cv')\n"
+    "• Título universitario (nombre debe contener 'degree')\n"
+    "• Application Form (.docx recomendado) (nombre debe contener 'application form')\n"
+    "• Teaching Practice (.docx recomendado) (nombre debe contener 'teaching practice')\n"
+    "• Referees (.docx recomendado) (nombre debe contener 'referees')\n\n"
+    "📄 Documentos OPCIONALES:\n"
+    "• Certificado de registro TC (nombre debe contener 'tc registration')\n"
+    "• Certificado de religión (nombre debe contener 'religion')\n\n"
+    "💡 IMPORTANTE: Se recomienda el formato .docx para Application Form, Teaching Practice y Referees Details para permitir la personalización automática con los datos de cada oferta.\n\n"
+    "ℹ️ NOTA ESPECIAL: El archivo 'Letter of Application def AdC' se procesará como Letter of Application."
+)
+
+# Extensiones de imagen admitidas para el TC Registration
+_IMAGE_EXTS = frozenset({'.png', '.jpg', '.jpeg', '.heic', '.webp'})
+
+# callback_data de los botones en línea, agrupados por el manejador que los atiende
+COUNTY_CALLBACKS = ('cork', 'dublin', 'ambos', 'toda irlanda')
+DUBLIN_ZONE_CALLBACKS = tuple(
+    f"dublin_{zone}" for zone in (
+        '1', '2', '3', '4', '5', '6', '6w', '7', '8', '9', '10', '11', '12',
+        '13', '14', '15', '16', '17', '18', '20', '22', '23', '24', 'all'
+    )
+)
+EDUCATION_LEVEL_CALLBACKS = ('pre-school', 'primary', 'post-primary')
+
+# Tamaño de bloque al descargar documentos de Telegram a disco
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Palabras clave del nombre de archivo para cada tipo de documento, en orden de prioridad
+DOC_KEYWORDS = (
+    ('letter_of_application', ('letter of application', 'letterofapplication')),
+    ('cv', ('cv', 'curriculum', 'resume')),
+    ('degree', ('degree', 'titulo', 'universidad', 'universitario')),
+    ('application_form', ('application form', 'formulario', 'template', 'applicationform')),
+    ('teaching_practice', ('teaching practice', 'practicas', 'practices', 'placement', 'teaching placement', 'placements')),
+    ('referees', ('referees', 'references', 'referentes', 'referencia')),
+    ('tc_registration', ('tc', 'registration', 'teaching council')),
+    ('religion_certificate', ('religion', 'religious', 'certificate')),
+)
+# Una expresión compilada por tipo: una búsqueda en C en lugar de un `in` por palabra clave
+_DOC_TYPE_PATTERNS = tuple(
+    (doc_type, re.compile("|".join(map(re.escape, keywords))))
+    for doc_type, keywords in DOC_KEYWORDS
+)
+
+# Palabras clave de la descripción de una oferta y documento que requieren
+# (el orden de los documentos es el orden en que se devuelven)
+OFFER_DOC_KEYWORDS = {
+    # CVs
+    'cv': 'CV',
+    'curriculum vitae': 'CV',
+    'resume': 'CV',
+    
+    # Certificados y diplomas
+    'certificates': 'Certificates and Diplomas',
+    'diplomas': 'Certificates and Diplomas',
+    'degrees': 'Certificates and Diplomas',
+    'qualifications': 'Certificates and Diplomas',
+    
+    # Formularios de solicitud en inglés
+    'application form': 'Application Form',
+    'standard application form': 'Application Form',
+    'teaching application form': 'Application Form',
+    'sna application form': 'Application Form',
+    'principalship application form': 'Application Form',
+    
+    # Formularios de solicitud en gaélico
+    'foirm iarratais': 'Application Form (Gaeilge)',
+    'foirm iarratais chaighdeánach': 'Application Form (Gaeilge)',
+    
+    # Otros documentos
+    'letter of application': 'Letter of Application',
+    'teaching council': 'Teaching Council Registration',
+    'teaching practice': 'Teaching Practice Grades',
+    'referees': 'Referees Details',
+    'referees details': 'Referees Details',  # Agregar esta variante explícita
+    'reference': 'Referees Details',  # También incluir "reference"
+    'references': 'Referees Details',  # También incluir "references"
+    'religious education': 'Religious Education Certificate',
+}
+_OFFER_DOC_ORDER = tuple(dict.fromkeys(OFFER_DOC_KEYWORDS.values()))
+# Un único recorrido del texto: la búsqueda anticipada prueba todas las palabras
+# clave en cada posición (aunque se solapen, p. ej. "letter of application form")
+_OFFER_DOC_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, sorted(OFFER_DOC_KEYWORDS, key=len, reverse=True))) + "))"
+)
+
+# Nombres de documentos requeridos por una oferta (normalizados con
+# normalize_doc_name) y su clave en user.documents; None para el Application
+# Form, que se genera por oferta en lugar de comprobarse entre los subidos
+DOC_SYNONYMS = {
+    'applicationform': None,
+    'applicationformenglish': None,
+    'applicationform(english)': None,
+    'standardapplicationform': None,
+    'standardapplicationform(english)': None,
+    'cv': 'cv',
+    'curriculumvitae': 'cv',
+    'resume': 'cv',
+    'letterofapplication': 'letter_of_application',
+    'certificatesanddiplomas': 'degree',
+    'degrees': 'degree',
+    'qualifications': 'degree',
+    'degree': 'degree',
+    'teachingcouncilregistration': 'tc_registration',
+    'religiouseducationcertificate': 'religion_certificate',
+    'teachingpracticegrades': 'teaching_practice',
+    'teachingpractice': 'teaching_practice',
+    'refereesdetails': 'referees',
+    'referees': 'referees',
+    'references': 'referees',
+}
+# Mismo mapeo para elegir los adjuntos del email
+ATTACHMENT_DOC_SYNONYMS = {
+    'applicationform': 'application_form',
+    'applicationformenglish': 'application_form',
+    'applicationform(english)': 'application_form',
+    'standardapplicationform': 'application_form',
+    'standardapplicationform(english)': 'application_form',
+    'cv': 'cv',
+    'curriculumvitae': 'cv',
+    'resume': 'cv',
+    'letterofapplication': 'letter_of_application',
+    'certificatesanddiplomas': 'degree',
+    'degrees': 'degree',
+    'qualifications': 'degree',
+    'degree': 'degree',
+    'teachingcouncilregistration': 'tc_registration',
+    'religiouseducationcertificate': 'religion_certificate',
+    'religioncertificate': 'religion_certificate',
+    'teachingpracticegrades': 'practicas',
+    'teachingpractice': 'practicas',
+    'refereesdetails': 'referees',
+    'referees': 'referees',
+    'references': 'referees',
+}
+
+
+def detect_doc_type(file_name_lower: str) -> Optional[str]:
+    """Devuelve el primer tipo de documento cuyas palabras clave aparecen en el nombre (en minúsculas)."""
+    for doc_type, pattern in _DOC_TYPE_PATTERNS:
+        if pattern.search(file_name_lower):
+            return doc_type
+    return None
+
+
+@functools.lru_cache(maxsize=512)
+def normalize_doc_name(doc: str) -> str:
+    """Normaliza el nombre de un documento requerido para buscarlo en DOC_SYNONYMS."""
+    return doc.lower().replace(' ', '').replace('-', '').replace('_', '')
+
+
+@functools.lru_cache(maxsize=8)
+def parse_authorized_ids(raw: str) -> frozenset:
+    """
+    Extrae los IDs numéricos de la variable AUTHORIZED_USER_IDS.
+    Se cachea por valor y no al importar el módulo, porque el .env se carga
+    al crear el bot (load_dotenv) y puede cambiar la variable.
+    """
+    return frozenset(int(id_str) for id_str in _AUTH_IDS_RE.findall(raw))
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_document_validator() -> DocumentValidator:
+    """DocumentValidator compartido por todas las instancias del bot (no guarda estado)."""
+    return DocumentValidator()
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_document_reader() -> DocumentReader:
+    """DocumentReader compartido: su caché de posiciones de plantilla sirve a todo el proceso."""
+    return DocumentReader()
+
 
 class UserData:
+    # Atributos fijos: sin __dict__ por usuario y con acceso directo a cada campo
+    __slots__ = (
+        'name', 'email', 'email_password', 'letter_of_application', 'teaching_placements',
+        'referees', 'documents', 'excel_profile', 'chat_id', 'state', 'previous_state',
+        'county_selection', 'dublin_zone', 'education_level', 'education_level_id',
+        'referentes_sent', 'practicas_sent', 'teaching_council_registration', 'tc_route',
+        'test_mode', 'presentation_mode', 'presentation_pdf',
+    )
+    
     def __init__(self):
         self.name = None
         self.email = None
@@ -95,35 +305,27 @@ class UserData:
 
     def has_required_documents(self):
         """Verifica si se han enviado todos los documentos obligatorios"""
-        return all([
-            self.documents['letter_of_application'],
-            self.documents['cv'],
-            self.documents['degree'],
-            self.documents['application_form'],
-            self.documents['teaching_practice'],
-            self.documents['referees']
-        ])
+        # Generador sobre REQUIRED_DOCS: se detiene en el primer documento que falte
+        return all(self.documents[key] for key, _ in REQUIRED_DOCS)
         
     def has_required_form_data(self):
         """Verifica si se han completado los datos básicos del formulario"""
         # Solo verificamos nombre y correo electrónico
         return bool(self.name and self.email)
 
+# Letras acentuadas (ya en minúsculas) -> letra base, para quitar tildes con un único str.translate
+_ACCENT_TABLE = str.maketrans("áéíóúàèìòùâêîôûäëïöüñ", "aeiouaeiouaeiouaeioun")
+_RESPUESTAS_POSITIVAS = frozenset({"si", "s", "yes", "y"})
+_RESPUESTAS_NEGATIVAS = frozenset({"no", "n"})
+
 def normaliza_respuesta(respuesta: str) -> str:
-    respuesta = respuesta.strip().lower()
-    respuesta = ''.join(
-        c for c in unicodedata.normalize('NFD', respuesta)
-        if unicodedata.category(c) != 'Mn'
-    )
-    return respuesta
+    return respuesta.strip().lower().translate(_ACCENT_TABLE)
 
 def es_respuesta_positiva(respuesta: str) -> bool:
-    resp = normaliza_respuesta(respuesta)
-    return resp in {"si", "sí", "s", "yes", "y"}
+    return normaliza_respuesta(respuesta) in _RESPUESTAS_POSITIVAS
 
 def es_respuesta_negativa(respuesta: str) -> bool:
-    resp = normaliza_respuesta(respuesta)
-    return resp in {"no", "n"}
+    return normaliza_respuesta(respuesta) in _RESPUESTAS_NEGATIVAS
 
 class TelegramBot:
     def __init__(self, token: str):
@@ -139,23 +341,31 @@ class TelegramBot:
         except Exception:
             pass
         self.token = token
-        self.application = Application.builder().token(token).build()
+        self.application = (
+            Application.builder()
+            .token(token)
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
+        # Cliente HTTP para descargar documentos (se crea con la primera descarga)
+        self._download_client = None
+        # Carpeta de documentos temporales: se crea una vez aquí (y al limpiarla)
+        self._temp_dir = "temp"
+        os.makedirs(self._temp_dir, exist_ok=True)
         
         # Obtener lista de usuarios autorizados (usar la variable global o el .env)
         try:
-            authorized_ids_env = os.getenv('AUTHORIZED_USER_IDS', '')
-            if authorized_ids_env:
-                # Usar regex para encontrar solo los números y convertirlos a int
-                self.authorized_user_ids = [int(id_str) for id_str in re.findall(r'\d+', authorized_ids_env)]
-            else:
-                # Si no, usar la variable global definida al inicio
-                self.authorized_user_ids = AUTHORIZED_USER_IDS
+            # Si la variable no está definida (o no tiene números) se usa la global
+            self.authorized_user_ids = (
+                parse_authorized_ids(os.getenv('AUTHORIZED_USER_IDS', '')) or AUTHORIZED_USER_IDS
+            )
             
-            logger.info(f"Usuarios autorizados: {self.authorized_user_ids}")
+            logger.info(f"Usuarios autorizados: {sorted(self.authorized_user_ids)}")
         except Exception as e:
             # En caso de error, usar un valor predeterminado para no romper el bot
             logger.error(f"Error al configurar usuarios autorizados: {e}")
-            self.authorized_user_ids = [1070017515, 7034549850]
+            self.authorized_user_ids = frozenset({1070017515, 7034549850})
         self.user_data = {}  # Diccionario para almacenar datos de usuarios
         
         # Configurar manejadores de comandos
@@ -165,19 +375,40 @@ class TelegramBot:
         self.application.add_handler(CommandHandler("presentacion", self.presentation_command))
         self.application.add_handler(MessageHandler(filters.Document.ALL, self.handle_document))
         self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
-        self.application.add_handler(CallbackQueryHandler(self.handle_county_selection, pattern="^(cork|dublin|ambos|toda irlanda)$"))
-        self.application.add_handler(CallbackQueryHandler(self.handle_dublin_zone_selection, pattern="^dublin_(1|2|3|4|5|6|6w|7|8|9|10|11|12|13|14|15|16|17|18|20|22|23|24|all)$"))
-        self.application.add_handler(CallbackQueryHandler(self.handle_education_level_selection, pattern="^(pre-school|primary|post-primary)$"))
+        # Un único manejador de botones que despacha por callback_data con un diccionario
+        self._callback_dispatch = {
+            **dict.fromkeys(COUNTY_CALLBACKS, self.handle_county_selection),
+            **dict.fromkeys(DUBLIN_ZONE_CALLBACKS, self.handle_dublin_zone_selection),
+            **dict.fromkeys(EDUCATION_LEVEL_CALLBACKS, self.handle_education_level_selection),
+        }
+        self.application.add_handler(CallbackQueryHandler(self._route_callback))
+        # Mensajes de texto: un manejador por estado de la conversación
+        self._state_handlers = {
+            "waiting_name": self._handle_waiting_name,
+            "waiting_email": self._handle_waiting_email,
+            "waiting_email_password": self._handle_waiting_email_password,
+            "waiting_tc_registration": self._handle_waiting_tc_registration,
+            "waiting_tc_route": self._handle_waiting_tc_route,
+            "waiting_tc_route_from_doc": self._handle_waiting_tc_route_from_doc,
+            "waiting_county": self._handle_waiting_county,
+            "waiting_education_level": self._handle_waiting_education_level,
+            "waiting_documents": self._handle_waiting_documents,
+        }
         self.application.add_handler(CommandHandler("test", self.test_command))
         
         # Configurar manejador de errores
         self.application.add_error_handler(self.error_handler)
         
         # Inicializar validadores
-        self.document_validator = DocumentValidator()
+        # El validador y el lector se comparten entre instancias; PDFGenerator y
+        # EmailSender guardan estado (página FPDF, credenciales) y son propios
+        self.document_validator = _shared_document_validator()
         self.pdf_generator = PDFGenerator()
-        self.document_reader = DocumentReader()
+        self.document_reader = _shared_document_reader()
         self.email_sender = EmailSender()
+        # PyMuPDF no es thread-safe: la personalización de documentos se hace
+        # en un único hilo propio, fuera del event loop pero sin solaparse
+        self._pdf_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf")
         
         # Configurar logging
         self.logger = logging.getLogger(__name__)
@@ -193,6 +424,63 @@ class TelegramBot:
             self.logger.error(f"Error al iniciar el bot: {e}")
             raise
     
+    async def _route_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Envía cada pulsación de botón al manejador de su callback_data (ignora las desconocidas)."""
+        handler = self._callback_dispatch.get(update.callback_query.data)
+        if handler is not None:
+            await handler(update, context)
+    
+    async def _post_init(self, application: Application) -> None:
+        """
+        Activa las tareas "eager" (Python 3.12+): las corrutinas de cada update
+        se ejecutan en el acto hasta su primera espera real en lugar de pasar
+        por la cola del event loop.
+        """
+        eager_task_factory = getattr(asyncio, 'eager_task_factory', None)
+        if eager_task_factory is not None:
+            asyncio.get_running_loop().set_task_factory(eager_task_factory)
+    
+    async def _post_shutdown(self, application: Application) -> None:
+        """Cierra el cliente de descargas y las conexiones SMTP al apagar la aplicación."""
+        if self._download_client is not None:
+            await self._download_client.aclose()
+            self._download_client = None
+        self.email_sender.smtp_pool.close()
+        self._pdf_executor.shutdown(wait=False)
+    
+    async def _run_blocking(self, func: Callable, *args, executor=None, **kwargs):
+        """
+        Ejecuta una función bloqueante (disco, PDF, DOCX) en un executor para no
+        detener la atención al resto de chats mientras termina.
+        
+        Args:
+            func: Función síncrona a ejecutar
+            executor: Executor a usar (por defecto el del event loop)
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+    
+    async def _download_file(self, file, path: str) -> None:
+        """
+        Descarga un archivo de Telegram a disco por bloques, sin cargarlo entero
+        en memoria ni bloquear el event loop mientras se escribe.
+        
+        Args:
+            file: telegram.File obtenido con get_file()
+            path: Ruta de destino
+        """
+        if not (file.file_path or '').startswith(('http://', 'https://')):
+            # Servidor local de la Bot API: file_path es una ruta local
+            await file.download_to_drive(path)
+            return
+        if self._download_client is None:
+            self._download_client = httpx.AsyncClient(timeout=httpx.Timeout(60.0))
+        async with self._download_client.stream('GET', file.file_path) as response:
+            response.raise_for_status()
+            async with aiofiles.open(path, 'wb') as f:
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+    
     def stop(self):
         """Detiene el bot de forma segura"""
         try:
@@ -358,40 +646,25 @@ class TelegramBot:
         user = self.user_data[user_id]
         
         try:
-            # Obtener el archivo
-            file = await update.message.document.get_file()
-            file_name = update.message.document.file_name.lower()
+            orig_name = update.message.document.file_name
+            file_name_lower = orig_name.lower()
+            ext = os.path.splitext(file_name_lower)[1]
             
             # 1. Determinar el tipo de documento PRIMERO
-            doc_type = None
-            file_name_lower = file_name # Ya está en minúsculas
-            
-            # Mapeo de palabras clave a tipos de documento
-            doc_keywords = {
-                'letter_of_application': ['letter of application', 'letterofapplication'],
-                'cv': ['cv', 'curriculum', 'resume'],
-                'degree': ['degree', 'titulo', 'universidad', 'universitario'],
-                'application_form': ['application form', 'formulario', 'template', 'applicationform'],
-                'teaching_practice': ['teaching practice', 'practicas', 'practices', 'placement', 'teaching placement', 'placements'],
-                'referees': ['referees', 'references', 'referentes', 'referencia'],
-                'tc_registration': ['tc', 'registration', 'teaching council'],
-                'religion_certificate': ['religion', 'religious', 'certificate']
-            }
-            
-            # Buscar coincidencias en el nombre del archivo
-            for doc_type_key, keywords in doc_keywords.items():
-                if any(keyword in file_name_lower for keyword in keywords):
-                    doc_type = doc_type_key
-                    break
-                    
-            # Caso especial: "letter of application def adc" debe procesarse como Letter of Application
-            if 'letter of application def adc' in file_name_lower or ('letter of application' in file_name_lower and 'def adc' in file_name_lower):
-                doc_type = 'letter_of_application'
+            # "letter of application def adc" ya se clasifica como Letter of
+            # Application porque ese tipo tiene la máxima prioridad; la marca
+            # solo se busca en ese caso y se reutiliza para el aviso al usuario
+            doc_type = detect_doc_type(file_name_lower)
+            is_def_adc = (
+                doc_type == 'letter_of_application'
+                and 'def adc' in file_name_lower
+                and 'letter of application' in file_name_lower
+            )
             
             # 2. AHORA, se valida el formato del archivo
             is_tc_registration = doc_type == 'tc_registration'
-            is_pdf = file_name.lower().endswith('.pdf')
-            is_image = any(file_name.lower().endswith(ext) for ext in ['.png', '.jpg', '.jpeg', '.heic', '.webp'])
+            is_pdf = ext == '.pdf'
+            is_image = ext in _IMAGE_EXTS
 
             if is_tc_registration:
                 if not is_pdf and not is_image:
@@ -404,18 +677,24 @@ class TelegramBot:
                     await update.message.reply_text(f"❌ Error: El documento '{doc_type}' debe estar en formato PDF.")
                     return
             
-            # Crear directorio temporal si no existe
-            os.makedirs("temp", exist_ok=True)
-            # Usar el nombre original del archivo para guardarlo, no la versión en minúsculas
-            temp_path = os.path.join("temp", update.message.document.file_name)
+            # Usar el nombre original del archivo para guardarlo, no la versión en minúsculas,
+            # en una subcarpeta por usuario: la descarga se escribe directamente en su
+            # destino final y dos usuarios con el mismo nombre de archivo no se pisan
+            user_dir = os.path.join(self._temp_dir, str(user_id))
+            os.makedirs(user_dir, exist_ok=True)
+            temp_path = os.path.join(user_dir, orig_name)
             
-            # Descargar el archivo
-            await file.download_to_drive(temp_path)
+            # Obtener y descargar el archivo solo tras validarlo (los rechazos no
+            # cuestan ninguna llamada a Telegram)
+            file = await update.message.document.get_file()
+            await self._download_file(file, temp_path)
             
-            # 3. Se notifica al usuario y se guarda el estado
+            # 3. Se guarda el estado y se responde con un único mensaje
+            # (cada reply_text es una petición a Telegram y cuenta para su límite)
+            parts = []
             # Mensaje especial para 'letter of application def adc'
-            if 'letter of application def adc' in file_name_lower or ('letter of application' in file_name_lower and 'def adc' in file_name_lower):
-                await update.message.reply_text(
+            if is_def_adc:
+                parts.append(
                     "ℹ️ He identificado que el archivo 'Letter of Application def AdC' es una carta de presentación. "
                     "Lo procesaré como Letter of Application."
                 )
@@ -424,7 +703,7 @@ class TelegramBot:
                 # Guardar el documento
                 user.documents[doc_type] = {
                     'path': temp_path,
-                    'filename': update.message.document.file_name
+                    'filename': orig_name
                 }
                 
                 # Actualizar atributos adicionales para compatibilidad
@@ -434,81 +713,60 @@ class TelegramBot:
                     
                     # Si ya conocemos la ruta, usamos el mensaje dinámico. Si no, uno genérico.
                     if user.tc_route:
-                        await update.message.reply_text(
+                        parts.append(
                             f"My application for the Teaching Council number {user.tc_route} has already been submitted and is currently being processed."
                         )
                     else:
                         # Si no se conoce la ruta, se pide al usuario
                         user.state = "waiting_tc_route_from_doc"
-                        await update.message.reply_text(
+                        parts.append(
                             "✅ Documento de TC Registration guardado. \n"
                             "Por favor, indica tu ruta de registro en el Teaching Council (1, 2, 3 o 4):"
                         )
+                        await update.message.reply_text("\n\n".join(parts))
                         # No continuamos con el resto de la lógica de handle_document hasta que se dé la ruta
                         return
                 
-                # Verificar documentos obligatorios faltantes
-                missing_docs = []
-                required_docs = {
-                    'letter_of_application': "Letter of Application",
-                    'cv': "CV",
-                    'degree': "Título universitario (Degree)",
-                    'application_form': "Standard Application Form",
-                    'teaching_practice': "Teaching Practice",
-                    'referees': "Referees"
-                }
-                
-                for doc_key, doc_name in required_docs.items():
-                    if not user.documents[doc_key]:
-                        missing_docs.append(doc_name)
+                # Verificar documentos obligatorios y opcionales faltantes
+                missing_docs = [name for key, name in REQUIRED_DOCS if not user.documents[key]]
+                optional_docs = []
+                if not user.documents['tc_registration']:
+                    optional_docs.append("Teaching Council Registration")
+                if not user.documents['religion_certificate']:
+                    optional_docs.append("Religious Education Certificate")
                 
+                reply_markup = None
                 if missing_docs:
-                    # Comprobar documentos opcionales
-                    optional_docs = []
-                    if not user.documents['tc_registration']:
-                        optional_docs.append("Teaching Council Registration")
-                    if not user.documents['religion_certificate']:
-                        optional_docs.append("Religious Education Certificate")
-                    
-                    # Construir mensaje
-                    message = f"✅ {update.message.document.file_name} guardado correctamente.\n\n"
-                    
-                    if missing_docs:
-                        message += "⚠️ Aún faltan los siguientes documentos OBLIGATORIOS:\n" + \
-                            "\n".join(f"• {doc}" for doc in missing_docs) + \
-                            "\n\nPor favor, envía los documentos faltantes."
-                    
+                    parts.append(f"✅ {orig_name} guardado correctamente.")
+                    parts.append(
+                        "⚠️ Aún faltan los siguientes documentos OBLIGATORIOS:\n" +
+                        "\n".join(f"• {doc}" for doc in missing_docs) +
+                        "\n\nPor favor, envía los documentos faltantes."
+                    )
                     if optional_docs:
-                        message += "\n\n📎 Documentos OPCIONALES que puedes enviar:\n" + \
+                        parts.append(
+                            "📎 Documentos OPCIONALES que puedes enviar:\n" +
                             "\n".join(f"• {doc}" for doc in optional_docs)
-                    
-                    await update.message.reply_text(message)
+                        )
                 else:
-                    # Todos los documentos obligatorios recibidos, verificar opcionales
-                    optional_docs = []
-                    if not user.documents['tc_registration']:
-                        optional_docs.append("Teaching Council Registration")
-                    if not user.documents['religion_certificate']:
-                        optional_docs.append("Religious Education Certificate")
-                    
-                    # Mostrar mensaje y botones para selección de condado
+                    # Todos los documentos obligatorios recibidos: botones para selección de condado
                     keyboard = [
                         [InlineKeyboardButton("Cork", callback_data="cork")],
                         [InlineKeyboardButton("Dublin", callback_data="dublin")]
                     ]
                     reply_markup = InlineKeyboardMarkup(keyboard)
                     
-                    message = "✅ Todos los documentos obligatorios han sido recibidos.\n"
-                    
+                    parts.append("✅ Todos los documentos obligatorios han sido recibidos.")
                     if optional_docs:
-                        message += "\n📎 Recuerda que también puedes enviar estos documentos opcionales:\n" + \
-                            "\n".join(f"• {doc}" for doc in optional_docs) + \
+                        parts.append(
+                            "📎 Recuerda que también puedes enviar estos documentos opcionales:\n" +
+                            "\n".join(f"• {doc}" for doc in optional_docs) +
                             "\n\nPuedes enviarlos ahora o continuar con el proceso."
-                    
-                    message += "\n\nPor favor, selecciona el condado donde quieres buscar:"
-                    
-                    await update.message.reply_text(message, reply_markup=reply_markup)
+                        )
+                    parts.append("Por favor, selecciona el condado donde quieres buscar:")
                     user.state = "waiting_county"
+                
+                await update.message.reply_text("\n\n".join(parts), reply_markup=reply_markup)
             else:
                 await update.message.reply_text(
                     "❌ Tipo de documento no reconocido.\n\n"
@@ -547,210 +805,173 @@ class TelegramBot:
                 user.state, user.previous_state = user.previous_state, user.state
                 await update.message.reply_text("Has vuelto al paso anterior. Por favor, responde de nuevo:")
                 # Mostrar la pregunta correspondiente al estado actual
-                if user.state == "waiting_name":
-                    await update.message.reply_text("Por favor, envía tu nombre completo:")
-                elif user.state == "waiting_email":
-                    await update.message.reply_text("Por favor, envía tu email de contacto:")
-                elif user.state == "waiting_email_password":
-                    await update.message.reply_text("Por favor, envía tu contraseña de aplicación de Gmail:")
-                elif user.state == "waiting_tc_registration":
-                    await update.message.reply_text("¿Tienes registro en el Teaching Council? (Sí/No):")
-                # Resto de estados eliminados ya que no se usan más
-                else:
-                    await update.message.reply_text("No puedes volver más atrás en este paso.")
+                await update.message.reply_text(
+                    BACK_PROMPTS.get(user.state, "No puedes volver más atrás en este paso.")
+                )
             else:
                 await update.message.reply_text("No puedes volver más atrás.")
             return
         
-        if user.state == "waiting_name":
-            user.name = message_text
-            user.state = "waiting_email"
-            await update.message.reply_text(
-                "✅ Nombre guardado.\n\n"
-                "Por favor, envía tu email de contacto:"
-            )
-        
-        elif user.state == "waiting_email":
-            user.email = message_text
-            user.state = "waiting_email_password"
+        handler = self._state_handlers.get(user.state)
+        if handler is not None:
+            await handler(user, update, message_text)
+    
+    async def _handle_waiting_name(self, user: UserData, update: Update, message_text: str):
+        """Guarda el nombre y pide el email de contacto."""
+        user.name = message_text
+        user.state = "waiting_email"
+        await update.message.reply_text(
+            "✅ Nombre guardado.\n\n"
+            "Por favor, envía tu email de contacto:"
+        )
+    
+    async def _handle_waiting_email(self, user: UserData, update: Update, message_text: str):
+        """Guarda el email y pide la contraseña de aplicación de Gmail."""
+        user.email = message_text
+        user.state = "waiting_email_password"
+        await update.message.reply_text(
+            "✅ Email guardado.\n\n"
+            "Por favor, envía tu contraseña de aplicación de Gmail:"
+        )
+    
+    async def _handle_waiting_email_password(self, user: UserData, update: Update, message_text: str):
+        """Guarda la contraseña y pregunta por el registro en el Teaching Council."""
+        user.email_password = message_text
+        user.state = "waiting_tc_registration"
+        await update.message.reply_text(
+            "✅ Contraseña guardada.\n\n"
+            "¿Tienes registro en el Teaching Council? (Sí/No):"
+        )
+    
+    async def _handle_waiting_tc_registration(self, user: UserData, update: Update, message_text: str):
+        """Interpreta la respuesta sobre el registro en el Teaching Council."""
+        # Interpretar la respuesta de forma flexible
+        if es_respuesta_positiva(message_text):
+            tc_registration = True
+        elif es_respuesta_negativa(message_text):
+            tc_registration = False
+        else:
+            await update.message.reply_text("Por favor, responde 'sí' o 'no'.")
+            return
+
+        user.teaching_council_registration = tc_registration
+        logger.info(f"Usuario {update.effective_user.id} tiene TC registration: {tc_registration}")
+
+        if tc_registration:
+            user.state = "waiting_tc_route"
             await update.message.reply_text(
-                "✅ Email guardado.\n\n"
-                "Por favor, envía tu contraseña de aplicación de Gmail:"
+                "✅ De acuerdo.\n\n"
+                "Por favor, indica tu ruta de registro en el Teaching Council (1, 2, 3 o 4):"
             )
-        
-        elif user.state == "waiting_email_password":
-            user.email_password = message_text
-            user.state = "waiting_tc_registration"
+        else:
+            user.state = "waiting_documents"
+            await update.message.reply_text("✅ Información básica guardada.\n\n" + DOCS_REQUIRED_MSG)
+    
+    async def _handle_waiting_tc_route(self, user: UserData, update: Update, message_text: str):
+        """Guarda la ruta del Teaching Council y pide los documentos."""
+        route = message_text.strip()
+        if route in ["1", "2", "3", "4"]:
+            user.tc_route = route
+            user.state = "waiting_documents"
+            await update.message.reply_text(f"✅ Ruta {route} guardada.\n\n" + DOCS_REQUIRED_MSG)
+        else:
+            await update.message.reply_text("❌ Ruta no válida. Por favor, introduce 1, 2, 3 o 4.")
+    
+    async def _handle_waiting_tc_route_from_doc(self, user: UserData, update: Update, message_text: str):
+        """Guarda la ruta indicada tras subir el documento de TC y sigue con la verificación."""
+        route = message_text.strip()
+        if route in ["1", "2", "3", "4"]:
+            user.tc_route = route
             await update.message.reply_text(
-                "✅ Contraseña guardada.\n\n"
-                "¿Tienes registro en el Teaching Council? (Sí/No):"
+                f"✅ Ruta {route} guardada.\n\n"
+                f"My application for the Teaching Council number {route} has already been submitted and is currently being processed."
             )
-            
-        elif user.state == "waiting_tc_registration":
-            # Interpretar la respuesta de forma flexible
-            if es_respuesta_positiva(message_text):
-                tc_registration = True
-            elif es_respuesta_negativa(message_text):
-                tc_registration = False
-            else:
-                await update.message.reply_text("Por favor, responde 'sí' o 'no'.")
-                return
-            
-            user.teaching_council_registration = tc_registration
-            logger.info(f"Usuario {user_id} tiene TC registration: {tc_registration}")
+            # Continuar con la verificación de documentos obligatorios
+            missing_docs = [name for key, name in REQUIRED_DOCS if not user.documents[key]]
 
-            if tc_registration:
-                user.state = "waiting_tc_route"
-                await update.message.reply_text(
-                    "✅ De acuerdo.\n\n"
-                    "Por favor, indica tu ruta de registro en el Teaching Council (1, 2, 3 o 4):"
-                )
-            else:
-                user.state = "waiting_documents"
+            if missing_docs:
                 await update.message.reply_text(
-                    "✅ Información básica guardada.\n\n"
-                    "Ahora, por favor envía los documentos requeridos por EducationPosts.\n\n"
-                    "📄 Documentos OBLIGATORIOS:\n"
-                    "• Letter of Application (nombre debe contener 'letter of application', incluido 'letter of application def adc')\n"
-                    "• CV (nombre debe contener 'cv')\n"
-                    "• Título universitario (nombre debe contener 'degree')\n"
-                    "• Application Form (.docx recomendado) (nombre debe contener 'application form')\n"
-                    "• Teaching Practice (.docx recomendado) (nombre debe contener 'teaching practice')\n"
-                    "• Referees (.docx recomendado) (nombre debe contener 'referees')\n\n"
-                    "📄 Documentos OPCIONALES:\n"
-                    "• Certificado de registro TC (nombre debe contener 'tc registration')\n"
-                    "• Certificado de religión (nombre debe contener 'religion')\n\n"
-                    "💡 IMPORTANTE: Se recomienda el formato .docx para Application Form, Teaching Practice y Referees Details para permitir la personalización automática con los datos de cada oferta.\n\n"
-                    "ℹ️ NOTA ESPECIAL: El archivo 'Letter of Application def AdC' se procesará como Letter of Application."
+                    f"Faltan documentos obligatorios:\n" + 
+                    "\n".join(f"• {doc}" for doc in missing_docs) +
+                    "\n\nPor favor, súbelos para continuar."
                 )
-
-        elif user.state == "waiting_tc_route":
-            route = message_text.strip()
-            if route in ["1", "2", "3", "4"]:
-                user.tc_route = route
                 user.state = "waiting_documents"
-                await update.message.reply_text(
-                    f"✅ Ruta {route} guardada.\n\n"
-                    "Ahora, por favor envía los documentos requeridos por EducationPosts.\n\n"
-                    "📄 Documentos OBLIGATORIOS:\n"
-                    "• Letter of Application (nombre debe contener 'letter of application', incluido 'letter of application def adc')\n"
-                    "• CV (nombre debe contener 'cv')\n"
-                    "• Título universitario (nombre debe contener 'degree')\n"
-                    "• Application Form (.docx recomendado) (nombre debe contener 'application form')\n"
-                    "• Teaching Practice (.docx recomendado) (nombre debe contener 'teaching practice')\n"
-                    "• Referees (.docx recomendado) (nombre debe contener 'referees')\n\n"
-                    "📄 Documentos OPCIONALES:\n"
-                    "• Certificado de registro TC (nombre debe contener 'tc registration')\n"
-                    "• Certificado de religión (nombre debe contener 'religion')\n\n"
-                    "💡 IMPORTANTE: Se recomienda el formato .docx para Application Form, Teaching Practice y Referees Details para permitir la personalización automática con los datos de cada oferta.\n\n"
-                    "ℹ️ NOTA ESPECIAL: El archivo 'Letter of Application def AdC' se procesará como Letter of Application."
-                )
-            else:
-                await update.message.reply_text("❌ Ruta no válida. Por favor, introduce 1, 2, 3 o 4.")
-        
-        elif user.state == "waiting_tc_route_from_doc":
-            route = message_text.strip()
-            if route in ["1", "2", "3", "4"]:
-                user.tc_route = route
-                await update.message.reply_text(
-                    f"✅ Ruta {route} guardada.\n\n"
-                    f"My application for the Teaching Council number {route} has already been submitted and is currently being processed."
-                )
-                # Continuar con la verificación de documentos obligatorios
-                missing_docs = []
-                required_docs = {
-                    'letter_of_application': "Letter of Application",
-                    'cv': "CV", 
-                    'degree': "Título universitario (Degree)",
-                    'application_form': "Standard Application Form",
-                    'teaching_practice': "Teaching Practice",
-                    'referees': "Referees"
-                }
-                
-                for doc_key, doc_name in required_docs.items():
-                    if not user.documents[doc_key]:
-                        missing_docs.append(doc_name)
-                
-                if missing_docs:
-                    await update.message.reply_text(
-                        f"Faltan documentos obligatorios:\n" + 
-                        "\n".join(f"• {doc}" for doc in missing_docs) +
-                        "\n\nPor favor, súbelos para continuar."
-                    )
-                    user.state = "waiting_documents"
-                else:
-                    # Todos los documentos obligatorios recibidos
-                    keyboard = [
-                        [InlineKeyboardButton("Cork", callback_data="cork")],
-                        [InlineKeyboardButton("Dublin", callback_data="dublin")]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    await update.message.reply_text(
-                        "✅ Todos los documentos obligatorios han sido recibidos.\n\n"
-                        "Por favor, selecciona el condado donde quieres buscar:",
-                        reply_markup=reply_markup
-                    )
-                    user.state = "waiting_county"
-            else:
-                await update.message.reply_text("❌ Ruta no válida. Por favor, introduce 1, 2, 3 o 4.")
-        
-        elif user.state == "waiting_county":
-            county = message_text.lower()
-            if county in ["cork", "dublin"]:
-                user.county_selection = county
-                user.state = "waiting_education_level"
-                await update.message.reply_text(
-                    "✅ Condado seleccionado.\n\n"
-                    "Por favor, selecciona el nivel educativo:\n"
-                    "• Pre-school\n"
-                    "• Primary\n"
-                    "• Post-primary"
-                )
             else:
+                # Todos los documentos obligatorios recibidos
+                keyboard = [
+                    [InlineKeyboardButton("Cork", callback_data="cork")],
+                    [InlineKeyboardButton("Dublin", callback_data="dublin")]
+                ]
+                reply_markup = InlineKeyboardMarkup(keyboard)
                 await update.message.reply_text(
-                    "❌ Opción no válida. Por favor, selecciona:\n"
-                    "• Cork\n"
-                    "• Dublin"
+                    "✅ Todos los documentos obligatorios han sido recibidos.\n\n"
+                    "Por favor, selecciona el condado donde quieres buscar:",
+                    reply_markup=reply_markup
                 )
-        
-        elif user.state == "waiting_education_level":
-            level = message_text.lower()
-            if level in ["pre-school", "primary", "post-primary"]:
-                user.education_level = level
-                user.state = "ready"
+                user.state = "waiting_county"
+        else:
+            await update.message.reply_text("❌ Ruta no válida. Por favor, introduce 1, 2, 3 o 4.")
+    
+    async def _handle_waiting_county(self, user: UserData, update: Update, message_text: str):
+        """Selección del condado escrita a mano."""
+        county = message_text.lower()
+        if county in ["cork", "dublin"]:
+            user.county_selection = county
+            user.state = "waiting_education_level"
+            await update.message.reply_text(
+                "✅ Condado seleccionado.\n\n"
+                "Por favor, selecciona el nivel educativo:\n"
+                "• Pre-school\n"
+                "• Primary\n"
+                "• Post-primary"
+            )
+        else:
+            await update.message.reply_text(
+                "❌ Opción no válida. Por favor, selecciona:\n"
+                "• Cork\n"
+                "• Dublin"
+            )
+    
+    async def _handle_waiting_education_level(self, user: UserData, update: Update, message_text: str):
+        """Selección del nivel educativo escrita a mano."""
+        level = message_text.lower()
+        if level in ["pre-school", "primary", "post-primary"]:
+            user.education_level = level
+            user.state = "ready"
+            await update.message.reply_text(
+                "✅ Nivel educativo seleccionado.\n\n"
+                "🔍 Iniciando búsqueda de ofertas...\n"
+                "Este proceso puede tardar unos minutos."
+            )
+            # Aquí se iniciaría el proceso de scraping
+        else:
+            await update.message.reply_text(
+                "❌ Opción no válida. Por favor, selecciona:\n"
+                "• Pre-school\n"
+                "• Primary\n"
+                "• Post-primary"
+            )
+    
+    async def _handle_waiting_documents(self, user: UserData, update: Update, message_text: str):
+        """Envía la plantilla del Application Form si el usuario la solicita."""
+        # Enviar la plantilla del application form si el usuario la solicita
+        if update.message.text.strip().lower() in ["/plantilla", "plantilla", "formulario", "application form"]:
+            plantilla_path = "data/Application_Form_Template.pdf"
+            if os.path.exists(plantilla_path):
+                await update.message.reply_document(document=plantilla_path, filename="Application_Form_Template.pdf")
                 await update.message.reply_text(
-                    "✅ Nivel educativo seleccionado.\n\n"
-                    "🔍 Iniciando búsqueda de ofertas...\n"
-                    "Este proceso puede tardar unos minutos."
+                    "📝 IMPORTANTE: Application Form Template\n\n"
+                    "1. Descarga y rellena el formulario con tus datos personales.\n"
+                    "2. ⭐️ GUÁRDALO EN FORMATO .PDF para que el sistema pueda personalizar automáticamente los campos:\n"
+                    "   - POSITION ADVERTISED\n"
+                    "   - School\n"
+                    "   - ROLL NUMBER\n\n"
+                    "3. Súbelo como documento adjunto manteniendo el formato .pdf.\n\n"
+                    "👉 El sistema personalizará automáticamente tu PDF con los datos de cada oferta."
                 )
-                # Aquí se iniciaría el proceso de scraping
             else:
-                await update.message.reply_text(
-                    "❌ Opción no válida. Por favor, selecciona:\n"
-                    "• Pre-school\n"
-                    "• Primary\n"
-                    "• Post-primary"
-                )
-        
-        elif user.state == "waiting_documents":
-            # Enviar la plantilla del application form si el usuario la solicita
-            if update.message.text.strip().lower() in ["/plantilla", "plantilla", "formulario", "application form"]:
-                plantilla_path = "data/Application_Form_Template.pdf"
-                if os.path.exists(plantilla_path):
-                    await update.message.reply_document(document=plantilla_path, filename="Application_Form_Template.pdf")
-                    await update.message.reply_text(
-                        "📝 IMPORTANTE: Application Form Template\n\n"
-                        "1. Descarga y rellena el formulario con tus datos personales.\n"
-                        "2. ⭐️ GUÁRDALO EN FORMATO .PDF para que el sistema pueda personalizar automáticamente los campos:\n"
-                        "   - POSITION ADVERTISED\n"
-                        "   - School\n"
-                        "   - ROLL NUMBER\n\n"
-                        "3. Súbelo como documento adjunto manteniendo el formato .pdf.\n\n"
-                        "👉 El sistema personalizará automáticamente tu PDF con los datos de cada oferta."
-                    )
-                else:
-                    await update.message.reply_text("No se encontró la plantilla del Application Form. Contacta con el administrador.")
-                return
+                await update.message.reply_text("No se encontró la plantilla del Application Form. Contacta con el administrador.")
+            return
 
     async def error_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Maneja errores del bot"""
@@ -1014,8 +1235,6 @@ class TelegramBot:
                 await context.bot.send_message(chat_id=user_id, text="ℹ️ No se encontraron ofertas/colegios.")
                 return
 
-            BAD_MAILS = ["noreply", "no-reply", "wordpress", "example.com", "educationposts.ie", "teachingcouncil.ie"]
-
             def _school_identifier(offer: Dict) -> str:
                 roll_keys = ['roll_number', 'roll', 'rollno', 'roll_no', 'rollnumber', 'school_ref']
                 for key in roll_keys:
@@ -1031,7 +1250,7 @@ class TelegramBot:
 
             for off in offers:
                 mail = (off.get('email') or '').strip()
-                if not mail or any(b in mail.lower() for b in BAD_MAILS):
+                if not mail or BAD_MAIL_RE.search(mail):
                     continue
                 school_name = off.get('school') or off.get('school_name') or 'School'
                 school_id = _school_identifier(off)
@@ -1238,7 +1457,7 @@ class TelegramBot:
             return None
         return None
 
-    async def prepare_documents_for_offer(self, offer: Dict) -> List[str]:
+    def prepare_documents_for_offer(self, offer: Dict) -> List[str]:
         """
         Analiza los requerimientos de una oferta y devuelve la lista de documentos necesarios.
         Solo incluye los documentos que se mencionan explícitamente en la oferta.
@@ -1249,57 +1468,14 @@ class TelegramBot:
         Returns:
             Lista de documentos requeridos
         """
-        required_docs = []
         description = offer.get('description', '').lower()
         requirements = offer.get('requirements', '').lower()
         
-        # Mapeo simplificado de documentos requeridos
-        doc_mapping = {
-            # CVs
-            'cv': 'CV',
-            'curriculum vitae': 'CV',
-            'resume': 'CV',
-            
-            # Certificados y diplomas
-            'certificates': 'Certificates and Diplomas',
-            'diplomas': 'Certificates and Diplomas',
-            'degrees': 'Certificates and Diplomas',
-            'qualifications': 'Certificates and Diplomas',
-            
-            # Formularios de solicitud en inglés
-            'application form': 'Application Form',
-            'standard application form': 'Application Form',
-            'teaching application form': 'Application Form',
-            'sna application form': 'Application Form',
-            'principalship application form': 'Application Form',
-            
-            # Formularios de solicitud en gaélico
-            'foirm iarratais': 'Application Form (Gaeilge)',
-            'foirm iarratais chaighdeánach': 'Application Form (Gaeilge)',
-            
-            # Otros documentos
-            'letter of application': 'Letter of Application',
-            'teaching council': 'Teaching Council Registration',
-            'teaching practice': 'Teaching Practice Grades',
-            'referees': 'Referees Details',
-            'referees details': 'Referees Details',  # Agregar esta variante explícita
-            'reference': 'Referees Details',  # También incluir "reference"
-            'references': 'Referees Details',  # También incluir "references"
-            'religious education': 'Religious Education Certificate'
-        }
-        
-        # Analizar descripción y requerimientos
+        # Analizar descripción y requerimientos en una sola pasada
         text_to_analyze = f"{description} {requirements}"
+        found_docs = {OFFER_DOC_KEYWORDS[match.group(1)] for match in _OFFER_DOC_RE.finditer(text_to_analyze)}
         
-        # Conjunto para evitar duplicados
-        found_docs = set()
-        
-        for key, doc in doc_mapping.items():
-            if key in text_to_analyze and doc not in found_docs:
-                required_docs.append(doc)
-                found_docs.add(doc)
-            
-        return required_docs
+        return [doc for doc in _OFFER_DOC_ORDER if doc in found_docs]
 
     async def generate_application_form(self, offer: Dict, user: UserData) -> str:
         """
@@ -1330,18 +1506,16 @@ class TelegramBot:
             scraper = EducationPosts()
             offer_data = scraper.prepare_offer_data_for_application_form(offer)
             
-            # Crear directorio temporal si no existe
-            os.makedirs("temp", exist_ok=True)
-            
             # Generar nombre único para el archivo personalizado
             school_name = offer.get('school_name', offer.get('school', 'Unknown')).replace(' ', '_').lower()
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"application_form_{school_name}_{timestamp}.pdf"
-            output_path = os.path.join("temp", filename)
+            output_path = os.path.join(self._temp_dir, filename)
             
             # Personalizar el PDF usando la plantilla del usuario
-            document_reader = DocumentReader()
-            customized_path = document_reader.customize_application_form_pdf(
+            customized_path = await self._run_blocking(
+                self.document_reader.customize_application_form_pdf,
+                executor=self._pdf_executor,
                 template_path=template_path,
                 output_path=output_path,
                 offer_data=offer_data
@@ -1435,48 +1609,12 @@ class TelegramBot:
         
         # Verificar que se hayan enviado todos los documentos obligatorios según la oferta
         offer_required_docs = offer.get('required_documents', [])
-        # Mapeo flexible de nombres de documentos requeridos a claves internas
-        doc_synonyms = {
-            'applicationform': None,
-            'application form': None,
-            'standard application form': None,
-            'applicationformenglish': None,
-            'application form (english)': None,
-            'applicationform(english)': None,
-            'standardapplicationform': None,
-            'standard application form (english)': None,
-            'standardapplicationform(english)': None,
-            'cv': 'cv',
-            'curriculumvitae': 'cv',
-            'resume': 'cv',
-            'letterofapplication': 'letter_of_application',
-            'letter of application': 'letter_of_application',
-            'certificatesanddiplomas': 'degree',
-            'certificates and diplomas': 'degree',
-            'degrees': 'degree',
-            'qualifications': 'degree',
-            'degree': 'degree',
-            'teachingcouncilregistration': 'tc_registration',
-            'teaching council registration': 'tc_registration',
-            'religiouseducationcertificate': 'religion_certificate',
-            'religious education certificate': 'religion_certificate',
-            'teachingpracticegrades': 'teaching_practice',
-            'teaching practice grades': 'teaching_practice',
-            'teaching practice': 'teaching_practice',
-            'refereesdetails': 'referees',
-            'referees details': 'referees',
-            'referees': 'referees',
-            'references': 'referees',
-            'references': 'referentes',
-        }
-        def normalize(doc):
-            return doc.lower().replace(' ', '').replace('-', '').replace('_', '')
         
         missing_docs = []
         for req in offer_required_docs:
-            norm = normalize(req)
-            if norm in doc_synonyms:
-                key = doc_synonyms[norm]
+            norm = normalize_doc_name(req)
+            if norm in DOC_SYNONYMS:
+                key = DOC_SYNONYMS[norm]
                 if key is None:
                     # Para application form, verificar si necesitamos generarlo
                     # (Este bloque se ha simplificado para evitar errores)
@@ -1512,7 +1650,7 @@ class TelegramBot:
         offer_data = scraper.prepare_offer_data_for_application_form(offer)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         school_name = offer['school_name'].replace(' ', '_').lower()
-        document_reader = DocumentReader()
+        document_reader = self.document_reader
         
         # Personalizar documentos (Application Form en PDF, Teaching Practice y Referees en DOCX)
         processed_docs = []
@@ -1536,7 +1674,9 @@ class TelegramBot:
                     custom_filepath = os.path.join('temp', custom_filename)
                     
                     # Personalizar el documento PDF
-                    customized_path = document_reader.customize_application_form_pdf(
+                    customized_path = await self._run_blocking(
+                        document_reader.customize_application_form_pdf,
+                        executor=self._pdf_executor,
                         template_path=doc_path,
                         output_path=custom_filepath,
                         offer_data=offer_data
@@ -1566,7 +1706,9 @@ class TelegramBot:
                     custom_filepath = os.path.join('temp', custom_filename)
                     
                     # Personalizar el documento DOCX
-                    customized_path = document_reader.customize_application_form(
+                    customized_path = await self._run_blocking(
+                        document_reader.customize_application_form,
+                        executor=self._pdf_executor,
                         template_path=doc_path,
                         output_path=custom_filepath,
                         offer_data=offer_data
@@ -1906,13 +2048,13 @@ Hope to hear from you soon,
                     part.add_header('Content-Disposition', f'attachment; filename="{final_filename}"') # Usar comillas para nombres con espacios
                     msg.attach(part)
 
-            # Enviar email por SMTP
+            # Enviar email por SMTP reutilizando la conexión del remitente entre ofertas
             try:
-                context = ssl.create_default_context()
-                with smtplib.SMTP('smtp.gmail.com', 587) as server:
-                    server.starttls(context=context)
-                    server.login(from_email, from_password)
-                    server.sendmail(from_email, to_email, msg.as_string())
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(
+                    None, self.email_sender.smtp_pool.sendmail,
+                    'smtp.gmail.com', 587, from_email, from_password, to_email, msg.as_string()
+                )
                 self.logger.info(f"Email enviado exitosamente a {to_email}")
                 success = True
             except Exception as e:
@@ -1932,12 +2074,7 @@ Hope to hear from you soon,
 
             # Eliminar únicamente los documentos personalizados (no los originales subidos por el usuario)
             files_to_delete = set([form_path] + list(customized_paths.values()))
-            for fpath in files_to_delete:
-                try:
-                    if fpath and os.path.exists(fpath):
-                        os.remove(fpath)
-                except Exception:
-                    pass
+            await self._run_blocking(self._remove_files, files_to_delete)
             return success
         except Exception as e:
             self.logger.error(f"Error al enviar email: {str(e)}")
@@ -1953,8 +2090,7 @@ Hope to hear from you soon,
                 text="❌ No hay ofertas para enviar emails."
             )
             return
-        BAD_MAILS = ["noreply", "no-reply", "wordpress", "example.com", "educationposts.ie", "teachingcouncil.ie"]
-        valid_offers = [o for o in offers if o.get('email') and not any(bad in o.get('email', '').lower() for bad in BAD_MAILS)]
+        valid_offers = [o for o in offers if o.get('email') and not BAD_MAIL_RE.search(o['email'])]
         if not valid_offers:
             await context.bot.send_message(
                 chat_id=user_id,
@@ -1984,7 +2120,7 @@ Hope to hear from you soon,
             text=f"🎉 Proceso completado. Emails enviados: {sent_count}/{len(valid_offers)}"
         )
         # Al finalizar todos los envíos, limpiar completamente la carpeta temp
-        self.clean_temp_folder()
+        await self._run_blocking(self.clean_temp_folder)
         
         # Solo enviar email de prueba si el usuario está en modo test
         user = self.user_data[user_id]
@@ -2125,7 +2261,7 @@ Hope to hear from you soon,
                 text=f"📋 Analizando {len(offers)} ofertas encontradas (no repetidas)..."
             )
             for offer in offers:
-                offer['required_documents'] = await self.prepare_documents_for_offer(offer)
+                offer['required_documents'] = self.prepare_documents_for_offer(offer)
             # Proceso de simulación/aplicación múltiple
             for offer in offers:
                 # Comprobar si el usuario tiene todos los datos y documentos requeridos para esta oferta
@@ -2135,49 +2271,15 @@ Hope to hear from you soon,
                     missing.append('datos del formulario')
                 # Comprobar documentos requeridos
                 offer_required_docs = offer.get('required_documents', [])
-                doc_synonyms = {
-                    'applicationform': None,
-                    'application form': None,
-                    'standard application form': None,
-                    'applicationformenglish': None,
-                    'application form (english)': None,
-                    'applicationform(english)': None,
-                    'standardapplicationform': None,
-                    'standard application form (english)': None,
-                    'standardapplicationform(english)': None,
-                    'cv': 'cv',
-                    'curriculumvitae': 'cv',
-                    'resume': 'cv',
-                    'letterofapplication': 'letter_of_application',
-                    'letter of application': 'letter_of_application',
-                    'certificatesanddiplomas': 'degree',
-                    'certificates and diplomas': 'degree',
-                    'degrees': 'degree',
-                    'qualifications': 'degree',
-                    'degree': 'degree',
-                    'teachingcouncilregistration': 'tc_registration',
-                    'teaching council registration': 'tc_registration',
-                    'religiouseducationcertificate': 'religion_certificate',
-                    'religious education certificate': 'religion_certificate',
-                    'teachingpracticegrades': 'teaching_practice',
-                    'teaching practice grades': 'teaching_practice',
-                    'teaching practice': 'teaching_practice',
-                    'refereesdetails': 'referees',
-                    'referees details': 'referees',
-                    'referees': 'referees',
-                    'references': 'referees',
-                }
-                def normalize(doc):
-                    return doc.lower().replace(' ', '').replace('-', '').replace('_', '')
                 logger.info(f"Verificando documentos requeridos para esta oferta: {offer_required_docs}")
                 logger.info(f"Documentos disponibles del usuario: {list(user.documents.keys())}")
                 
                 for req in offer_required_docs:
-                    norm = normalize(req)
+                    norm = normalize_doc_name(req)
                     logger.info(f"Verificando documento requerido: {req} (normalizado: {norm})")
                     
-                    if norm in doc_synonyms:
-                        key = doc_synonyms[norm]
+                    if norm in DOC_SYNONYMS:
+                        key = DOC_SYNONYMS[norm]
                         logger.info(f"  • Mapeado a clave interna: {key}")
                         
                         if key is None:
@@ -2210,8 +2312,7 @@ Hope to hear from you soon,
                 filename = f"ofertas_{timestamp}.json"
                 filepath = os.path.join("data", filename)
                 os.makedirs("data", exist_ok=True)
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(offers, f, ensure_ascii=False, indent=2)
+                await write_json_async(filepath, offers)
                 doc_summary = {}
                 for offer in offers:
                     for doc in offer['required_documents']:
@@ -2277,45 +2378,6 @@ Hope to hear from you soon,
         attachments = []
         customized_paths = customized_paths or {}
         
-        # Mapeo de nombres de documentos requeridos a claves internas
-        doc_synonyms = {
-            'applicationform': 'application_form',
-            'application form': 'application_form',
-            'standard application form': 'application_form',
-            'applicationformenglish': 'application_form',
-            'application form (english)': 'application_form',
-            'applicationform(english)': 'application_form',
-            'standardapplicationform': 'application_form',
-            'standard application form (english)': 'application_form',
-            'standardapplicationform(english)': 'application_form',
-            'cv': 'cv',
-            'curriculumvitae': 'cv',
-            'resume': 'cv',
-            'letterofapplication': 'letter_of_application',
-            'letter of application': 'letter_of_application',
-            'certificatesanddiplomas': 'degree',
-            'certificates and diplomas': 'degree',
-            'degrees': 'degree',
-            'qualifications': 'degree',
-            'degree': 'degree',
-            'teachingcouncilregistration': 'tc_registration',
-            'teaching council registration': 'tc_registration',
-            'religiouseducationcertificate': 'religion_certificate',
-            'religious education certificate': 'religion_certificate',
-            'religioncertificate': 'religion_certificate',
-            'religion certificate': 'religion_certificate',
-            'teachingpracticegrades': 'practicas',
-            'teaching practice grades': 'practicas',
-            'teaching practice': 'practicas',
-            'refereesdetails': 'referees',
-            'referees details': 'referees',
-            'referees': 'referees',
-            'references': 'referees',
-        }
-        
-        def normalize(doc):
-            return doc.lower().replace(' ', '').replace('-', '').replace('_', '')
-        
         # Obtener documentos requeridos de la oferta
         required_docs = offer.get('required_documents', [])
         
@@ -2335,9 +2397,9 @@ Hope to hear from you soon,
         
         # Procesar cada documento requerido
         for req_doc in required_docs:
-            norm = normalize(req_doc)
-            if norm in doc_synonyms:
-                doc_key = doc_synonyms[norm]
+            norm = normalize_doc_name(req_doc)
+            if norm in ATTACHMENT_DOC_SYNONYMS:
+                doc_key = ATTACHMENT_DOC_SYNONYMS[norm]
                 # Para application form, usar el personalizado si existe en customized_paths
                 if doc_key == 'application_form':
                     if 'application_form' in customized_paths:
@@ -2385,13 +2447,23 @@ Hope to hear from you soon,
         user.test_mode = True
         await update.message.reply_text("🧪 Modo test activado. Cuando envíes tus aplicaciones, se enviarán 10 emails de prueba al email de test en vez de los reales.")
 
+    @staticmethod
+    def _remove_files(paths) -> None:
+        """Elimina los archivos indicados que existan, ignorando los errores."""
+        for fpath in paths:
+            try:
+                if fpath and os.path.exists(fpath):
+                    os.remove(fpath)
+            except Exception:
+                pass
+
     def clean_temp_folder(self):
         """Elimina todo el contenido de la carpeta temp evitando afectar los documentos originales."""
         try:
             import shutil, os
-            if os.path.isdir('temp'):
-                shutil.rmtree('temp')
-            os.makedirs('temp', exist_ok=True)
+            if os.path.isdir(self._temp_dir):
+                shutil.rmtree(self._temp_dir)
+            os.makedirs(self._temp_dir, exist_ok=True)
             self.logger.info("Carpeta temp limpiada tras finalizar todos los envíos.")
         except Exception as e:
             self.logger.warning(f"Error limpiando carpeta temp: {e}")
@@ -1,7 +1,7 @@
 import os
 import json
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List
 
 # Importaciones opcionales para Excel
 try:
@@ -177,26 +177,55 @@ class AIEmailGeneratorV2:
         Returns:
             Email generado
         """
-        # Combinar todos los datos de perfil
+        profile = self._merge_profile(user_data, excel_profile)
+        return self._generate(job_data, profile, template, self._profile_section(profile))
+    
+    def bind_profile(self,
+                     user_data: Dict[str, Any],
+                     excel_profile: Optional[Dict[str, Any]] = None,
+                     template: Optional[str] = None) -> Callable[[Dict[str, Any]], str]:
+        """
+        Prepara la generación de emails de un mismo candidato para muchas ofertas:
+        el perfil combinado y su parte del prompt se construyen una sola vez.
+        
+        Args:
+            user_data: Datos del usuario
+            excel_profile: Perfil desde Excel (opcional)
+            template: Template base (opcional)
+            
+        Returns:
+            Función job_data -> email, equivalente a generate_email con estos datos
+        """
+        profile = self._merge_profile(user_data, excel_profile)
+        profile_section = self._profile_section(profile)
+        return lambda job_data: self._generate(job_data, profile, template, profile_section)
+    
+    @staticmethod
+    def _merge_profile(user_data: Dict[str, Any], excel_profile: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combina los datos del usuario con el perfil de Excel (que tiene prioridad)"""
         profile = {**user_data}
         if excel_profile:
             profile.update(excel_profile)
-        
-        # Usar AI si está disponible
+        return profile
+    
+    def _generate(self, job_data: Dict[str, Any], profile: Dict[str, Any], template: Optional[str],
+                  profile_section: str) -> str:
+        """Genera el email con AI si está disponible y, si no, con el template básico"""
         try:
             if self.openai_client:
-                return self._generate_with_openai(job_data, profile, template)
+                return self._generate_with_openai(job_data, profile, template, profile_section)
             elif self.anthropic_client:
-                return self._generate_with_anthropic(job_data, profile, template)
+                return self._generate_with_anthropic(job_data, profile, template, profile_section)
         except Exception as e:
             logger.error(f"Error con AI: {e}")
         
         # Fallback a generación básica por template
         return self._generate_basic_email(job_data, profile, template)
     
-    def _generate_with_openai(self, job_data: Dict[str, Any], profile: Dict[str, Any], template: Optional[str]) -> str:
+    def _generate_with_openai(self, job_data: Dict[str, Any], profile: Dict[str, Any], template: Optional[str],
+                              profile_section: Optional[str] = None) -> str:
         """Genera email usando OpenAI"""
-        prompt = self._create_prompt(job_data, profile, template)
+        prompt = self._create_prompt(job_data, profile, template, profile_section)
         
         response = self.openai_client.chat.completions.create(
             model="gpt-3.5-turbo",
@@ -210,9 +239,10 @@ class AIEmailGeneratorV2:
         
         return response.choices[0].message.content.strip()
     
-    def _generate_with_anthropic(self, job_data: Dict[str, Any], profile: Dict[str, Any], template: Optional[str]) -> str:
+    def _generate_with_anthropic(self, job_data: Dict[str, Any], profile: Dict[str, Any], template: Optional[str],
+                                 profile_section: Optional[str] = None) -> str:
         """Genera email usando Anthropic Claude"""
-        prompt = self._create_prompt(job_data, profile, template)
+        prompt = self._create_prompt(job_data, profile, template, profile_section)
         
         response = self.anthropic_client.messages.create(
             model="claude-3-sonnet-20240229",
@@ -224,8 +254,14 @@ class AIEmailGeneratorV2:
         
         return response.content[0].text.strip()
     
-    def _create_prompt(self, job_data: Dict[str, Any], profile: Dict[str, Any], template: Optional[str]) -> str:
-        """Crea prompt para AI"""
+    @staticmethod
+    def _profile_section(profile: Dict[str, Any]) -> str:
+        """Líneas del prompt con los datos del candidato"""
+        return ''.join(f"- {key}: {value}\n" for key, value in profile.items() if value)
+    
+    def _create_prompt(self, job_data: Dict[str, Any], profile: Dict[str, Any], template: Optional[str],
+                       profile_section: Optional[str] = None) -> str:
+        """Crea prompt para AI (`profile_section` evita recalcular los datos del candidato)"""
         prompt = f"""
 Genera una carta de presentación profesional en español para un trabajo en educación.
 
@@ -238,9 +274,9 @@ DATOS DEL TRABAJO:
 DATOS DEL CANDIDATO:
 """
         
-        for key, value in profile.items():
-            if value:
-                prompt += f"- {key}: {value}\n"
+        if profile_section is None:
+            profile_section = self._profile_section(profile)
+        prompt += profile_section
         
         prompt += """
 INSTRUCCIONES:
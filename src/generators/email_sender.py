@@ -1,4 +1,7 @@
+import hashlib
 import smtplib
+import ssl
+import threading
 import logging
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -15,14 +18,117 @@ from PyPDF2 import PdfReader
 
 logger = logging.getLogger(__name__)
 
+# Teaching Council Number en un único barrido del texto. Cubre las etiquetas
+# "Registration Number" (incluida "Teacher Registration Number"),
+# "Teaching Council Number" y "TC Number", y los formatos típicos
+# 123456, 1234567, 123/456 y 123 456.
+_TC_NUMBER_RE = re.compile(
+    r'(?:Registration|Teaching Council|TC) Number[:\s]+([0-9]{6,7}|[0-9]{3}[/\s][0-9]{3})',
+    re.IGNORECASE
+)
+
+class SMTPConnectionPool:
+    """
+    Conexiones SMTP autenticadas que se reutilizan entre envíos, una por
+    (servidor, puerto, usuario, contraseña). Ahorra el handshake TLS y el login de cada
+    email; antes de reutilizar una conexión se comprueba con NOOP y, si el
+    servidor la ha cerrado, se abre otra. Es seguro usarla desde varios hilos
+    (los envíos de un mismo remitente se hacen de uno en uno).
+    
+    La contraseña forma parte de la clave (como resumen SHA-256), así que una
+    contraseña distinta nunca reutiliza la sesión abierta con otra: vuelve a
+    hacer login y los errores de autenticación llegan a quien envía. Al
+    cambiar la contraseña de un usuario se cierra su conexión anterior.
+    """
+    
+    def __init__(self, timeout: float = 60.0):
+        self.timeout = timeout
+        self._connections: Dict[tuple, smtplib.SMTP] = {}
+        self._locks: Dict[tuple, threading.Lock] = {}
+        # (servidor, puerto, usuario) -> clave con la última contraseña usada
+        self._current_keys: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+    
+    def sendmail(self, host: str, port: int, user: str, password: str, recipient: str, message: str) -> None:
+        """
+        Envía `message` a `recipient` por una conexión reutilizada.
+        Lanza las mismas excepciones de smtplib que un envío normal.
+        """
+        account = (host, port, user)
+        key = account + (hashlib.sha256(password.encode()).digest(),)
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+            stale_key = self._current_keys.get(account)
+            self._current_keys[account] = key
+            stale_lock = self._locks.pop(stale_key, None) if stale_key not in (None, key) else None
+        if stale_lock is not None:
+            # Credenciales nuevas para este usuario: se cierra la sesión anterior
+            with stale_lock:
+                self._discard(stale_key)
+        with key_lock:
+            server = self._connections.get(key)
+            if server is not None and not self._is_alive(server):
+                self._discard(key)
+                server = None
+            if server is None:
+                server = self._connect(host, port, user, password)
+                self._connections[key] = server
+            try:
+                server.sendmail(user, recipient, message)
+            except (smtplib.SMTPServerDisconnected, OSError):
+                # No se reintenta (el email podría haberse entregado): el
+                # siguiente envío abrirá una conexión nueva
+                self._discard(key)
+                raise
+    
+    def close(self) -> None:
+        """Cierra todas las conexiones abiertas."""
+        with self._lock:
+            keys = list(self._connections)
+        for key in keys:
+            self._discard(key)
+    
+    def _connect(self, host: str, port: int, user: str, password: str) -> smtplib.SMTP:
+        server = smtplib.SMTP(host, port, timeout=self.timeout)
+        try:
+            server.starttls(context=ssl.create_default_context())
+            server.login(user, password)
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    @staticmethod
+    def _is_alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+    
+    def _discard(self, key: tuple) -> None:
+        server = self._connections.pop(key, None)
+        if server is None:
+            return
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+
+# Pool compartido por defecto entre todos los EmailSender del proceso
+DEFAULT_SMTP_POOL = SMTPConnectionPool()
+
+
 class EmailSender:
-    def __init__(self):
+    def __init__(self, smtp_pool: Optional[SMTPConnectionPool] = None):
         self.smtp_server = "smtp.gmail.com"
         self.smtp_port = 587
         
         # Las credenciales se proporcionarán por usuario
         self.email_address = None
         self.email_password = None
+        # Conexiones SMTP reutilizables entre envíos
+        self.smtp_pool = smtp_pool or DEFAULT_SMTP_POOL
             
     async def send_application_email(self, user_data: Dict, offer: Dict, excel_path: str = None, application_form_pdf: str = None, body: str = None, subject: str = None) -> bool:
         """
@@ -286,16 +392,12 @@ Best regards,
         Función síncrona para envío SMTP
         """
         try:
-            # Crear conexión SMTP
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()  # Habilitar encriptación
-            server.login(self.email_address, self.email_password)
-            
-            # Enviar email
-            text = msg.as_string()
-            server.sendmail(self.email_address, recipient, text)
-            server.quit()
-            
+            # Enviar por una conexión del pool (se abre y autentica solo la primera vez)
+            self.smtp_pool.sendmail(
+                self.smtp_server, self.smtp_port,
+                self.email_address, self.email_password,
+                recipient, msg.as_string()
+            )
             return True
             
         except smtplib.SMTPAuthenticationError:
@@ -363,6 +465,7 @@ ScrapingProfesNomadas Bot"""
         *,
         resend_api_key: Optional[str] = None,
         resend_from_email: Optional[str] = None,
+        presentation_pdf_b64: Optional[str] = None,
     ) -> bool:
         """Envía la presentación usando Resend en lugar de SMTP clásico.
 
@@ -375,9 +478,11 @@ ScrapingProfesNomadas Bot"""
             body: Cuerpo opcional (texto plano UTF-8)
             resend_api_key: API Key de Resend (opcional, por defecto se lee de ``RESEND_API_KEY``)
             resend_from_email: Remitente verificado en Resend (opcional, fallback a ``from_email`` o ``RESEND_FROM_EMAIL``)
+            presentation_pdf_b64: Contenido del PDF ya codificado en base64 (ver ``encode_attachment``);
+                si se indica, no se vuelve a leer ``presentation_pdf_path``, que solo da nombre al adjunto
         """
         try:
-            if not os.path.exists(presentation_pdf_path):
+            if presentation_pdf_b64 is None and not os.path.exists(presentation_pdf_path):
                 logger.error(f"PDF de presentación no encontrado: {presentation_pdf_path}")
                 return False
 
@@ -409,8 +514,9 @@ ScrapingProfesNomadas Bot"""
             if not attachment_name.lower().endswith('.pdf'):
                 attachment_name += '.pdf'
 
-            with open(presentation_pdf_path, "rb") as pdf_file:
-                encoded_pdf = base64.b64encode(pdf_file.read()).decode("ascii")
+            encoded_pdf = presentation_pdf_b64
+            if encoded_pdf is None:
+                encoded_pdf = self.encode_attachment(presentation_pdf_path)
 
             payload: Dict[str, Any] = {
                 "from": sender_address,
@@ -433,6 +539,12 @@ ScrapingProfesNomadas Bot"""
             logger.error(f"Error enviando presentación: {str(e)}")
             return False
 
+    @staticmethod
+    def encode_attachment(file_path: str) -> str:
+        """Lee un archivo y lo devuelve codificado en base64, listo para adjuntarlo con Resend."""
+        with open(file_path, "rb") as f:
+            return base64.b64encode(f.read()).decode("ascii")
+
     def _send_presentation_via_resend(self, payload: Dict[str, Any], api_key: str) -> bool:
         """Ejecuta el envío a través de Resend en un hilo separado."""
         try:
@@ -473,30 +585,13 @@ ScrapingProfesNomadas Bot"""
             # Leer el PDF
             with open(pdf_path, 'rb') as file:
                 pdf = PdfReader(file)
-                text = ""
-                
                 # Extraer texto de todas las páginas
-                for page in pdf.pages:
-                    text += page.extract_text() or ""
-                
-                # Buscar patrones comunes de TC Number
-                # Formato típico: 123456, 123/456, 1234567, etc.
-                patterns = [
-                    r'Registration Number[:\s]+([0-9]{6,7})',
-                    r'Registration Number[:\s]+([0-9]{3}[/\s][0-9]{3})',
-                    r'Teacher Registration Number[:\s]+([0-9]{6,7})',
-                    r'Teacher Registration Number[:\s]+([0-9]{3}[/\s][0-9]{3})',
-                    r'Teaching Council Number[:\s]+([0-9]{6,7})',
-                    r'Teaching Council Number[:\s]+([0-9]{3}[/\s][0-9]{3})',
-                    r'TC Number[:\s]+([0-9]{6,7})',
-                    r'TC Number[:\s]+([0-9]{3}[/\s][0-9]{3})'
-                ]
+                text = "".join(page.extract_text() or "" for page in pdf.pages)
                 
-                # Probar cada patrón
-                for pattern in patterns:
-                    match = re.search(pattern, text, re.IGNORECASE)
-                    if match:
-                        return match.group(1)
+                # Buscar el TC Number con una sola expresión compilada
+                match = _TC_NUMBER_RE.search(text)
+                if match:
+                    return match.group(1)
                 
                 logger.info("No se encontró un formato reconocible de Teaching Council Number")
                 return None
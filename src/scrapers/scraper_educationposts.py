@@ -60,15 +60,31 @@ VACANCY_TYPES = {
 
 EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b", re.I)
 BAD_MAIL = ("noreply", "no-reply", "wordpress", "example.com", "educationposts.ie", "teachingcouncil.ie")
+# Una sola pasada (sin distinguir mayúsculas) en lugar de comprobar cada subcadena
+BAD_MAIL_RE = re.compile("|".join(map(re.escape, BAD_MAIL)), re.I)
 
 log = logging.getLogger("edu")
 logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(message)s")
 
 
+def create_session(limit=None, limit_per_host=16) -> aiohttp.ClientSession:
+    """
+    Crea una sesión HTTP para compartir entre varios scrapers (condados/distritos),
+    de modo que DNS, conexiones TCP/TLS y keep-alive se reutilizan entre ellos.
+    Debe llamarse con el event loop en marcha y cerrarse al terminar
+    (por ejemplo `async with create_session() as session:`).
+    """
+    if limit is None:
+        limit = int(os.getenv("HTTP_CONN_LIMIT", "100"))
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host,
+                                     ttl_dns_cache=300, keepalive_timeout=30)
+    return aiohttp.ClientSession(headers=HEAD, cookie_jar=aiohttp.CookieJar(), connector=connector)
+
+
 # ------------- helpers -----------------------------------------------------------------
 def first_valid_email(text: str) -> Optional[str]:
     for m in EMAIL_RE.findall(text or ""):
-        if not any(b in m.lower() for b in BAD_MAIL):
+        if not BAD_MAIL_RE.search(m):
             # Limpiar el email de cualquier texto adicional
             email = m.strip()
             # Eliminar cualquier texto que venga después del email
@@ -143,7 +159,7 @@ def is_valid_vacancy(vacancy_name: str) -> bool:
 # ------------- scraper -----------------------------------------------------------------
 class EducationPosts:
     def __init__(self, level="primary", county_id="", district_id="", vacancy_type="", max_workers=3, max_pages=None, 
-                 username=None, password=None, safe_mode=False):
+                 username=None, password=None, safe_mode=False, session=None):
         self.level     = level         # "primary", "second_level", etc.
         self.county_id = str(county_id) if county_id is not None else ""  # Asegurarse que sea string
         self.county_name = COUNTIES.get(self.county_id, "Desconocido")
@@ -182,12 +198,14 @@ class EducationPosts:
             
         self.cookies = {}  # Guardaremos las cookies de sesión aquí
         self.is_logged_in = False
+        # Sesión HTTP compartida (ver create_session); si es None, fetch_all abre la suya
+        self.session = session
         
         log.info(f"Configurado scraper para nivel: {self.level}, condado: {self.county_name} (ID: {self.county_id}), tipo: {self.vacancy_name} (VC: {self.vacancy_type})")
         log.info("🔍 Filtrado avanzado de vacantes: Solo 'teacher', excluyendo 'principal teacher' y 'special school teacher placement'")
 
     # --------- PUBLIC ----------
-    async def fetch_all(self, max_pages=None, login_first=True, limit=None) -> List[Dict]:
+    async def fetch_all(self, max_pages=None, login_first=True, limit=None, require_email=False) -> List[Dict]:
         """
         Obtiene todas las ofertas de trabajo.
         
@@ -195,112 +213,122 @@ class EducationPosts:
             max_pages: Número máximo de páginas a procesar. None para todas.
             login_first: Si es True, intenta iniciar sesión antes de hacer scraping.
             limit: Número máximo de ofertas a obtener. None para todas.
+            require_email: Si es True, descarta las ofertas sin email de contacto.
         
         Returns:
             Lista de ofertas con detalles y email.
         """
+        if self.session is not None:
+            return await self._fetch_all(self.session, max_pages, login_first, limit, require_email)
         # Crear una sesión HTTP con cookies persistentes
         cookies_jar = aiohttp.CookieJar()
         async with aiohttp.ClientSession(headers=HEAD, cookie_jar=cookies_jar) as s:
-            # Iniciar sesión si se solicita
-            if login_first and self.username and self.password:
-                log.info("🔑 Intentando iniciar sesión...")
-                login_success = await self.login(session=s)
-                if login_success:
-                    log.info("✅ Sesión iniciada correctamente")
-                else:
-                    log.error("❌ Error al iniciar sesión")
-                    return []
-                    
-            # Determinar el número de páginas
-            log.info("📊 Obteniendo número total de páginas...")
-            total_pages = await self._get_pages(s)
-            log.info(f"📚 Total páginas disponibles: {total_pages}")
-            
-            if total_pages == 0:
-                log.error("❌ No se encontraron páginas disponibles")
-                return []
-            
-            # Si hay un límite de páginas, respetarlo
-            if max_pages and max_pages < total_pages:
-                pages_to_process = max_pages
-                log.info(f"📌 Limitando a {max_pages} páginas")
+            return await self._fetch_all(s, max_pages, login_first, limit, require_email)
+
+    async def _fetch_all(self, s, max_pages, login_first, limit, require_email=False) -> List[Dict]:
+        """Cuerpo de fetch_all sobre una sesión HTTP ya abierta."""
+        # Iniciar sesión si se solicita
+        if login_first and self.username and self.password:
+            log.info("🔑 Intentando iniciar sesión...")
+            login_success = await self.login(session=s)
+            if login_success:
+                log.info("✅ Sesión iniciada correctamente")
             else:
-                pages_to_process = total_pages
+                log.error("❌ Error al iniciar sesión")
+                return []
                 
-            log.info(f"🔄 Procesando {pages_to_process} páginas...")
+        # Determinar el número de páginas
+        log.info("📊 Obteniendo número total de páginas...")
+        total_pages = await self._get_pages(s)
+        log.info(f"📚 Total páginas disponibles: {total_pages}")
+        
+        if total_pages == 0:
+            log.error("❌ No se encontraron páginas disponibles")
+            return []
+        
+        # Si hay un límite de páginas, respetarlo
+        if max_pages and max_pages < total_pages:
+            pages_to_process = max_pages
+            log.info(f"📌 Limitando a {max_pages} páginas")
+        else:
+            pages_to_process = total_pages
+            
+        log.info(f"🔄 Procesando {pages_to_process} páginas...")
 
-            # 1) Obtener URLs y datos básicos de todas las páginas
-            basic = []
-            for page_num in range(1, pages_to_process + 1):
-                if limit and len(basic) >= limit:
-                    log.info(f"📊 Límite de ofertas alcanzado: {limit}")
-                    break
-                
-                log.info(f"📄 Procesando página {page_num}/{pages_to_process}...")
-                page_offers = await self._extract_urls_from_page(s, page_num)
-                if page_offers:
-                    log.info(f"✅ Página {page_num}: {len(page_offers)} ofertas encontradas")
-                    basic.extend(page_offers)
-                else:
-                    log.warning(f"⚠️ Página {page_num}: No se encontraron ofertas")
-                
-                # Espera entre páginas para evitar detección
-                if page_num < pages_to_process:
-                    wait_time = random.uniform(2.0, 4.0)
-                    log.info(f"⏱️ Esperando {wait_time:.1f}s...")
-                    await asyncio.sleep(wait_time)
+        # 1) Obtener URLs y datos básicos de todas las páginas
+        basic = []
+        for page_num in range(1, pages_to_process + 1):
+            if limit and len(basic) >= limit:
+                log.info(f"📊 Límite de ofertas alcanzado: {limit}")
+                break
             
-            log.info(f"📊 Total ofertas básicas encontradas: {len(basic)}")
+            log.info(f"📄 Procesando página {page_num}/{pages_to_process}...")
+            page_offers = await self._extract_urls_from_page(s, page_num)
+            if page_offers:
+                log.info(f"✅ Página {page_num}: {len(page_offers)} ofertas encontradas")
+                basic.extend(page_offers)
+            else:
+                log.warning(f"⚠️ Página {page_num}: No se encontraron ofertas")
             
-            if not basic:
-                log.error("❌ No se encontraron ofertas en ninguna página")
-                return []
+            # Espera entre páginas para evitar detección
+            if page_num < pages_to_process:
+                wait_time = random.uniform(2.0, 4.0)
+                log.info(f"⏱️ Esperando {wait_time:.1f}s...")
+                await asyncio.sleep(wait_time)
+        
+        log.info(f"📊 Total ofertas básicas encontradas: {len(basic)}")
+        
+        if not basic:
+            log.error("❌ No se encontraron ofertas en ninguna página")
+            return []
 
-            # 2) Procesar cada oferta para obtener detalles
-            log.info("🔍 Obteniendo detalles de las ofertas...")
-            detailed_offers = []
-            for i, offer in enumerate(basic[:limit] if limit else basic, 1):
-                detailed = await self._offer_detail(s, offer.copy())
-                if detailed:
-                    # Loguear todos los campos relevantes antes de filtrar
-                    log.info(f"[DEBUG] Oferta completa antes de filtrar: {detailed}")
-                    school_name = detailed.get('school_name', '').lower()
-                    if "gaelscoil" in school_name:
-                        log.info(f"⛔ Oferta filtrada (Gaelscoil): {detailed.get('school_name', 'N/A')}")
-                        continue
-                    # Unifica todos los campos relevantes en un solo texto
-                    all_text = ' '.join([
-                        str(detailed.get('vacancy', '')),
-                        str(detailed.get('additional information', '')),
-                        str(detailed.get('description', '')),
-                        str(detailed.get('requirements', '')),
-                        str(detailed.get('required subject', '')),
-                        str(detailed.get('subjects', ''))
-                    ]).lower()
-                    
-                    # El filtro robusto decide si la oferta es válida, pero no debe cambiar el nombre de la vacante
-                    if not ("teacher" in all_text and
-                            "principal teacher" not in all_text and
-                            "special school teacher placement" not in all_text):
-                        log.info(f"⛔ Oferta filtrada (vacante no compatible): {all_text}")
-                        continue
-                        
-                    # No sobreescribir la vacante, ya fue extraída correctamente
-                    # detailed['vacancy'] = "Teacher" # <-- Eliminado
+        # 2) Procesar cada oferta para obtener detalles
+        log.info("🔍 Obteniendo detalles de las ofertas...")
+        detailed_offers = []
+        for i, offer in enumerate(basic[:limit] if limit else basic, 1):
+            detailed = await self._offer_detail(s, offer.copy())
+            if detailed:
+                # Loguear todos los campos relevantes antes de filtrar
+                log.info(f"[DEBUG] Oferta completa antes de filtrar: {detailed}")
+                if require_email and not detailed.get('email'):
+                    log.info(f"⛔ Oferta filtrada (sin email de contacto): {detailed.get('school_name', 'N/A')}")
+                    continue
+                school_name = detailed.get('school_name', '').lower()
+                if "gaelscoil" in school_name:
+                    log.info(f"⛔ Oferta filtrada (Gaelscoil): {detailed.get('school_name', 'N/A')}")
+                    continue
+                # Unifica todos los campos relevantes en un solo texto
+                all_text = ' '.join([
+                    str(detailed.get('vacancy', '')),
+                    str(detailed.get('additional information', '')),
+                    str(detailed.get('description', '')),
+                    str(detailed.get('requirements', '')),
+                    str(detailed.get('required subject', '')),
+                    str(detailed.get('subjects', ''))
+                ]).lower()
+                
+                # El filtro robusto decide si la oferta es válida, pero no debe cambiar el nombre de la vacante
+                if not ("teacher" in all_text and
+                        "principal teacher" not in all_text and
+                        "special school teacher placement" not in all_text):
+                    log.info(f"⛔ Oferta filtrada (vacante no compatible): {all_text}")
+                    continue
                     
-                    detailed_offers.append(detailed)
-                    log.info(f"✅ Oferta {i} procesada correctamente")
-                else:
-                    log.warning(f"⚠️ No se pudieron obtener detalles de la oferta {i}")
+                # No sobreescribir la vacante, ya fue extraída correctamente
+                # detailed['vacancy'] = "Teacher" # <-- Eliminado
                 
-                # Espera entre ofertas
-                if i < len(basic):
-                    await asyncio.sleep(random.uniform(1.0, 2.0))
-            
-            log.info(f"🎯 Total ofertas procesadas: {len(detailed_offers)}")
+                detailed_offers.append(detailed)
+                log.info(f"✅ Oferta {i} procesada correctamente")
+            else:
+                log.warning(f"⚠️ No se pudieron obtener detalles de la oferta {i}")
             
-            return detailed_offers
+            # Espera entre ofertas
+            if i < len(basic):
+                await asyncio.sleep(random.uniform(1.0, 2.0))
+        
+        log.info(f"🎯 Total ofertas procesadas: {len(detailed_offers)}")
+        
+        return detailed_offers
 
     # --------- AUTHENTICATION ----------
     async def login(self, session=None) -> bool:
@@ -627,7 +655,7 @@ class EducationPosts:
                         value_text = value_div.get_text(separator=' ', strip=True)
                         possible_email = first_valid_email(value_text)
                         log.info(f"[SCRAPER] Buscando email en: {value_text}")
-                        if possible_email and not any(bad in possible_email.lower() for bad in BAD_MAIL):
+                        if possible_email and not BAD_MAIL_RE.search(possible_email):
                             apply_to_email = possible_email
                             log.info(f"[SCRAPER] Email válido extraído: {apply_to_email}")
                             break
@@ -643,7 +671,7 @@ class EducationPosts:
                         if 'enquiries' in label_text or 'contact' in label_text:
                             value_text = value_div.get_text(separator=' ', strip=True)
                             possible_email = first_valid_email(value_text)
-                            if possible_email and not any(bad in possible_email.lower() for bad in BAD_MAIL):
+                            if possible_email and not BAD_MAIL_RE.search(possible_email):
                                 apply_to_email = possible_email
                                 log.info(f"[SCRAPER] Email válido extraído de Enquiries/Contact: {apply_to_email}")
                                 break
@@ -660,7 +688,7 @@ class EducationPosts:
                         email = mailto_link['href'][7:].split('?')[0].strip()
                         log.info(f"[SCRAPER] Encontrado mailto junto a 'Apply to': {email}")
                         if email and first_valid_email(email):
-                            if not any(bad in email.lower() for bad in BAD_MAIL):
+                            if not BAD_MAIL_RE.search(email):
                                 apply_to_email = email
                                 log.info(f"[SCRAPER] Email válido extraído de mailto: {apply_to_email}")
                                 break
@@ -1148,50 +1176,36 @@ class EducationPosts:
         Returns:
             Diccionario con los datos formateados para el application form
         """
-        # Extraer y mostrar todas las claves disponibles para depuración
-        log.info(f"📊 Claves disponibles en la oferta: {list(offer.keys())}")
+        log.debug("📊 Claves disponibles en la oferta: %s", offer.keys())
         
-        # Extraer datos necesarios con verificación detallada
-        position = None
+        # Cada campo admite dos nombres de clave; los valores predeterminados
+        # solo se usan (y se avisan) cuando no está ninguno
         if 'vacancy' in offer:
             position = offer['vacancy']
-            log.info(f"✅ Usando 'vacancy' como posición: {position}")
         elif 'position' in offer:
             position = offer['position']
-            log.info(f"✅ Usando 'position' como posición: {position}")
         else:
             position = 'Teaching Position'
-            log.warning(f"⚠️ No se encontró campo de posición, usando valor predeterminado: {position}")
+            log.warning("⚠️ No se encontró campo de posición, usando valor predeterminado: %s", position)
             
-        school_name = None
         if 'school' in offer:
             school_name = offer['school']
-            log.info(f"✅ Usando 'school' como nombre de escuela: {school_name}")
         elif 'school_name' in offer:
             school_name = offer['school_name']
-            log.info(f"✅ Usando 'school_name' como nombre de escuela: {school_name}")
         else:
             school_name = 'School'
-            log.warning(f"⚠️ No se encontró campo de escuela, usando valor predeterminado: {school_name}")
+            log.warning("⚠️ No se encontró campo de escuela, usando valor predeterminado: %s", school_name)
             
-        roll_number = None
         if 'roll_number' in offer:
             roll_number = offer['roll_number']
             # Limpiar el roll number para quitar texto adicional como "Apply"
-            if roll_number and isinstance(roll_number, str):
-                if "Apply" in roll_number:
-                    clean_roll_number = roll_number.split("Apply")[0].strip()
-                    log.info(f"Roll Number limpiado: '{roll_number}' -> '{clean_roll_number}'")
-                    roll_number = clean_roll_number
-            log.info(f"✅ Usando roll number: {roll_number}")
+            if isinstance(roll_number, str) and "Apply" in roll_number:
+                roll_number = roll_number.split("Apply", 1)[0].strip()
         else:
             roll_number = 'N/A'
-            log.warning(f"⚠️ No se encontró roll number, usando valor predeterminado: {roll_number}")
+            log.warning("⚠️ No se encontró roll number, usando valor predeterminado: %s", roll_number)
         
-        log.info(f"📝 Preparando datos para application form:")
-        log.info(f"   • Posición: {position}")
-        log.info(f"   • Escuela: {school_name}")
-        log.info(f"   • Roll Number: {roll_number}")
+        log.info("📝 Datos para application form: %s | %s | Roll %s", position, school_name, roll_number)
         
         # Datos para personalizar el formulario
         return {
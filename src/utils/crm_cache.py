@@ -0,0 +1,155 @@
+"""
+Caché local en disco para las consultas al CRM de Notion.
+Guarda los resultados en un archivo SQLite (modo WAL) con un TTL por entrada,
+de forma que los comandos de consulta no repitan llamadas a la API de Notion
+(limitada a ~3 peticiones/segundo) mientras los datos sigan frescos.
+Además mantiene una copia de los contactos por ID de página para poder
+sincronizar solo los cambios (last_edited_time) cuando las entradas caducan.
+"""
+
+import os
+import sqlite3
+import time
+import logging
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from src.utils.json_io import dumps_json, loads_json
+
+logger = logging.getLogger(__name__)
+
+# Tiempo de vida por defecto de las entradas (segundos)
+DEFAULT_TTL = 600
+
+
+def default_cache_path(database_id: Optional[str] = None) -> str:
+    """
+    Ruta del archivo de caché (~/.cache/profes_nomadas/crm.sqlite3 o $XDG_CACHE_HOME).
+    Con `database_id` cada base de datos de Notion tiene su propio archivo
+    (crm_<database_id>.sqlite3), para no mezclar contactos ni IDs de página.
+    """
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    filename = f"crm_{database_id}.sqlite3" if database_id else 'crm.sqlite3'
+    return os.path.join(base, 'profes_nomadas', filename)
+
+
+class CRMCache:
+    """
+    Caché clave/valor con TTL sobre SQLite.
+
+    Las claves son cadenas con un prefijo por recurso (por ejemplo
+    'contacts:interested'), lo que permite invalidar un recurso completo.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: int = DEFAULT_TTL,
+                 database_id: Optional[str] = None):
+        """
+        Abre (o crea) la caché.
+
+        Args:
+            path: Ruta del archivo SQLite (por defecto default_cache_path(database_id))
+            ttl: Tiempo de vida por defecto de las entradas en segundos
+            database_id: Base de datos de Notion cuyos datos se guardan
+        """
+        self.path = path or default_cache_path(database_id)
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " data BLOB NOT NULL,"
+            " timestamp REAL NOT NULL,"
+            " ttl REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS contacts ("
+            " id TEXT PRIMARY KEY,"
+            " data BLOB NOT NULL,"
+            " last_edited TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Devuelve el valor guardado para `key` o None si no existe o ha caducado.
+        """
+        row = self._conn.execute(
+            "SELECT data, timestamp, ttl FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        data, timestamp, ttl = row
+        if time.time() - timestamp > ttl:
+            logger.debug("Entrada de caché caducada: %s", key)
+            return None
+        return loads_json(data)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Guarda `value` (serializable a JSON) bajo `key`."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, data, timestamp, ttl) VALUES (?, ?, ?, ?)",
+                (key, dumps_json(value), time.time(), self.ttl if ttl is None else ttl)
+            )
+
+    def invalidate(self, prefix: str = '') -> None:
+        """Elimina las entradas cuya clave empieza por `prefix` (todas si está vacío)."""
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            )
+
+    def clear(self) -> None:
+        """
+        Vacía la caché por completo: entradas (incluido el índice de emails),
+        contactos sincronizados y marca de la última sincronización, de modo
+        que la siguiente sincronización es completa y no quedan páginas archivadas.
+        """
+        with self._conn:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM contacts")
+            self._conn.execute("DELETE FROM meta")
+
+    def upsert_contacts(self, contacts: Iterable[Dict]) -> Optional[str]:
+        """
+        Inserta o reemplaza contactos por su ID de página.
+
+        Returns:
+            El mayor `last_updated` de los contactos guardados, o None si no había ninguno
+        """
+        latest = None
+        with self._conn:
+            for contact in contacts:
+                last_edited = contact.get('last_updated') or ''
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO contacts (id, data, last_edited) VALUES (?, ?, ?)",
+                    (contact['id'], dumps_json(contact), last_edited)
+                )
+                if latest is None or last_edited > latest:
+                    latest = last_edited
+        return latest
+
+    def iter_contacts(self) -> Iterator[Dict]:
+        """Recorre los contactos guardados sin cargarlos todos en memoria."""
+        for (data,) in self._conn.execute("SELECT data FROM contacts ORDER BY rowid"):
+            yield loads_json(data)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Devuelve un valor de metadatos (por ejemplo la marca de la última sincronización)."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Guarda un valor de metadatos."""
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def close(self) -> None:
+        """Cierra la conexión con el archivo de caché."""
+        self._conn.close()
@@ -4,7 +4,9 @@ Módulo para leer y procesar documentos (PDF, Excel, etc.)
 """
 
 import os
+import hashlib
 import logging
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional
 import pandas as pd
 import PyPDF2
@@ -23,6 +25,9 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Plantillas distintas cuyas posiciones de campos se recuerdan (las menos usadas se descartan)
+TEMPLATE_RECTS_CACHE_SIZE = 32
+
 class DocumentReader:
     """Clase para leer y procesar diferentes tipos de documentos"""
     
@@ -35,6 +40,9 @@ class DocumentReader:
             '.docx': self._read_docx,
             '.doc': self._read_docx
         }
+        # Posiciones de los campos por resumen de la plantilla en memoria, como
+        # LRU acotado (ver _template_field_rects)
+        self._template_rects_cache: 'OrderedDict[bytes, Dict[str, list]]' = OrderedDict()
     
     def read_document(self, file_path: str) -> Dict[str, Any]:
         """
@@ -89,22 +97,23 @@ class DocumentReader:
                     text = page.extract_text()
                     if text:
                         content['pages'].append(text)
-                        content['text'] += text + '\n\n'
                         
         except Exception as e:
             logger.warning(f"Error con PyPDF2, intentando pdfplumber: {str(e)}")
             
-            # Fallback a pdfplumber
+            # Fallback a pdfplumber (descartando lo que PyPDF2 llegara a extraer)
+            content['pages'] = []
             try:
                 with pdfplumber.open(file_path) as pdf:
                     for page in pdf.pages:
                         text = page.extract_text()
                         if text:
                             content['pages'].append(text)
-                            content['text'] += text + '\n\n'
             except Exception as e:
                 logger.error(f"Error con pdfplumber: {str(e)}")
         
+        # El texto completo se compone una sola vez a partir de las páginas
+        content['text'] = ''.join(page + '\n\n' for page in content['pages'])
         return content
     
     def _read_excel(self, file_path: str) -> Dict[str, Any]:
@@ -358,9 +367,64 @@ class DocumentReader:
         Ahora la primera página se renderiza como imagen y se personaliza visualmente.
         El resto de páginas se copian tal cual.
         """
-        if not os.path.exists(template_path) or not template_path.lower().endswith('.pdf'):
+        if not template_path.lower().endswith('.pdf'):
             logger.error(f"Plantilla PDF no encontrada o formato incorrecto: {template_path}")
             return None
+        return self._customize_pdf(output_path, offer_data, template_path=template_path)
+    
+    @staticmethod
+    def load_pdf_template(template_path: str) -> bytes:
+        """
+        Lee una plantilla PDF completa en memoria para reutilizarla en varias personalizaciones.
+        
+        Args:
+            template_path: Ruta a la plantilla PDF
+            
+        Returns:
+            Contenido binario de la plantilla
+        """
+        with open(template_path, 'rb') as f:
+            return f.read()
+    
+    def customize_application_form_pdf_from_bytes(self, template_bytes: bytes, output_path: str, offer_data: Dict) -> Optional[str]:
+        """
+        Igual que customize_application_form_pdf, pero a partir de una plantilla ya
+        cargada en memoria (ver load_pdf_template), sin volver a leerla del disco.
+        """
+        return self._customize_pdf(output_path, offer_data, template_bytes=template_bytes)
+    
+    def _template_field_rects(self, doc, variantes: Dict[str, List[str]],
+                              template_bytes: Optional[bytes] = None) -> Dict[str, list]:
+        """
+        Busca en la plantilla aún sin modificar las variantes de cada campo
+        (primera página) y la etiqueta 'Date' (última página).
+        Con una plantilla en memoria el resultado se guarda por el resumen de su
+        contenido, de modo que en un lote solo la primera oferta recorre el texto
+        de las páginas; solo se conservan las TEMPLATE_RECTS_CACHE_SIZE más recientes.
+        """
+        key = None
+        if template_bytes is not None:
+            key = hashlib.blake2b(template_bytes).digest()
+            rects = self._template_rects_cache.get(key)
+            if rects is not None:
+                self._template_rects_cache.move_to_end(key)
+                return rects
+        first_page = doc[0]
+        rects = {
+            variante: first_page.search_for(variante, quads=False)
+            for variantes_campo in variantes.values()
+            for variante in variantes_campo
+        }
+        rects['Date'] = doc[-1].search_for('Date', quads=False)
+        if key is not None:
+            self._template_rects_cache[key] = rects
+            if len(self._template_rects_cache) > TEMPLATE_RECTS_CACHE_SIZE:
+                self._template_rects_cache.popitem(last=False)
+        return rects
+    
+    def _customize_pdf(self, output_path: str, offer_data: Dict, template_path: Optional[str] = None,
+                       template_bytes: Optional[bytes] = None) -> Optional[str]:
+        """Personaliza la plantilla indicada por ruta o por contenido en memoria."""
         try:
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             position = offer_data.get('position', 'Teaching Position')
@@ -376,30 +440,22 @@ class DocumentReader:
                 'School:': f"School: {school_name}",
                 'ROLL NUMBER': f"ROLL NUMBER: {roll_number}"
             }
-            doc = fitz.open(template_path)
+            if template_bytes is not None:
+                doc = fitz.open(stream=template_bytes, filetype='pdf')
+            else:
+                doc = fitz.open(template_path)
             page = doc[0]
-            # Variantes de los campos a buscar
+            # Variantes de los campos a buscar. page.search_for no distingue
+            # mayúsculas, así que basta una variante por forma ('School:' se
+            # busca antes que 'School' para conservar el rectángulo con los dos puntos)
             variantes = {
-                'POSITION ADVERTISED': [
-                    'POSITION ADVERTISED',
-                    'POSITION ADVERTISED:',
-                    'Position Advertised',
-                    'Position Advertised:',
-                ],
-                'School:': [
-                    'School:',
-                    'SCHOOL:',
-                    'School',
-                    'SCHOOL'
-                ],
-                'ROLL NUMBER': [
-                    'ROLL NUMBER',
-                    'ROLL NUMBER:',
-                    'Roll Number',
-                    'Roll Number:',
-                ]
+                'POSITION ADVERTISED': ['POSITION ADVERTISED'],
+                'School:': ['School:', 'School'],
+                'ROLL NUMBER': ['ROLL NUMBER']
             }
             font_size = 12  # Tamaño de fuente fijo y profesional
+            # Posiciones de los campos en la plantilla sin modificar
+            field_rects = self._template_field_rects(doc, variantes, template_bytes)
             roll_rect = None
             # 1. Sobrescribir ROLL NUMBER (como hasta ahora)
             key = 'ROLL NUMBER'
@@ -407,7 +463,7 @@ class DocumentReader:
             topmost_rect = None
             topmost_y = float('inf')
             for variante in variantes[key]:
-                areas = page.search_for(variante, quads=False)
+                areas = field_rects[variante]
                 for rect in areas:
                     if rect.y0 < topmost_y:
                         topmost_y = rect.y0
@@ -425,7 +481,7 @@ class DocumentReader:
             closest_rect = None
             min_distance = float('inf')
             for variante in variantes[key]:
-                areas = page.search_for(variante, quads=False)
+                areas = field_rects[variante]
                 for rect in areas:
                     if roll_rect:
                         distance = abs(rect.y0 - roll_rect.y0)
@@ -444,7 +500,7 @@ class DocumentReader:
             topmost_rect = None
             topmost_y = float('inf')
             for variante in variantes[key]:
-                areas = page.search_for(variante, quads=False)
+                areas = field_rects[variante]
                 for rect in areas:
                     if rect.y0 < topmost_y:
                         topmost_y = rect.y0
@@ -459,14 +515,8 @@ class DocumentReader:
             # 4. Añadir la fecha en la última página
             try:
                 last_page = doc[-1]
-                date_variantes = ['Date:', 'Date', 'DATE:', 'DATE']
-                all_date_rects = []
-                
-                # Buscar todas las ocurrencias de las variantes de fecha
-                for variante in date_variantes:
-                    areas = last_page.search_for(variante, quads=False)
-                    if areas:
-                        all_date_rects.extend(areas)
+                # Buscar todas las ocurrencias de 'Date' (búsqueda sin distinción de mayúsculas)
+                all_date_rects = list(field_rects['Date'])
                 
                 # Seleccionar el 'date_rect' que esté más abajo en la página
                 date_rect = None
@@ -0,0 +1,31 @@
+"""
+Selección del event loop de asyncio.
+Usa uvloop (basado en libuv) cuando está instalado y deja el loop por
+defecto de asyncio en caso contrario (por ejemplo en Windows).
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+
+def install_uvloop() -> bool:
+    """
+    Instala uvloop como política de event loop si está disponible.
+    Debe llamarse antes de asyncio.run() o de crear cualquier loop.
+
+    Returns:
+        True si se instaló uvloop, False si se usará el loop por defecto
+    """
+    if not UVLOOP_AVAILABLE:
+        logger.debug("uvloop no está disponible, se usará el event loop por defecto.")
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
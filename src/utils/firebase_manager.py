@@ -90,4 +90,30 @@ def mark_presentation_sent(sender_email: str, recipient_email: str, data: dict =
     if "sent_at" not in payload:
         payload["sent_at"] = datetime.utcnow().isoformat()
     ref = db.collection("presentaciones").document(sender_email).collection("destinatarios").document(recipient_email)
-    ref.set(payload)
\ No newline at end of file
+    ref.set(payload)
+
+# Firestore admite como máximo 500 operaciones por escritura en lote
+_FIRESTORE_BATCH_LIMIT = 500
+
+
+def mark_presentations_sent(sender_email: str, recipients: dict):
+    """
+    Marca varios destinatarios a la vez con escrituras en lote de Firestore
+    (una petición por cada 500 destinatarios en lugar de una por destinatario).
+
+    Args:
+        sender_email: Remitente de la presentación
+        recipients: Diccionario {email del destinatario: datos a guardar}
+    """
+    if not db or not sender_email or not recipients:
+        return
+    ref = db.collection("presentaciones").document(sender_email).collection("destinatarios")
+    sent_at = datetime.utcnow().isoformat()
+    items = list(recipients.items())
+    for start in range(0, len(items), _FIRESTORE_BATCH_LIMIT):
+        batch = db.batch()
+        for recipient_email, data in items[start:start + _FIRESTORE_BATCH_LIMIT]:
+            payload = dict(data or {})
+            payload.setdefault("sent_at", sent_at)
+            batch.set(ref.document(recipient_email), payload)
+        batch.commit()
@@ -0,0 +1,123 @@
+"""
+Lectura y escritura de archivos JSON.
+Usa orjson (implementado en C) cuando está disponible y recurre a json
+de la librería estándar en caso contrario. La salida es equivalente a
+json.dump(..., ensure_ascii=False, indent=2).
+Las variantes asíncronas usan aiofiles para no bloquear el event loop.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.debug("orjson no está disponible, se usará json de la librería estándar.")
+
+try:
+    import aiofiles
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    AIOFILES_AVAILABLE = False
+    logger.debug("aiofiles no está disponible, la E/S asíncrona usará el executor por defecto.")
+
+
+def dumps_json(data: Any) -> bytes:
+    """
+    Serializa datos a JSON indentado en UTF-8.
+
+    Args:
+        data: Objeto a serializar
+
+    Returns:
+        Bytes con el JSON codificado en UTF-8
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def loads_json(raw) -> Any:
+    """
+    Deserializa JSON desde bytes o str.
+
+    Args:
+        raw: Contenido JSON
+
+    Returns:
+        Objeto deserializado
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def write_json(path: str, data: Any) -> None:
+    """
+    Guarda datos como JSON indentado en la ruta indicada.
+
+    Args:
+        path: Ruta del archivo de salida
+        data: Objeto a serializar
+    """
+    with open(path, 'wb') as f:
+        f.write(dumps_json(data))
+
+
+def read_json(path: str) -> Any:
+    """
+    Lee y deserializa un archivo JSON.
+
+    Args:
+        path: Ruta del archivo JSON
+
+    Returns:
+        Objeto deserializado
+
+    Raises:
+        FileNotFoundError: Si el archivo no existe
+    """
+    with open(path, 'rb') as f:
+        return loads_json(f.read())
+
+
+async def write_json_async(path: str, data: Any) -> None:
+    """
+    Versión asíncrona de write_json que no bloquea el event loop.
+
+    Args:
+        path: Ruta del archivo de salida
+        data: Objeto a serializar
+    """
+    if AIOFILES_AVAILABLE:
+        async with aiofiles.open(path, 'wb') as f:
+            await f.write(dumps_json(data))
+        return
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, write_json, path, data)
+
+
+async def read_json_async(path: str) -> Any:
+    """
+    Versión asíncrona de read_json que no bloquea el event loop.
+
+    Args:
+        path: Ruta del archivo JSON
+
+    Returns:
+        Objeto deserializado
+
+    Raises:
+        FileNotFoundError: Si el archivo no existe
+    """
+    if AIOFILES_AVAILABLE:
+        async with aiofiles.open(path, 'rb') as f:
+            return loads_json(await f.read())
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, read_json, path)
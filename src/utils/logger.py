@@ -1,4 +1,10 @@
+import functools
 import logging
+import logging.handlers
+import os
+import sys
+import time
+from typing import Optional
 
 def setup_logger(name: str = 'scraper', level: int = logging.INFO) -> logging.Logger:
     """
@@ -12,4 +18,82 @@ def setup_logger(name: str = 'scraper', level: int = logging.INFO) -> logging.Lo
         formatter = logging.Formatter('[%(asctime)s] %(levelname)s - %(message)s')
         ch.setFormatter(formatter)
         logger.addHandler(ch)
-    return logger 
\ No newline at end of file
+    return logger
+
+# Formato común de los scripts de scripts/
+SCRIPT_LOG_FORMAT = "%(asctime)s - %(levelname)s: %(message)s"
+
+@functools.lru_cache(maxsize=None)
+def _shared_formatter(fmt: str) -> logging.Formatter:
+    """Un único Formatter por formato, compartido por todos los handlers."""
+    return logging.Formatter(fmt)
+
+def _file_logging_enabled() -> bool:
+    """
+    En CI (variable CI definida y sin terminal) no se escriben archivos de log.
+    LOG_TO_FILE=0/1 fuerza el comportamiento en cualquier entorno.
+    """
+    forced = os.environ.get('LOG_TO_FILE')
+    if forced is not None:
+        return forced not in ('0', 'false', 'False', '')
+    return not (os.environ.get('CI') and not sys.stdout.isatty())
+
+def file_handler(path: str, fmt: str) -> logging.FileHandler:
+    """
+    Devuelve un FileHandler diferido: el archivo no se crea hasta el primer
+    registro, así que un script que termina antes de loguear no deja logs vacíos.
+    """
+    handler = logging.FileHandler(path, delay=True)
+    handler.setFormatter(_shared_formatter(fmt))
+    return handler
+
+class TimedMemoryHandler(logging.handlers.MemoryHandler):
+    """
+    MemoryHandler que además vacía el búfer cuando ha pasado `flush_interval`
+    segundos desde la última escritura (se comprueba al llegar cada registro).
+    Pensado para procesos de larga duración: pocas escrituras al archivo sin
+    que el log en disco se quede muy por detrás de la consola.
+    """
+
+    def __init__(self, capacity: int, flush_interval: float, target: logging.Handler):
+        super().__init__(capacity, target=target)
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+
+    def shouldFlush(self, record: logging.LogRecord) -> bool:
+        return (super().shouldFlush(record)
+                or time.monotonic() - self._last_flush >= self.flush_interval)
+
+    def flush(self) -> None:
+        super().flush()
+        self._last_flush = time.monotonic()
+
+def buffered_file_handler(path: str, fmt: str, capacity: int = 256,
+                          flush_interval: Optional[float] = None) -> logging.Handler:
+    """
+    Devuelve un handler que acumula los registros en memoria y los escribe en
+    `path` por lotes: cada `capacity` registros, ante un ERROR o al cerrar logging
+    y, si se indica `flush_interval`, también cuando pasan esos segundos.
+    """
+    if flush_interval is not None:
+        return TimedMemoryHandler(capacity, flush_interval, target=file_handler(path, fmt))
+    return logging.handlers.MemoryHandler(capacity, target=file_handler(path, fmt))
+
+def setup_logging(log_file: Optional[str] = None, fmt: str = SCRIPT_LOG_FORMAT,
+                  level: int = logging.INFO, buffered: bool = True,
+                  flush_interval: Optional[float] = None) -> None:
+    """
+    Configura el logging raíz de un script: consola y, si se indica `log_file`,
+    un archivo (por lotes si `buffered`, o registro a registro). Los procesos de
+    larga duración pueden usar `flush_interval` para acotar el retraso del archivo.
+    """
+    console = logging.StreamHandler()
+    console.setFormatter(_shared_formatter(fmt))
+    handlers = [console]
+    if log_file and _file_logging_enabled():
+        os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+        if buffered:
+            handlers.append(buffered_file_handler(log_file, fmt, flush_interval=flush_interval))
+        else:
+            handlers.append(file_handler(log_file, fmt))
+    logging.basicConfig(level=level, format=fmt, handlers=handlers)
@@ -3,16 +3,49 @@ Gestor de CRM en Notion para trackear colegios contactados.
 Registra información de cada colegio al que se envía la presentación.
 """
 import os
+import asyncio
+import functools
 import logging
-from typing import Dict, Optional, List
+import time
+from typing import Callable, Dict, Iterator, Optional, List
 from datetime import datetime
 from dotenv import load_dotenv
 
+from src.utils.crm_cache import default_cache_path
+from src.utils.json_io import read_json, write_json
+from src.utils.rate_limiter import AsyncRateLimiter
+
 load_dotenv(override=True)
 
 logger = logging.getLogger(__name__)
 
+# Campo del contacto -> nombre de la propiedad en la base de datos de Notion
+CONTACT_PROPERTIES = {
+    'school_name': 'School Name',
+    'email': 'Email',
+    'school_id': 'School ID',
+    'county': 'County',
+    'dublin_zone': 'City Zone',
+    'education_level': 'Education Level',
+    'status': 'Status',
+    'contact_date': 'Contact Date',
+    'sender_email': 'Sender Email',
+    'notes': 'Notes',
+}
+
+# Esquema de cada base de datos ya consultado en este proceso (database_id -> propiedades)
+_SCHEMA_CACHE: Dict[str, Dict] = {}
+# Vida del esquema guardado en disco entre ejecuciones (segundos)
+SCHEMA_CACHE_TTL = 24 * 3600
+
+# Pool HTTP compartido por todas las llamadas de un mismo gestor
+HTTP_POOL_LIMITS = {'max_connections': 8, 'max_keepalive_connections': 4}
+HTTP_CONNECT_RETRIES = 3
+# Reintentos de una petición que Notion rechaza con 429 (rate_limited)
+RATE_LIMIT_RETRIES = 5
+
 try:
+    import httpx
     from notion_client import Client
     NOTION_AVAILABLE = True
 except ImportError:
@@ -38,13 +71,15 @@ class NotionCRMManager:
     - Last Updated (last_edited_time): Auto-gestionado por Notion
     """
     
-    def __init__(self, api_key: Optional[str] = None, database_id: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, database_id: Optional[str] = None,
+                 cache=None):
         """
         Inicializa el gestor de Notion CRM.
         
         Args:
             api_key: Token de integración de Notion (o usa NOTION_API_KEY del .env)
             database_id: ID de la base de datos de Notion (o usa NOTION_DATABASE_ID del .env)
+            cache: CRMCache opcional para las consultas de lectura (sin caché si es None)
         """
         if not NOTION_AVAILABLE:
             raise ImportError("notion-client no está instalado. Instala con: pip install notion-client")
@@ -57,9 +92,29 @@ class NotionCRMManager:
         if not self.database_id:
             raise ValueError("NOTION_DATABASE_ID no está configurado")
         
-        self.client = Client(auth=self.api_key)
+        # Un único cliente httpx con keep-alive: las peticiones reutilizan la
+        # conexión TLS en lugar de abrir una nueva cada vez
+        self._http = httpx.Client(transport=httpx.HTTPTransport(
+            retries=HTTP_CONNECT_RETRIES,
+            limits=httpx.Limits(**HTTP_POOL_LIMITS)
+        ))
+        self.client = Client(auth=self.api_key, client=self._http)
+        self.cache = cache
+        self._email_index = None
+        self._property_ids = None
         logger.info("✅ Cliente de Notion inicializado correctamente")
     
+    def close(self) -> None:
+        """Cierra las conexiones HTTP abiertas con la API de Notion."""
+        self._http.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+    
     def add_school_contact(
         self,
         school_name: str,
@@ -101,45 +156,15 @@ class NotionCRMManager:
                     status=status
                 )
             
-            # Crear propiedades de la página pero sólo incluir las que existen
-            db_props = self._get_database_properties()
-
-            properties = {}
-            if "School Name" in db_props:
-                properties["School Name"] = {"title": [{"text": {"content": school_name}}]}
-            if "Email" in db_props:
-                properties["Email"] = {"email": email}
-            if "Status" in db_props:
-                properties["Status"] = {"select": {"name": status}}
-            if "Contact Date" in db_props:
-                properties["Contact Date"] = {"date": {"start": datetime.now().isoformat()}}
-            
-            # Añadir campos opcionales solo si tienen valor
-            if school_id and "School ID" in db_props:
-                properties["School ID"] = {"rich_text": [{"text": {"content": school_id}}]}
-            
-            if county and "County" in db_props:
-                properties["County"] = {"select": {"name": county.title()}}
-            
-            if dublin_zone and "City Zone" in db_props:
-                properties["City Zone"] = {"select": {"name": dublin_zone}}
-            
-            if education_level and "Education Level" in db_props:
-                properties["Education Level"] = {"select": {"name": education_level}}
-            
-            if sender_email and "Sender Email" in db_props:
-                properties["Sender Email"] = {"email": sender_email}
-            
-            if notes and "Notes" in db_props:
-                properties["Notes"] = {"rich_text": [{"text": {"content": notes}}]}
-            
             # Crear página en Notion
-            response = self.client.pages.create(
-                parent={"database_id": self.database_id},
-                properties=properties
+            response = self._create_page(
+                school_name, email, school_id, county, dublin_zone,
+                education_level, sender_email, notes, status
             )
             
             page_id = response.get('id')
+            self._invalidate_cache()
+            self._add_to_email_index(email, page_id, school_name)
             logger.info(f"✅ Colegio {school_name} añadido a Notion CRM (ID: {page_id})")
             return page_id
             
@@ -147,6 +172,227 @@ class NotionCRMManager:
             logger.error(f"❌ Error añadiendo colegio a Notion CRM: {e}")
             return None
     
+    async def bulk_add_contacts(self, contacts: List[Dict], requests_per_second: float = 3.0) -> List[Optional[str]]:
+        """
+        Añade muchos contactos a la vez respetando el límite de la API de Notion.
+        El esquema y el índice de emails se consultan una sola vez; después cada
+        contacto nuevo cuesta una única petición (una actualización con notas,
+        dos), y las peticiones se lanzan de forma concurrente espaciadas por un
+        AsyncRateLimiter: cada petición HTTP, incluidos los reintentos, espera
+        su turno.
+        
+        Args:
+            contacts: Diccionarios con los mismos argumentos que add_school_contact
+            requests_per_second: Ritmo máximo de peticiones (Notion admite ~3/s)
+        
+        Returns:
+            IDs de las páginas creadas o actualizadas (None para las que fallan),
+            en el mismo orden que `contacts`
+        """
+        loop = asyncio.get_running_loop()
+        # Solo las peticiones HTTP van al executor: la conexión SQLite de la
+        # caché pertenece al hilo que la creó, así que toda lectura o escritura
+        # de self.cache se hace aquí, en el hilo del event loop
+        await loop.run_in_executor(None, self._get_database_properties)
+        index = self._load_email_index()
+        if index is None:
+            index = self._store_email_index(await loop.run_in_executor(None, self._fetch_email_index))
+        limiter = AsyncRateLimiter(requests_per_second)
+        
+        def throttle() -> None:
+            # Se llama desde el hilo del executor antes de cada petición HTTP
+            asyncio.run_coroutine_threadsafe(limiter.acquire(), loop).result()
+        
+        async def add_one(contact: Dict) -> Optional[str]:
+            existing = index.get(contact['email'].lower())
+            if existing:
+                logger.info(f"Colegio {contact['school_name']} ({contact['email']}) ya existe en Notion CRM. Actualizando...")
+                call = functools.partial(
+                    self._update_page,
+                    page_id=existing['id'],
+                    notes=contact.get('notes', ''),
+                    contact_date=datetime.now().isoformat(),
+                    status=contact.get('status', 'Contacted'),
+                    throttle=throttle
+                )
+            else:
+                call = functools.partial(
+                    self._create_page,
+                    contact['school_name'],
+                    contact['email'],
+                    contact.get('school_id', ''),
+                    contact.get('county', ''),
+                    contact.get('dublin_zone', ''),
+                    contact.get('education_level', 'Primary'),
+                    contact.get('sender_email', ''),
+                    contact.get('notes', ''),
+                    contact.get('status', 'Contacted'),
+                    throttle=throttle
+                )
+            
+            try:
+                result = await loop.run_in_executor(None, call)
+            except Exception as e:
+                logger.error(f"❌ Error añadiendo colegio a Notion CRM: {e}")
+                return None
+            page_id = result.get('id')
+            if existing:
+                logger.info(f"✅ Registro actualizado en Notion CRM (ID: {page_id})")
+                return page_id
+            index[contact['email'].lower()] = {'id': page_id, 'school_name': contact['school_name']}
+            self._add_to_email_index(contact['email'], page_id, contact['school_name'])
+            logger.info(f"✅ Colegio {contact['school_name']} añadido a Notion CRM (ID: {page_id})")
+            return page_id
+        
+        # La primera aparición de cada email se procesa en paralelo; las
+        # repetidas esperan a que exista su página y se aplican como
+        # actualizaciones, igual que con add_school_contact uno a uno
+        first_by_email = {}
+        repeated = []
+        for position, contact in enumerate(contacts):
+            email = contact['email'].lower()
+            if email in first_by_email:
+                repeated.append(position)
+            else:
+                first_by_email[email] = position
+        
+        results: List[Optional[str]] = [None] * len(contacts)
+        firsts = list(first_by_email.values())
+        created = await asyncio.gather(*(add_one(contacts[position]) for position in firsts))
+        for position, page_id in zip(firsts, created):
+            results[position] = page_id
+        for position in repeated:
+            results[position] = await add_one(contacts[position])
+        
+        self._invalidate_cache()
+        return results
+    
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Segundos a esperar si el error es un 429 de Notion, o None si no lo es."""
+        if getattr(error, 'code', None) != 'rate_limited':
+            return None
+        headers = getattr(error, 'headers', None) or {}
+        try:
+            return float(headers.get('retry-after', 1))
+        except (TypeError, ValueError):
+            return 1.0
+    
+    def _request(self, func: Callable, *args, throttle: Optional[Callable[[], None]] = None, **kwargs):
+        """
+        Hace una petición a la API de Notion. Antes de cada intento espera el
+        turno de `throttle` (si se indica) y reintenta los 429 hasta
+        RATE_LIMIT_RETRIES veces, esperando lo que indique Retry-After.
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            if throttle is not None:
+                throttle()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                retry_after = self._retry_after(e)
+                if retry_after is None or attempt == RATE_LIMIT_RETRIES:
+                    raise
+                logger.warning(f"⏳ Límite de Notion alcanzado, reintentando en {retry_after}s...")
+                time.sleep(retry_after)
+    
+    def _create_page(
+        self,
+        school_name: str,
+        email: str,
+        school_id: str,
+        county: str,
+        dublin_zone: str,
+        education_level: str,
+        sender_email: str,
+        notes: str,
+        status: str,
+        throttle: Optional[Callable[[], None]] = None
+    ) -> Dict:
+        """
+        Crea la página de un contacto en Notion (solo la petición HTTP, sin tocar
+        la caché ni capturar errores) y devuelve la respuesta de la API.
+        `throttle` se llama antes de cada petición (ver _request).
+        """
+        def create(db_props: Dict) -> Dict:
+            # Crear propiedades de la página pero sólo incluir las que existen
+            properties = self._build_contact_properties(
+                db_props, school_name, email, school_id, county, dublin_zone,
+                education_level, sender_email, notes, status
+            )
+            return self._request(
+                self.client.pages.create,
+                parent={"database_id": self.database_id},
+                properties=properties,
+                throttle=throttle
+            )
+        
+        return self._with_fresh_schema(create, throttle)
+    
+    def _with_fresh_schema(self, request: Callable[[Dict], Dict],
+                           throttle: Optional[Callable[[], None]] = None) -> Dict:
+        """
+        Ejecuta `request(db_props)` con el esquema cacheado. Si Notion responde
+        validation_error (columna u opción renombrada o eliminada desde que se
+        guardó el esquema), descarta el esquema cacheado, lo vuelve a consultar
+        y reintenta una vez.
+        """
+        try:
+            return request(self._get_database_properties())
+        except Exception as e:
+            if getattr(e, 'code', None) != 'validation_error':
+                raise
+            logger.warning(f"⚠️ Notion rechazó las propiedades ({e}); releyendo el esquema de la DB...")
+            self._invalidate_schema()
+            if throttle is not None:
+                throttle()
+            return request(self._get_database_properties())
+    
+    @staticmethod
+    def _build_contact_properties(
+        db_props: Dict,
+        school_name: str,
+        email: str,
+        school_id: str,
+        county: str,
+        dublin_zone: str,
+        education_level: str,
+        sender_email: str,
+        notes: str,
+        status: str
+    ) -> Dict:
+        """Construye las propiedades de un contacto incluyendo solo las columnas que existen en la DB."""
+        properties = {}
+        if "School Name" in db_props:
+            properties["School Name"] = {"title": [{"text": {"content": school_name}}]}
+        if "Email" in db_props:
+            properties["Email"] = {"email": email}
+        if "Status" in db_props:
+            properties["Status"] = {"select": {"name": status}}
+        if "Contact Date" in db_props:
+            properties["Contact Date"] = {"date": {"start": datetime.now().isoformat()}}
+        
+        # Añadir campos opcionales solo si tienen valor
+        if school_id and "School ID" in db_props:
+            properties["School ID"] = {"rich_text": [{"text": {"content": school_id}}]}
+        
+        if county and "County" in db_props:
+            properties["County"] = {"select": {"name": county.title()}}
+        
+        if dublin_zone and "City Zone" in db_props:
+            properties["City Zone"] = {"select": {"name": dublin_zone}}
+        
+        if education_level and "Education Level" in db_props:
+            properties["Education Level"] = {"select": {"name": education_level}}
+        
+        if sender_email and "Sender Email" in db_props:
+            properties["Sender Email"] = {"email": sender_email}
+        
+        if notes and "Notes" in db_props:
+            properties["Notes"] = {"rich_text": [{"text": {"content": notes}}]}
+        
+        return properties
+    
     def update_school_contact(
         self,
         page_id: str,
@@ -167,8 +413,30 @@ class NotionCRMManager:
             ID de la página actualizada o None si falla
         """
         try:
+            response = self._update_page(page_id, status, notes, contact_date)
+            self._invalidate_cache()
+            logger.info(f"✅ Registro actualizado en Notion CRM (ID: {page_id})")
+            return response.get('id')
+            
+        except Exception as e:
+            logger.error(f"❌ Error actualizando registro en Notion CRM: {e}")
+            return None
+    
+    def _update_page(
+        self,
+        page_id: str,
+        status: Optional[str] = None,
+        notes: Optional[str] = None,
+        contact_date: Optional[str] = None,
+        throttle: Optional[Callable[[], None]] = None
+    ) -> Dict:
+        """
+        Actualiza la página de un contacto en Notion (solo las peticiones HTTP,
+        sin tocar la caché ni capturar errores) y devuelve la respuesta de la API.
+        `throttle` se llama antes de cada petición (ver _request).
+        """
+        def update(db_props: Dict) -> Dict:
             # Actualizar sólo propiedades existentes en la DB
-            db_props = self._get_database_properties()
             properties = {}
 
             if status and "Status" in db_props:
@@ -176,31 +444,28 @@ class NotionCRMManager:
 
             if contact_date and "Contact Date" in db_props:
                 properties["Contact Date"] = {"date": {"start": contact_date}}
-            
+        
             if notes and "Notes" in db_props:
                 # Obtener notas existentes y concatenar
-                existing_page = self.client.pages.retrieve(page_id=page_id)
+                existing_page = self._request(self.client.pages.retrieve, page_id=page_id, throttle=throttle)
                 existing_notes = ""
                 if "Notes" in existing_page["properties"]:
                     notes_content = existing_page["properties"]["Notes"].get("rich_text", [])
                     if notes_content:
                         existing_notes = notes_content[0].get("text", {}).get("content", "")
-                
+            
                 new_notes = f"{existing_notes}\n[{datetime.now().strftime('%Y-%m-%d %H:%M')}] {notes}" if existing_notes else notes
                 properties["Notes"] = {"rich_text": [{"text": {"content": new_notes}}]}
-            
+        
             # Actualizar página
-            response = self.client.pages.update(
+            return self._request(
+                self.client.pages.update,
                 page_id=page_id,
-                properties=properties
+                properties=properties,
+                throttle=throttle
             )
-            
-            logger.info(f"✅ Registro actualizado en Notion CRM (ID: {page_id})")
-            return response.get('id')
-            
-        except Exception as e:
-            logger.error(f"❌ Error actualizando registro en Notion CRM: {e}")
-            return None
+        
+        return self._with_fresh_schema(update, throttle)
     
     def _find_school_by_email(self, email: str) -> Optional[Dict]:
         """
@@ -230,67 +495,452 @@ class NotionCRMManager:
             logger.error(f"❌ Error buscando colegio por email en Notion: {e}")
             return None
 
+    def build_email_index(self) -> Dict[str, Dict[str, str]]:
+        """
+        Construye el índice email → página con un único recorrido paginado de
+        la base de datos, para resolver muchos emails sin una consulta por email.
+        El índice se guarda en memoria y, si hay caché, también en disco.
+        
+        Returns:
+            Diccionario {email en minúsculas: {'id': page_id, 'school_name': nombre}}
+        """
+        index = self._load_email_index()
+        if index is None:
+            index = self._store_email_index(self._fetch_email_index())
+        return index
+    
+    def _load_email_index(self) -> Optional[Dict[str, Dict[str, str]]]:
+        """Devuelve el índice de emails ya cargado en memoria o en la caché, o None."""
+        if self._email_index is None and self.cache is not None:
+            self._email_index = self.cache.get('email_index')
+        return self._email_index
+    
+    def _fetch_email_index(self) -> Optional[Dict[str, Dict[str, str]]]:
+        """
+        Recorre la base de datos de Notion para construir el índice de emails
+        (solo peticiones HTTP, sin tocar la caché). Devuelve None si falla.
+        """
+        index = {}
+        query_params = {"database_id": self.database_id, "page_size": 100}
+        try:
+            while True:
+                response = self.client.databases.query(**query_params)
+                for page in response.get('results', []):
+                    props = page['properties']
+                    email = props.get('Email', {}).get('email') or ''
+                    if email:
+                        index[email.lower()] = {
+                            'id': page['id'],
+                            'school_name': self._extract_title(props.get('School Name', {}))
+                        }
+                if not response.get('has_more'):
+                    break
+                query_params["start_cursor"] = response.get('next_cursor')
+        except Exception as e:
+            logger.error(f"❌ Error construyendo el índice de emails del CRM: {e}")
+            return None
+        
+        logger.info(f"✅ Índice de emails del CRM construido ({len(index)} contactos)")
+        return index
+    
+    def _store_email_index(self, index: Optional[Dict[str, Dict[str, str]]]) -> Dict[str, Dict[str, str]]:
+        """Guarda el índice recién construido en memoria y en la caché ({} si no se pudo construir)."""
+        if index is None:
+            return {}
+        self._email_index = index
+        if self.cache is not None:
+            self.cache.set('email_index', index)
+        return index
+    
+    def find_contact_by_email(self, email: str, build_index: bool = False) -> Optional[Dict[str, str]]:
+        """
+        Resuelve un email a su página del CRM.
+        Usa el índice de emails si ya está disponible (o si `build_index` es True)
+        y solo consulta la API de Notion cuando el email no está en él.
+        
+        Args:
+            email: Email del colegio
+            build_index: Construir el índice si todavía no existe
+        
+        Returns:
+            {'id': page_id, 'school_name': nombre} o None si no existe
+        """
+        index = self._email_index
+        if index is None and self.cache is not None:
+            index = self._email_index = self.cache.get('email_index')
+        if index is None and build_index:
+            index = self.build_email_index()
+        
+        if index:
+            entry = index.get(email.lower())
+            if entry:
+                return entry
+        
+        page = self._find_school_by_email(email)
+        if not page:
+            return None
+        entry = {
+            'id': page['id'],
+            'school_name': self._extract_title(page['properties'].get('School Name', {}))
+        }
+        self._add_to_email_index(email, entry['id'], entry['school_name'])
+        return entry
+    
+    def _add_to_email_index(self, email: str, page_id: Optional[str], school_name: str) -> None:
+        """Añade una página al índice de emails si ya está cargado."""
+        if self._email_index is None or not email or not page_id:
+            return
+        self._email_index[email.lower()] = {'id': page_id, 'school_name': school_name}
+        if self.cache is not None:
+            self.cache.set('email_index', self._email_index)
+
     def _get_database_properties(self) -> Dict:
         """Recupera las propiedades actuales de la base de datos en Notion.
 
+        El esquema se consulta una vez por proceso y se guarda en disco durante
+        SCHEMA_CACHE_TTL, de modo que ejecuciones seguidas de los scripts no
+        repiten la petición. Si se renombran o eliminan columnas u opciones en
+        Notion, la primera escritura que Notion rechace con validation_error lo
+        invalida (ver _with_fresh_schema). Las columnas u opciones AÑADIDAS no
+        provocan ningún error, así que no se ven hasta que caduca el TTL: las
+        escrituras las omiten entretanto. Quien necesite el esquema actual
+        (p. ej. get_status_counts) debe llamar antes a _invalidate_schema().
+
         Devuelve un diccionario con las propiedades (las claves son los nombres de las columnas).
         """
-        try:
-            resp = self.client.databases.retrieve(database_id=self.database_id)
-            props = resp.get('properties', {}) or {}
+        props = _SCHEMA_CACHE.get(self.database_id)
+        if props is not None:
             return props
-        except Exception as e:
-            logger.error(f"❌ Error obteniendo esquema de la DB de Notion: {e}")
-            return {}
+        
+        path = schema_cache_path(self.database_id)
+        try:
+            if time.time() - os.path.getmtime(path) < SCHEMA_CACHE_TTL:
+                props = read_json(path)
+        except (OSError, ValueError):
+            props = None
+        
+        if props is None:
+            try:
+                resp = self.client.databases.retrieve(database_id=self.database_id)
+                props = resp.get('properties', {}) or {}
+            except Exception as e:
+                logger.error(f"❌ Error obteniendo esquema de la DB de Notion: {e}")
+                return {}
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                write_json(path, props)
+            except OSError as e:
+                logger.debug(f"No se pudo guardar el esquema de Notion en disco: {e}")
+        
+        _SCHEMA_CACHE[self.database_id] = props
+        return props
     
-    def get_all_contacts(self, status_filter: Optional[str] = None) -> List[Dict]:
+    def _invalidate_schema(self) -> None:
+        """Descarta el esquema cacheado de la base de datos (en memoria y en disco)."""
+        _SCHEMA_CACHE.pop(self.database_id, None)
+        self._property_ids = None
+        try:
+            os.remove(schema_cache_path(self.database_id))
+        except OSError:
+            pass
+    
+    def _property_id_map(self) -> Dict[str, str]:
+        """Devuelve {nombre de propiedad: ID de propiedad}, consultando el esquema una sola vez."""
+        if self._property_ids is None:
+            props = self._get_database_properties()
+            if not props:
+                return {}
+            self._property_ids = {name: prop['id'] for name, prop in props.items() if 'id' in prop}
+        return self._property_ids
+    
+    def _filter_property_ids(self, properties: List[str]) -> List[str]:
+        """
+        Traduce campos del contacto (p. ej. 'school_name') a IDs de propiedad de
+        Notion para filter_properties. Los campos desconocidos se ignoran.
+        """
+        property_ids = self._property_id_map()
+        ids = []
+        for field in properties:
+            prop_id = property_ids.get(CONTACT_PROPERTIES.get(field, field))
+            if prop_id:
+                ids.append(prop_id)
+        return ids
+    
+    def get_all_contacts(self, status_filter: Optional[str] = None,
+                         properties: Optional[List[str]] = None) -> List[Dict]:
         """
         Obtiene todos los contactos del CRM, opcionalmente filtrados por estado.
         
         Args:
             status_filter: Estado para filtrar (contacted, followed_up, etc.)
+            properties: Campos del contacto que se necesitan (p. ej. ['school_name', 'email']).
+                Sin caché, Notion solo devuelve esas propiedades (filter_properties) y el
+                resto de campos quedan vacíos; con caché se ignora, porque la copia
+                local guarda los contactos completos.
         
         Returns:
             Lista de contactos
         """
+        if properties and self.cache is None:
+            try:
+                contacts = list(self._query_contacts(status_filter, properties=properties))
+                logger.info(f"✅ Obtenidos {len(contacts)} contactos del CRM")
+                return contacts
+            except Exception as e:
+                logger.error(f"❌ Error obteniendo contactos de Notion CRM: {e}")
+                return []
+        
+        cache_key = f"contacts:{status_filter or ''}"
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"✅ Obtenidos {len(cached)} contactos del CRM (caché)")
+                return cached
+        
         try:
-            query_params = {"database_id": self.database_id}
-            
-            if status_filter:
-                query_params["filter"] = {
-                    "property": "Status",
-                    "select": {"equals": status_filter}
-                }
-            
-            response = self.client.databases.query(**query_params)
-            
-            contacts = []
-            for page in response.get('results', []):
-                props = page['properties']
-                
-                contact = {
-                    'id': page['id'],
-                    'school_name': self._extract_title(props.get('School Name', {})),
-                    'email': props.get('Email', {}).get('email', ''),
-                    'school_id': self._extract_rich_text(props.get('School ID', {})),
-                    'county': self._extract_select(props.get('County', {})),
-                    'dublin_zone': self._extract_select(props.get('City Zone', {})),
-                    'education_level': self._extract_select(props.get('Education Level', {})),
-                    'status': self._extract_select(props.get('Status', {})),
-                    'contact_date': self._extract_date(props.get('Contact Date', {})),
-                    'sender_email': props.get('Sender Email', {}).get('email', ''),
-                    'notes': self._extract_rich_text(props.get('Notes', {})),
-                    'last_updated': page.get('last_edited_time', '')
-                }
-                contacts.append(contact)
-            
+            if self.cache is not None:
+                self.incremental_refresh()
+                contacts = list(self._iter_synced_contacts(status_filter))
+            else:
+                contacts = list(self._query_contacts(status_filter))
             logger.info(f"✅ Obtenidos {len(contacts)} contactos del CRM")
+            if self.cache is not None:
+                self.cache.set(cache_key, contacts)
             return contacts
             
         except Exception as e:
             logger.error(f"❌ Error obteniendo contactos de Notion CRM: {e}")
             return []
     
+    def preview_contacts(self, limit: int = 3, properties: Optional[List[str]] = None,
+                         sorts: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        Devuelve los primeros contactos del CRM con una única consulta
+        (page_size=limit), sin recorrer la paginación.
+        
+        Args:
+            limit: Número de contactos a devolver (máximo 100)
+            properties: Campos del contacto que se necesitan (ver get_all_contacts)
+            sorts: Orden de la consulta en formato de la API de Notion (orden por defecto si es None)
+        
+        Returns:
+            Lista con como mucho `limit` contactos
+        """
+        query_params = {"database_id": self.database_id, "page_size": max(1, min(limit, 100))}
+        if sorts:
+            query_params["sorts"] = sorts
+        if properties:
+            property_ids = self._filter_property_ids(properties)
+            if property_ids:
+                query_params["filter_properties"] = property_ids
+        try:
+            response = self.client.databases.query(**query_params)
+            return [self._page_to_contact(page) for page in response.get('results', [])[:limit]]
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo contactos de Notion CRM: {e}")
+            return []
+    
+    def get_recent_contacts(self, n: int = 3, properties: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Devuelve los `n` contactos creados más recientemente, ordenados por
+        Notion (created_time descendente) en una única consulta.
+        
+        Args:
+            n: Número de contactos a devolver (máximo 100)
+            properties: Campos del contacto que se necesitan (ver get_all_contacts)
+        
+        Returns:
+            Lista con como mucho `n` contactos, del más reciente al más antiguo
+        """
+        return self.preview_contacts(
+            n, properties=properties,
+            sorts=[{"timestamp": "created_time", "direction": "descending"}]
+        )
+    
+    def count_contacts(self) -> int:
+        """
+        Cuenta los contactos del CRM sin convertir las páginas a contactos.
+        
+        Returns:
+            Número total de contactos (0 si falla la consulta)
+        """
+        if self.cache is not None:
+            cached = self.cache.get('contacts_count')
+            if cached is not None:
+                return cached
+        try:
+            count = self._count_pages()
+        except Exception as e:
+            logger.error(f"❌ Error contando contactos en Notion CRM: {e}")
+            return 0
+        if self.cache is not None:
+            self.cache.set('contacts_count', count)
+        return count
+    
+    def iter_contacts(self, status_filter: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Genera los contactos del CRM a medida que llegan de Notion, sin
+        acumular la lista completa en memoria (como mucho una página de 100).
+        Con caché, se recorre la consulta si está fresca o, si ha caducado,
+        la copia local tras sincronizar solo los cambios.
+        
+        Args:
+            status_filter: Estado para filtrar (contacted, followed_up, etc.)
+        
+        Yields:
+            Contactos con el mismo formato que get_all_contacts
+        """
+        if self.cache is not None:
+            cached = self.cache.get(f"contacts:{status_filter or ''}")
+            if cached is not None:
+                yield from cached
+                return
+            self.incremental_refresh()
+            yield from self._iter_synced_contacts(status_filter)
+            return
+        yield from self._query_contacts(status_filter)
+    
+    def incremental_refresh(self) -> int:
+        """
+        Sincroniza la copia local de contactos con Notion trayendo solo las
+        páginas editadas desde la última sincronización (filtro por
+        last_edited_time). La primera vez descarga la base de datos completa.
+        Las páginas borradas o archivadas en Notion no se detectan; para una
+        copia exacta se vacía la caché con CRMCache.clear() (opción --refresh
+        de manage_notion_crm.py) y la siguiente sincronización es completa.
+        
+        Returns:
+            Número de contactos descargados en esta sincronización
+        """
+        if self.cache is None:
+            return 0
+        
+        last_sync = self.cache.get_meta('last_sync_ts')
+        query_filter = None
+        if last_sync:
+            # Notion redondea last_edited_time al minuto: on_or_after vuelve a
+            # traer las ediciones del mismo minuto, y el upsert lo hace idempotente
+            query_filter = {
+                "timestamp": "last_edited_time",
+                "last_edited_time": {"on_or_after": last_sync}
+            }
+        
+        fetched = list(self._query_contacts(query_filter=query_filter))
+        latest = self.cache.upsert_contacts(fetched)
+        if latest and (not last_sync or latest > last_sync):
+            self.cache.set_meta('last_sync_ts', latest)
+        
+        logger.info(f"🔄 Sincronización {'incremental' if last_sync else 'completa'} del CRM: {len(fetched)} contactos")
+        return len(fetched)
+    
+    def _iter_synced_contacts(self, status_filter: Optional[str] = None) -> Iterator[Dict]:
+        """Recorre la copia local de contactos aplicando el filtro de estado."""
+        for contact in self.cache.iter_contacts():
+            if not status_filter or contact['status'] == status_filter:
+                yield contact
+    
+    def _query_contacts(self, status_filter: Optional[str] = None,
+                        query_filter: Optional[Dict] = None,
+                        properties: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Recorre la paginación de Notion convirtiendo cada página en un contacto."""
+        query_params = {"database_id": self.database_id, "page_size": 100}
+        if status_filter:
+            query_params["filter"] = {
+                "property": "Status",
+                "select": {"equals": status_filter}
+            }
+        elif query_filter:
+            query_params["filter"] = query_filter
+        if properties:
+            property_ids = self._filter_property_ids(properties)
+            if property_ids:
+                query_params["filter_properties"] = property_ids
+        
+        while True:
+            response = self.client.databases.query(**query_params)
+            for page in response.get('results', []):
+                yield self._page_to_contact(page)
+            if not response.get('has_more'):
+                return
+            query_params["start_cursor"] = response.get('next_cursor')
+    
+    def _page_to_contact(self, page: Dict) -> Dict:
+        """Convierte una página de la base de datos en el diccionario de contacto."""
+        props = page['properties']
+        return {
+            'id': page['id'],
+            'school_name': self._extract_title(props.get('School Name', {})),
+            'email': props.get('Email', {}).get('email', ''),
+            'school_id': self._extract_rich_text(props.get('School ID', {})),
+            'county': self._extract_select(props.get('County', {})),
+            'dublin_zone': self._extract_select(props.get('City Zone', {})),
+            'education_level': self._extract_select(props.get('Education Level', {})),
+            'status': self._extract_select(props.get('Status', {})),
+            'contact_date': self._extract_date(props.get('Contact Date', {})),
+            'sender_email': props.get('Sender Email', {}).get('email', ''),
+            'notes': self._extract_rich_text(props.get('Notes', {})),
+            'last_updated': page.get('last_edited_time', '')
+        }
+    
+    def get_status_counts(self) -> Dict[str, int]:
+        """
+        Cuenta los contactos por estado con consultas filtradas en Notion,
+        una por cada opción de Status, sin convertir las páginas a contactos.
+        Las opciones se leen del esquema actual (no del cacheado), para incluir
+        las creadas en Notion al escribir estados nuevos.
+        
+        Returns:
+            Diccionario {estado: número de contactos} ('sin_estado' para los vacíos)
+        """
+        if self.cache is not None:
+            cached = self.cache.get('contacts_by_status')
+            if cached is not None:
+                return cached
+        
+        try:
+            self._invalidate_schema()
+            status_prop = self._get_database_properties().get('Status')
+            if not status_prop:
+                return {}
+            
+            options = status_prop.get('select', {}).get('options', [])
+            filters = [
+                (option['name'], {"property": "Status", "select": {"equals": option['name']}})
+                for option in options
+            ]
+            filters.append(('sin_estado', {"property": "Status", "select": {"is_empty": True}}))
+            
+            counts = {}
+            for name, status_filter in filters:
+                count = self._count_pages(status_filter)
+                if count:
+                    counts[name] = count
+            if self.cache is not None:
+                self.cache.set('contacts_by_status', counts)
+            return counts
+            
+        except Exception as e:
+            logger.error(f"❌ Error contando contactos por estado en Notion CRM: {e}")
+            return {}
+    
+    def _invalidate_cache(self) -> None:
+        """Descarta las consultas de contactos cacheadas tras una escritura."""
+        if self.cache is not None:
+            self.cache.invalidate('contacts')
+    
+    def _count_pages(self, query_filter: Optional[Dict] = None) -> int:
+        """Cuenta las páginas que cumplen un filtro (todas si es None) recorriendo la paginación de Notion."""
+        query_params = {"database_id": self.database_id, "page_size": 100}
+        if query_filter:
+            query_params["filter"] = query_filter
+        count = 0
+        while True:
+            response = self.client.databases.query(**query_params)
+            count += len(response.get('results', []))
+            if not response.get('has_more'):
+                return count
+            query_params["start_cursor"] = response.get('next_cursor')
+    
     @staticmethod
     def _extract_title(prop: Dict) -> str:
         """Extrae texto de una propiedad tipo title."""
@@ -324,10 +974,17 @@ class NotionCRMManager:
         return ''
 
 
+def schema_cache_path(database_id: str) -> str:
+    """Ruta del esquema de Notion guardado en disco, junto a la caché del CRM."""
+    return os.path.join(os.path.dirname(default_cache_path()), f"notion_schema_{database_id}.json")
+
+
+@functools.lru_cache(maxsize=1)
 def create_notion_database_schema() -> Dict:
     """
     Devuelve el esquema sugerido para la base de datos de Notion.
     Este esquema debe crearse manualmente en Notion o usando la API.
+    Se construye una sola vez: el diccionario devuelto es compartido y no debe modificarse.
     
     Returns:
         Diccionario con la estructura de propiedades
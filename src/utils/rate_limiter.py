@@ -0,0 +1,47 @@
+"""
+Limitador de ritmo asíncrono para APIs con cuota por segundo.
+Espacia el inicio de las peticiones a un intervalo fijo (por ejemplo ~340 ms
+para las 3 peticiones/segundo de Notion) sin limitar cuántas hay en vuelo,
+de modo que la latencia de red de unas se solapa con el envío de otras.
+"""
+
+import asyncio
+
+
+class AsyncRateLimiter:
+    """
+    Uso:
+        limiter = AsyncRateLimiter(requests_per_second=3)
+        async with limiter:
+            ...  # petición
+    """
+
+    def __init__(self, requests_per_second: float):
+        """
+        Args:
+            requests_per_second: Número máximo de peticiones iniciadas por segundo
+        """
+        self.interval = 1.0 / requests_per_second
+        self._lock = None
+        self._next_start = 0.0
+
+    async def acquire(self) -> None:
+        """Espera hasta que se pueda iniciar la siguiente petición."""
+        if self._lock is None:
+            # Se crea dentro del loop en marcha (necesario en Python < 3.10)
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            wait = self._next_start - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+                now = self._next_start
+            self._next_start = now + self.interval
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
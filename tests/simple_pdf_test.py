@@ -4,8 +4,10 @@ Prueba simple para generación de PDFs personalizados
 """
 import asyncio
 import os
+import re
 import sys
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 # Añadir el directorio raíz al path
@@ -13,7 +15,6 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
     from src.utils.document_reader import DocumentReader
-    from src.scrapers.scraper_educationposts import EducationPosts
     print("✅ Importaciones exitosas")
 except ImportError as e:
     print(f"❌ Error de importación: {e}")
@@ -23,6 +24,47 @@ except ImportError as e:
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger("simple_test")
 
+# Caracteres no alfanuméricos, que se sustituyen por '_' en los nombres de archivo
+_UNSAFE_FILENAME_CHARS = re.compile(r'\W')
+
+# DocumentReader y plantilla de cada proceso del pool (se cargan una vez por proceso)
+_worker_reader = None
+_worker_template = None
+
+
+def _init_worker(template_bytes):
+    """Inicializa un proceso del pool con la plantilla ya leída."""
+    global _worker_reader, _worker_template
+    _worker_reader = DocumentReader()
+    _worker_template = template_bytes
+
+
+def _generate_one(output_path, offer_data):
+    """Genera un PDF en un proceso del pool (PyMuPDF no es seguro entre hilos)."""
+    return _worker_reader.customize_application_form_pdf_from_bytes(
+        _worker_template, output_path, offer_data
+    )
+
+
+def _file_size(path):
+    """Tamaño del archivo o None si no existe (un único stat en lugar de exists + getsize)."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+
+async def _generate_all(template_bytes, jobs):
+    """Genera en paralelo los PDFs de `jobs` [(output_path, offer_data), ...]."""
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1),
+                             initializer=_init_worker, initargs=(template_bytes,)) as pool:
+        return await asyncio.gather(*[
+            loop.run_in_executor(pool, _generate_one, output_path, offer_data)
+            for output_path, offer_data in jobs
+        ], return_exceptions=True)
+
+
 def test_pdf_generation():
     """Prueba simple de generación de PDFs"""
     try:
@@ -35,6 +77,8 @@ def test_pdf_generation():
             return False
         
         logger.info(f"✅ Plantilla encontrada: {template_path}")
+        # Leer la plantilla una sola vez; cada proceso la recibe al arrancar
+        template_bytes = DocumentReader.load_pdf_template(template_path)
         
         # Crear datos de prueba
         test_offers = [
@@ -50,8 +94,9 @@ def test_pdf_generation():
             }
         ]
         
-        # Crear DocumentReader
-        doc_reader = DocumentReader()
+        # El scraper solo se usa para preparar los datos: importarlo aquí evita
+        # cargar aiohttp/bs4 en los procesos del pool y cuando falta la plantilla
+        from src.scrapers.scraper_educationposts import EducationPosts
         scraper = EducationPosts()
         
         # Crear directorio de salida
@@ -59,34 +104,34 @@ def test_pdf_generation():
         os.makedirs(output_dir, exist_ok=True)
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_prefix = os.path.join(output_dir, "Test_PDF_")
         
+        # Preparar los datos de cada oferta (barato) y generar los PDFs en paralelo
+        jobs = []
         for i, offer in enumerate(test_offers):
             try:
-                # Preparar datos
                 offer_data = scraper.prepare_offer_data_for_application_form(offer)
-                
-                # Crear nombre de archivo
-                school_safe = ''.join(c if c.isalnum() else '_' for c in offer_data['school_name'])
-                output_path = os.path.join(output_dir, f"Test_PDF_{school_safe}_{timestamp}_{i}.pdf")
-                
-                # Generar PDF personalizado
-                result = doc_reader.customize_application_form_pdf(
-                    template_path=template_path,
-                    output_path=output_path,
-                    offer_data=offer_data
-                )
-                
-                if result and os.path.exists(result):
-                    file_size = os.path.getsize(result)
-                    logger.info(f"✅ PDF generado: {os.path.basename(result)} ({file_size} bytes)")
-                    logger.info(f"   • Escuela: {offer_data['school_name']}")
-                    logger.info(f"   • Posición: {offer_data['position']}")
-                    logger.info(f"   • Roll Number: {offer_data['roll_number']}")
-                else:
-                    logger.error(f"❌ Error generando PDF para {offer_data['school_name']}")
-                    
             except Exception as e:
                 logger.error(f"❌ Error con oferta #{i+1}: {str(e)}")
+                continue
+            school_safe = _UNSAFE_FILENAME_CHARS.sub('_', offer_data['school_name'])
+            output_path = f"{output_prefix}{school_safe}_{timestamp}_{i}.pdf"
+            jobs.append((output_path, offer_data))
+        
+        results = asyncio.run(_generate_all(template_bytes, jobs)) if jobs else []
+        
+        for (output_path, offer_data), result in zip(jobs, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Error generando PDF para {offer_data['school_name']}: {str(result)}")
+                continue
+            file_size = _file_size(result) if result else None
+            if file_size is not None:
+                logger.info(f"✅ PDF generado: {os.path.basename(result)} ({file_size} bytes)")
+                logger.info(f"   • Escuela: {offer_data['school_name']}")
+                logger.info(f"   • Posición: {offer_data['position']}")
+                logger.info(f"   • Roll Number: {offer_data['roll_number']}")
+            else:
+                logger.error(f"❌ Error generando PDF para {offer_data['school_name']}")
         
         logger.info("🎯 Prueba completada")
         return True
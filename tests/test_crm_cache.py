@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la caché local del CRM de Notion.
+"""
+
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.crm_cache import CRMCache, default_cache_path
+
+CONTACTS = [{'id': 'abc', 'school_name': 'Scoil Bhríde', 'email': 'office@scoilbhride.ie'}]
+
+
+def test_get_returns_stored_value(tmp_path):
+    """Una entrada fresca se devuelve tal cual"""
+    cache = CRMCache(str(tmp_path / 'crm.sqlite3'))
+    cache.set('contacts:', CONTACTS)
+    assert cache.get('contacts:') == CONTACTS
+    assert cache.get('contacts:interested') is None
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    """Las entradas con el TTL vencido no se devuelven"""
+    cache = CRMCache(str(tmp_path / 'crm.sqlite3'))
+    cache.set('contacts:', CONTACTS, ttl=-1)
+    assert cache.get('contacts:') is None
+
+
+def test_invalidate_by_prefix(tmp_path):
+    """invalidate elimina solo las claves del recurso indicado"""
+    cache = CRMCache(str(tmp_path / 'crm.sqlite3'))
+    cache.set('contacts:', CONTACTS)
+    cache.set('contacts_by_status', {'Contacted': 1})
+    cache.set('schema', {'Status': {}})
+    cache.invalidate('contacts')
+    assert cache.get('contacts:') is None
+    assert cache.get('contacts_by_status') is None
+    assert cache.get('schema') == {'Status': {}}
+
+
+def test_upsert_contacts_by_page_id(tmp_path):
+    """Los contactos se reemplazan por ID y se devuelve la última edición vista"""
+    cache = CRMCache(str(tmp_path / 'crm.sqlite3'))
+    first = dict(CONTACTS[0], last_updated='2025-01-10T09:00:00.000Z')
+    edited = dict(first, status='Interested', last_updated='2025-01-12T10:30:00.000Z')
+    assert cache.upsert_contacts([first]) == '2025-01-10T09:00:00.000Z'
+    assert cache.upsert_contacts([edited]) == '2025-01-12T10:30:00.000Z'
+    assert cache.upsert_contacts([]) is None
+    assert list(cache.iter_contacts()) == [edited]
+    cache.set_meta('last_sync_ts', '2025-01-12T10:30:00.000Z')
+    assert cache.get_meta('last_sync_ts') == '2025-01-12T10:30:00.000Z'
+
+
+def test_cache_is_scoped_by_database(tmp_path, monkeypatch):
+    """Cada base de datos de Notion usa su propio archivo de caché"""
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    assert default_cache_path('db-a') != default_cache_path('db-b')
+    first = CRMCache(database_id='db-a')
+    first.set('email_index', {'office@scoilbhride.ie': {'id': 'abc'}})
+    first.close()
+    second = CRMCache(database_id='db-b')
+    assert second.get('email_index') is None
+
+
+def test_clear_forces_full_sync(tmp_path):
+    """clear borra entradas, contactos sincronizados e índice de emails"""
+    cache = CRMCache(str(tmp_path / 'crm.sqlite3'))
+    cache.set('contacts:', CONTACTS)
+    cache.set('email_index', {'office@scoilbhride.ie': {'id': 'abc'}})
+    cache.upsert_contacts([dict(CONTACTS[0], last_updated='2025-01-10T09:00:00.000Z')])
+    cache.set_meta('last_sync_ts', '2025-01-10T09:00:00.000Z')
+    cache.clear()
+    assert cache.get('contacts:') is None
+    assert cache.get('email_index') is None
+    assert list(cache.iter_contacts()) == []
+    assert cache.get_meta('last_sync_ts') is None
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Pruebas de lectura/escritura JSON con orjson y con el fallback de json estándar.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import json_io
+
+OFERTAS = [
+    {'school': 'Scoil Mhuire Gan Smál', 'vacancy': 'Mainstream Class Teacher', 'roll_number': '20486R'},
+    {'school': "St. Patrick's National School", 'vacancy': 'SET Teacher', 'roll_number': None},
+]
+
+
+def test_round_trip(tmp_path):
+    """Lo que se escribe se vuelve a leer igual"""
+    path = tmp_path / 'ofertas.json'
+    json_io.write_json(str(path), OFERTAS)
+    assert json_io.read_json(str(path)) == OFERTAS
+
+
+def test_output_is_utf8_and_indented(tmp_path):
+    """La salida conserva los acentos y se indenta como json.dump(indent=2)"""
+    path = tmp_path / 'ofertas.json'
+    json_io.write_json(str(path), OFERTAS)
+    text = path.read_text(encoding='utf-8')
+    assert 'Smál' in text
+    assert json.loads(text) == OFERTAS
+    assert text.startswith('[\n  {\n    "school"')
+
+
+def test_stdlib_fallback(tmp_path, monkeypatch):
+    """Sin orjson se obtiene el mismo contenido con json estándar"""
+    monkeypatch.setattr(json_io, 'ORJSON_AVAILABLE', False)
+    path = tmp_path / 'ofertas.json'
+    json_io.write_json(str(path), OFERTAS)
+    assert path.read_bytes() == json.dumps(OFERTAS, ensure_ascii=False, indent=2).encode('utf-8')
+    assert json_io.read_json(str(path)) == OFERTAS
+
+
+def test_async_round_trip(tmp_path):
+    """Las variantes asíncronas producen el mismo archivo que las síncronas"""
+    path = tmp_path / 'ofertas.json'
+
+    async def round_trip():
+        await json_io.write_json_async(str(path), OFERTAS)
+        return await json_io.read_json_async(str(path))
+
+    assert asyncio.run(round_trip()) == OFERTAS
+    assert path.read_bytes() == json_io.dumps_json(OFERTAS)
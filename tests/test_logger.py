@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Pruebas de los handlers de archivo compartidos de src.utils.logger.
+"""
+
+import logging
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.logger import buffered_file_handler, file_handler
+
+
+def test_file_handler_is_lazy(tmp_path):
+    """El archivo de log no se crea hasta el primer registro"""
+    path = tmp_path / 'script.log'
+    handler = file_handler(str(path), '%(message)s')
+    assert not path.exists()
+    handler.emit(logging.makeLogRecord({'msg': 'hola'}))
+    handler.close()
+    assert path.read_text(encoding='utf-8') == 'hola\n'
+
+
+def test_buffered_handler_shares_formatter(tmp_path):
+    """Los handlers con el mismo formato reutilizan un único Formatter"""
+    first = buffered_file_handler(str(tmp_path / 'a.log'), '%(message)s')
+    second = buffered_file_handler(str(tmp_path / 'b.log'), '%(message)s')
+    assert first.target.formatter is second.target.formatter
+    first.close()
+    second.close()
+    assert not (tmp_path / 'a.log').exists()
+
+
+def test_timed_buffered_handler_flushes_after_interval(tmp_path):
+    """Con flush_interval el búfer se vuelca al llegar un registro pasado el intervalo"""
+    path = tmp_path / 'bot.log'
+    handler = buffered_file_handler(str(path), '%(message)s', flush_interval=60)
+    handler.handle(logging.makeLogRecord({'msg': 'uno', 'levelno': logging.INFO}))
+    assert not path.exists()
+    handler._last_flush -= 60
+    handler.handle(logging.makeLogRecord({'msg': 'dos', 'levelno': logging.INFO}))
+    assert path.read_text(encoding='utf-8') == 'uno\ndos\n'
+    handler.close()
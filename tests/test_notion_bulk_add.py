@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Pruebas del alta masiva de contactos en el CRM de Notion con una caché real
+y un cliente de Notion simulado (sin red).
+"""
+
+import asyncio
+import itertools
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip('dotenv')
+pytest.importorskip('httpx')
+pytest.importorskip('notion_client')
+
+from src.utils import notion_crm_manager
+from src.utils.crm_cache import CRMCache
+from src.utils.notion_crm_manager import NotionCRMManager
+
+SCHEMA = {'School Name': {}, 'Email': {}, 'Status': {}, 'Contact Date': {}, 'Notes': {}}
+
+
+class FakeNotionClient:
+    """Imita los endpoints de notion_client usados por el gestor."""
+
+    def __init__(self, existing_pages):
+        self.created = []
+        self.updated = []
+        self.schema_reads = 0
+        self.reject_next_create = False
+        self.rate_limited_updates = 0
+        self._ids = itertools.count(1)
+        self.databases = SimpleNamespace(
+            retrieve=self._retrieve_schema,
+            query=lambda **kwargs: {'results': existing_pages, 'has_more': False},
+        )
+        self.pages = SimpleNamespace(
+            create=self._create,
+            update=self._update,
+            retrieve=lambda page_id: {'properties': {'Notes': {'rich_text': []}}},
+        )
+
+    def _retrieve_schema(self, database_id):
+        self.schema_reads += 1
+        return {'properties': SCHEMA}
+
+    def _create(self, parent, properties):
+        if self.reject_next_create:
+            self.reject_next_create = False
+            raise NotionValidationError()
+        self.created.append(properties['Email']['email'])
+        return {'id': f"page-{next(self._ids)}"}
+
+    def _update(self, page_id, properties):
+        if self.rate_limited_updates:
+            self.rate_limited_updates -= 1
+            raise NotionRateLimitedError()
+        self.updated.append(page_id)
+        return {'id': page_id}
+
+
+class NotionValidationError(Exception):
+    """Error de la API con el código que usa notion_client para propiedades inválidas."""
+    code = 'validation_error'
+
+
+class NotionRateLimitedError(Exception):
+    """Respuesta 429 de la API (sin espera, para que la prueba sea rápida)."""
+    code = 'rate_limited'
+    headers = {'retry-after': '0'}
+
+
+def _page(page_id, email, school_name):
+    return {
+        'id': page_id,
+        'properties': {
+            'Email': {'email': email},
+            'School Name': {'title': [{'text': {'content': school_name}}]},
+        },
+    }
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    monkeypatch.setattr(notion_crm_manager, '_SCHEMA_CACHE', {})
+    cache = CRMCache(str(tmp_path / 'crm.sqlite3'))
+    mgr = NotionCRMManager(api_key='secret', database_id='db', cache=cache)
+    mgr.client = FakeNotionClient([_page('page-old', 'office@stmarys.ie', "St. Mary's NS")])
+    yield mgr
+    mgr.close()
+    cache.close()
+
+
+def test_bulk_add_with_sqlite_cache(manager):
+    """Altas y actualizaciones con una CRMCache real: la caché solo se usa desde el hilo del loop"""
+    contacts = [
+        {'school_name': 'Scoil Bhríde', 'email': 'office@scoilbhride.ie'},
+        {'school_name': "St. Mary's NS", 'email': 'Office@StMarys.ie', 'notes': 'Segundo envío'},
+    ]
+    results = asyncio.run(manager.bulk_add_contacts(contacts, requests_per_second=1000))
+
+    assert results == ['page-1', 'page-old']
+    assert manager.client.created == ['office@scoilbhride.ie']
+    assert manager.client.updated == ['page-old']
+    assert manager.cache.get('email_index')['office@scoilbhride.ie']['id'] == 'page-1'
+
+
+def test_bulk_add_deduplicates_emails(manager):
+    """Dos filas con el mismo email crean una sola página; la segunda la actualiza"""
+    contacts = [
+        {'school_name': 'Scoil Bhríde', 'email': 'office@scoilbhride.ie'},
+        {'school_name': 'Scoil Bhríde', 'email': 'OFFICE@scoilbhride.ie', 'status': 'Followed Up'},
+    ]
+    results = asyncio.run(manager.bulk_add_contacts(contacts, requests_per_second=1000))
+
+    assert results == ['page-1', 'page-1']
+    assert manager.client.created == ['office@scoilbhride.ie']
+    assert manager.client.updated == ['page-1']
+
+
+def test_validation_error_refreshes_schema(manager, tmp_path):
+    """Un validation_error descarta el esquema cacheado, lo vuelve a leer y reintenta una vez"""
+    contacts = [{'school_name': 'Scoil Bhríde', 'email': 'office@scoilbhride.ie'}]
+    manager.client.reject_next_create = True
+    results = asyncio.run(manager.bulk_add_contacts(contacts, requests_per_second=1000))
+
+    assert results == ['page-1']
+    assert manager.client.created == ['office@scoilbhride.ie']
+    assert manager.client.schema_reads == 2
+
+
+def test_every_request_waits_for_the_limiter(manager, monkeypatch):
+    """Cada petición HTTP (y cada reintento tras un 429) ocupa un turno del limitador"""
+    acquired = []
+
+    class CountingLimiter(notion_crm_manager.AsyncRateLimiter):
+        async def acquire(self):
+            acquired.append(1)
+            await super().acquire()
+
+    monkeypatch.setattr(notion_crm_manager, 'AsyncRateLimiter', CountingLimiter)
+    manager.client.rate_limited_updates = 2
+    contacts = [{'school_name': "St. Mary's NS", 'email': 'office@stmarys.ie', 'notes': 'Segundo envío'}]
+    results = asyncio.run(manager.bulk_add_contacts(contacts, requests_per_second=1000))
+
+    assert results == ['page-old']
+    assert manager.client.updated == ['page-old']
+    # pages.retrieve de las notas + tres intentos de pages.update
+    assert len(acquired) == 4
@@ -7,6 +7,7 @@ manteniendo la estructura original del PDF plantilla.
 import os
 import sys
 import json
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 # Agregar el directorio raíz del proyecto al path
@@ -15,6 +16,23 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from src.utils.document_reader import DocumentReader
 from src.utils.logger import setup_logger
 
+# DocumentReader y plantilla de cada proceso del pool (se cargan una vez por proceso)
+_worker_reader = None
+_worker_template = None
+
+
+def _init_worker(template_bytes):
+    """Inicializa un proceso del pool con la plantilla ya leída."""
+    global _worker_reader, _worker_template
+    _worker_reader = DocumentReader()
+    _worker_template = template_bytes
+
+
+def _render_one(job):
+    """Genera un PDF en un proceso del pool (PyMuPDF no es seguro entre hilos)."""
+    output_path, offer = job
+    return _worker_reader.customize_application_form_pdf_from_bytes(_worker_template, output_path, offer)
+
 def test_pdf_generation():
     """Prueba la generación de PDFs personalizados"""
     
@@ -88,7 +106,6 @@ def test_with_real_data():
     """Prueba con datos reales de ofertas"""
     
     logger = setup_logger()
-    doc_reader = DocumentReader()
     
     # Buscar archivos JSON de ofertas
     data_dir = "data"
@@ -130,28 +147,30 @@ def test_with_real_data():
     os.makedirs(output_dir, exist_ok=True)
     
     # Procesar las primeras 3 ofertas
-    success_count = 0
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    numbers = []
+    jobs = []
     for i, offer in enumerate(offers[:3]):
         if 'position' in offer and 'school_name' in offer:
             logger.info(f"Procesando oferta {i+1}: {offer.get('position', 'N/A')}")
-            
-            # Generar nombre de archivo
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_filename = f"application_form_{i+1}_{timestamp}.pdf"
-            output_path = os.path.join(output_dir, output_filename)
-            
-            # Generar PDF
-            result = doc_reader.customize_application_form_pdf(
-                template_path=template_pdf,
-                output_path=output_path,
-                offer_data=offer
-            )
-            
+            numbers.append(i + 1)
+            jobs.append((os.path.join(output_dir, output_filename), offer))
+    
+    # Generar los PDFs en paralelo, leyendo la plantilla una sola vez
+    success_count = 0
+    if jobs:
+        template_bytes = DocumentReader.load_pdf_template(template_pdf)
+        with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1),
+                                 initializer=_init_worker, initargs=(template_bytes,)) as pool:
+            results = list(pool.map(_render_one, jobs))
+        
+        for number, result in zip(numbers, results):
             if result:
                 success_count += 1
-                logger.info(f"✅ PDF {i+1} generado: {result}")
+                logger.info(f"✅ PDF {number} generado: {result}")
             else:
-                logger.error(f"❌ Error generando PDF {i+1}")
+                logger.error(f"❌ Error generando PDF {number}")
     
     logger.info(f"Resultado: {success_count}/{min(3, len(offers))} PDFs generados exitosamente")
     return success_count > 0
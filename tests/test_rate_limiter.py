@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Pruebas del limitador de ritmo asíncrono.
+"""
+
+import asyncio
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.rate_limiter import AsyncRateLimiter
+
+
+def test_requests_are_spaced():
+    """Los inicios de petición quedan separados al menos por el intervalo"""
+    async def run():
+        limiter = AsyncRateLimiter(requests_per_second=50)
+        loop = asyncio.get_running_loop()
+        starts = []
+
+        async def request():
+            async with limiter:
+                starts.append(loop.time())
+
+        await asyncio.gather(*(request() for _ in range(5)))
+        return starts
+
+    starts = asyncio.run(run())
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert len(starts) == 5
+    assert all(gap >= 0.02 * 0.9 for gap in gaps)